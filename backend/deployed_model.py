@@ -2,22 +2,80 @@
 import os
 import joblib
 import numpy as np
-from sentence_transformers import SentenceTransformer
+
+from src.utils.keyword_matcher import KeywordMatcher
+from src.ml_models.text_features import TextFeatureEngine, FEATURE_COLUMNS as TEXT_FEATURE_COLUMNS
+from src.ml_models.embedder import get_lazy_embedder, DEFAULT_EMBED_MODEL_NAME
+from src.ml_models.embedding_cache import get_embedding_cache
 
 BASE = os.path.dirname(__file__)
 MODEL_PATH = os.path.join(BASE, "ml", "regressor.pkl")
-# optional embedder for text -> features
-EMBEDDER = None
-try:
-    EMBEDDER = SentenceTransformer("all-MiniLM-L6-v2")
-except Exception:
-    EMBEDDER = None
+EMBED_INFO = os.path.join(BASE, "ml", "embedder_name.txt")
+
+
+def _embed_model_name():
+    # written by ml/train_regressor.py next to the regressor
+    try:
+        with open(EMBED_INFO) as f:
+            return f.read().strip() or DEFAULT_EMBED_MODEL_NAME
+    except OSError:
+        return DEFAULT_EMBED_MODEL_NAME
+
+
+# optional embedder for text -> features; loaded on first use, not at import
+_embedder = get_lazy_embedder(_embed_model_name())
+
+
+def get_embedder():
+    """The SentenceTransformer (loaded on first call), or None if unavailable."""
+    return _embedder.get()
+
+
+def warmup_embedder(background: bool = True):
+    """Load the embedder ahead of the first request (e.g. at app startup)."""
+    return _embedder.warmup(background=background)
+
+
+def unload_embedder():
+    _embedder.unload()
+
+
+def embed_texts(texts):
+    """
+    float32 embeddings for `texts`; headlines embedded before (here, by
+    another worker or by a training run) come from the shared on-disk cache.
+    """
+    cache = get_embedding_cache(_embedder.model_name)
+    return cache.encode(texts, lambda batch: _embedder.encode(batch, batch_size=64))
+
+
+def embedder_stats():
+    stats = _embedder.stats()
+    stats["cache"] = get_embedding_cache(_embedder.model_name).stats()
+    return stats
+
+
+def __getattr__(name):
+    # keep `deployed_model.EMBEDDER` working without loading at import time
+    if name == "EMBEDDER":
+        return get_embedder()
+    raise AttributeError(name)
+
+# simple keyword score: +10 per keyword present
+KEYWORD_MATCHER = KeywordMatcher.uniform(
+    ["strike","delay","congestion","shortage","conflict","sanction","flood","earthquake","shutdown","protest","blockade"],
+    10,
+)
+TEXT_FEATURES = TextFeatureEngine(KEYWORD_MATCHER)
 
 _model = None
 def _load():
     global _model
     if _model is None:
-        _model = joblib.load(MODEL_PATH)
+        # numpy arrays inside the pickle are mapped read-only and shared across
+        # workers; ml/train_regressor.py replaces the file atomically, so a
+        # mapping never sees it rewritten underneath
+        _model = joblib.load(MODEL_PATH, mmap_mode="r")
     return _model
 
 def explain_score(score):
@@ -33,13 +91,14 @@ def predict_from_features(features: dict):
     features: dict expected keys:
       news_negative_pct, keyword_score, weather_risk, port_delay_index, supplier_concentration, hist_delay
     """
-    model = _load()
-    # ensure order match training
-    order = ["news_negative_pct", "keyword_score", "weather_risk", "port_delay_index", "supplier_concentration", "hist_delay"]
-    x = [features.get(k, 0.0) for k in order]
-    pred = model.predict([x])[0]
-    pred = float(max(0, min(100, pred)))
-    return {"risk_score": round(pred,2), "status": explain_score(pred)}
+    return _predict_rows([[features.get(k, 0.0) for k in FEATURE_ORDER]])[0]
+
+# ensure order match training
+FEATURE_ORDER = ["news_negative_pct", "keyword_score", "weather_risk", "port_delay_index", "supplier_concentration", "hist_delay"]
+
+def _predict_rows(rows):
+    preds = np.clip(_load().predict(np.asarray(rows, dtype=np.float64)), 0, 100)
+    return [{"risk_score": round(float(pred), 2), "status": explain_score(pred)} for pred in preds]
 
 def predict_text(text: str, extras: dict = None):
     """
@@ -48,26 +107,38 @@ def predict_text(text: str, extras: dict = None):
     """
     extras = extras or {}
     # naive text features: negative sentiment pct (TextBlob) + keyword hits
-    try:
-        from textblob import TextBlob
-        sentiment = TextBlob(text).sentiment.polarity
-        # negative polarity -> convert to percentage
-        news_negative_pct = max(0.0, -sentiment*100)
-    except Exception:
-        news_negative_pct = 10.0
-    # simple keyword score
-    kw_list = ["strike","delay","congestion","shortage","conflict","sanction","flood","earthquake","shutdown","protest","blockade"]
-    kscore = 0
-    t = text.lower() if text else ""
-    for kw in kw_list:
-        if kw in t:
-            kscore += 10
+    return _predict_text_features(TEXT_FEATURES.features_for_text(text), extras)
+
+def predict_articles(articles: list, extras: dict = None):
+    """
+    Like predict_text for a list of article dicts; per-article sentiment and
+    keyword hits are cached, so re-scoring an overlapping window is cheap.
+    """
+    return _predict_text_features(TEXT_FEATURES.features(articles), extras or {})
+
+def predict_article_windows(windows: list, extras: dict = None):
+    """
+    predict_articles for many article lists at once (e.g. one per country):
+    features come from the per-article cache, and the regressor runs once
+    over the whole matrix. Results in input order.
+    """
+    if not windows:
+        return []
+    extras = extras or {}
+    text = TEXT_FEATURES.feature_matrix(windows)
+    rows = [_feature_row(dict(zip(TEXT_FEATURE_COLUMNS, t)), extras) for t in text.tolist()]
+    return _predict_rows(rows)
+
+def _feature_row(text_feats: dict, extras: dict):
     features = {
-        "news_negative_pct": news_negative_pct,
-        "keyword_score": kscore,
+        "news_negative_pct": text_feats["news_negative_pct"],
+        "keyword_score": text_feats["keyword_score"],
         "weather_risk": extras.get("weather_risk", 0),
         "port_delay_index": extras.get("port_delay_index", 5),
         "supplier_concentration": extras.get("supplier_concentration", 0.3),
         "hist_delay": extras.get("hist_delay", 5)
     }
-    return predict_from_features(features)
+    return [features[k] for k in FEATURE_ORDER]
+
+def _predict_text_features(text_feats: dict, extras: dict):
+    return _predict_rows([_feature_row(text_feats, extras)])[0]
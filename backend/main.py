@@ -1,9 +1,12 @@
-from fastapi import FastAPI, BackgroundTasks, HTTPException, Depends
+from fastapi import FastAPI, HTTPException, Depends, Request
+from fastapi.responses import StreamingResponse, JSONResponse
+from starlette.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
 from dotenv import load_dotenv
 from passlib.context import CryptContext
 import os
+import json
 import joblib
 import numpy as np
 
@@ -13,10 +16,13 @@ from app.db import db
 # -----------------------------
 # INTERNAL IMPORTS
 # -----------------------------
-from src.data_ingestion.fetch_news import fetch_news_for_country
-from src.ml_models.risk_predictor import compute_risk_from_news
+from src.data_ingestion.fetch_news import fetch_news_for_country, get_news_cache_stats
+from src.ml_models.risk_predictor import compute_risk_from_news, RiskWindowAggregator
 from src.utils.store_history import store_risk, init_db
 from src.utils.scheduler import start_scheduler, stop_scheduler
+from src.utils.single_flight import SingleFlight
+from src.utils.keyword_matcher import KeywordMatcher
+from src.ml_models.text_features import TextFeatureEngine
 
 # Routers
 from app.routes.history import router as history_router
@@ -27,9 +33,13 @@ from app.routes.inventory import router as inventory_router
 from app.routes.auth import router as auth_router
 
 # ML training + predictor functions
-from ml.train import train as train_model
-from ml.deployed_model import get_risk_model
-from ml.retrain_service import retrain_model, retrain_model_background
+from ml.deployed_model import (
+    MODEL_VERSION, get_model_holder, get_registry, activate_version, start_shadow, stop_shadow, shadow_observe, shadow_stats,
+)
+from ml.model_registry import UnknownModelVersion
+from ml.batch_input import parse_batch_body, UnsupportedBatchFormat, BatchTooLarge
+from ml.retrain_service import RETRAIN_MODE
+from ml.job_executor import JobExecutor
 
 # Auth
 from auth.roles import require_role
@@ -42,7 +52,19 @@ app = FastAPI()
 # -----------------------------
 # LOAD NEW RISK MODEL
 # -----------------------------
-risk_model = get_risk_model()
+# resolved per request (risk_model_holder.get()) so hot swaps reach the endpoints
+risk_model_holder = get_model_holder()
+
+
+def _on_job_complete(job):
+    # training ran in a worker process; pick up whatever it activated
+    if job.kind == "train":
+        get_registry().forget(MODEL_VERSION)  # v1 files were rewritten in place
+    risk_model_holder.reload(background=True)
+
+
+# retraining and /api/train run in worker processes, one at a time by default
+job_executor = JobExecutor(on_complete=_on_job_complete)
 # CORS
 app.add_middleware(
     CORSMiddleware,
@@ -79,15 +101,32 @@ def root():
 class CountryData(BaseModel):
     country: str
 
+# concurrent /api/analyze calls for the same country share one computation
+_analyze_flight = SingleFlight()
+
+# running heuristic aggregates per country window; refreshes only score
+# the articles that arrived or aged out since the previous call
+_analyze_windows = RiskWindowAggregator()
+_risk_score_windows = RiskWindowAggregator()
+
+# keyword score feature for the feature-based model (+10 per keyword present)
+ANALYZE_KEYWORD_MATCHER = KeywordMatcher.uniform(
+    ["strike","delay","congestion","shortage","conflict","sanction","flood","earthquake","shutdown","protest","blockade","war","policy","inflation"],
+    10,
+)
+ANALYZE_TEXT_FEATURES = TextFeatureEngine(ANALYZE_KEYWORD_MATCHER)
+
 @app.post("/api/analyze")
 def analyze_data(data: CountryData):
     country = data.country
-    articles = fetch_news_for_country(country, page_size=12)
+    key = " ".join(country.split()).lower()
+    result = _analyze_flight.do(key, _analyze_country, country)
+    # followers may have spelled the country differently from the leader
+    return {**result, "country": country}
 
-    combined = "\n".join(
-        (a.get("title") or "") + " " + (a.get("description") or "")
-        for a in articles
-    )
+
+def _analyze_country(country: str):
+    articles = fetch_news_for_country(country, page_size=12)
 
     # AI MODEL PREDICTION - use feature-based model if available
     if False:
@@ -96,30 +135,9 @@ def analyze_data(data: CountryData):
             heuristic = compute_risk_from_news(articles)
 
             # Compute simple text-derived features: negative sentiment pct and keyword score.
-            try:
-                from textblob import TextBlob
-            except Exception:
-                TextBlob = None
-
-            # sentiment -> negative pct
-            try:
-                if TextBlob is not None:
-                    # combine title+description for sentiment
-                    text_for_sentiment = "\n".join((a.get("title") or "") + " " + (a.get("description") or "") for a in articles)
-                    sentiment = TextBlob(text_for_sentiment).sentiment.polarity
-                    news_negative_pct = max(0.0, -sentiment * 100)
-                else:
-                    news_negative_pct = 10.0
-            except Exception:
-                news_negative_pct = 10.0
-
-            # keyword score (simple count * weight)
-            kw_list = ["strike","delay","congestion","shortage","conflict","sanction","flood","earthquake","shutdown","protest","blockade","war","policy","inflation"]
-            kw_score = 0
-            combined_lower = combined.lower()
-            for kw in kw_list:
-                if kw in combined_lower:
-                    kw_score += 10
+            text_feats = ANALYZE_TEXT_FEATURES.features(articles)
+            news_negative_pct = text_feats["news_negative_pct"]
+            kw_score = text_feats["keyword_score"]
 
             # other features: use reasonable defaults or lookups when available
             weather_risk = 0
@@ -158,7 +176,7 @@ def analyze_data(data: CountryData):
     
 
     # FALLBACK HEURISTIC
-    risk = compute_risk_from_news(articles)
+    risk = _analyze_windows.update(" ".join(country.split()).lower(), articles)
     try:
         store_risk(country, risk["risk_score"])
     except:
@@ -180,7 +198,7 @@ def analyze_data(data: CountryData):
 @app.get("/api/risk_score/{country}")
 def get_risk_score(country: str):
     articles = fetch_news_for_country(country, page_size=5)
-    risk = compute_risk_from_news(articles)
+    risk = _risk_score_windows.update(" ".join(country.split()).lower(), articles)
     return {
         "country": country,
         "risk_score": risk.get("risk_score"),
@@ -193,10 +211,16 @@ def get_risk_score(country: str):
 @app.on_event("startup")
 def on_startup():
     init_db()
+    # load + smoke-test the risk model without blocking startup
+    risk_model_holder.warm()
     try:
         start_scheduler(interval_minutes=360)
     except Exception as e:
         print("Scheduler error:", e)
+    # only workers that embed text should set this; the rest never load the model
+    if os.getenv("EMBEDDER_WARMUP", "0") == "1":
+        from deployed_model import warmup_embedder
+        warmup_embedder(background=True)
 
 @app.on_event("shutdown")
 def on_shutdown():
@@ -204,18 +228,27 @@ def on_shutdown():
         stop_scheduler()
     except:
         pass
+    job_executor.shutdown()
 
 # -----------------------------
 # TRAIN MODEL
 # -----------------------------
-@app.post("/api/train")
-def api_train(background: bool = True, background_tasks: BackgroundTasks = None):
-    if background and background_tasks:
-        background_tasks.add_task(train_model, True)
-        return {"status": "training_started_background"}
+# a synchronous /api/train call holds its request at most this long; after
+# that it answers 202 with the job id and the job keeps running
+TRAIN_WAIT_SECONDS = float(os.getenv("TRAIN_WAIT_SECONDS", "600"))
 
-    model, metrics = train_model(save_model=True)
-    return {"status": "trained", "metrics": metrics}
+@app.post("/api/train")
+def api_train(background: bool = True):
+    job, deduplicated = job_executor.submit("train")
+    if background:
+        return {"status": "training_started_background", "job_id": job.id, "deduplicated": deduplicated}
+
+    if not job_executor.wait(job, TRAIN_WAIT_SECONDS):
+        return JSONResponse(status_code=202, content={"status": job.status, "job_id": job.id,
+                                                      "deduplicated": deduplicated})
+    log = db.retrain_logs.find_one({"job_id": job.id}, {"_id": 0}) if db is not None else None
+    return {"status": "trained" if log and log.get("status") == "completed" else job.status,
+            "job_id": job.id, "metrics": (log or {}).get("metrics")}
 
 # -----------------------------
 # PREDICT ENDPOINT
@@ -246,10 +279,67 @@ class SupplyChainRiskRequest(BaseModel):
 
 @app.post("/api/supply-chain/predict")
 def predict_supply_chain_risk(request: SupplyChainRiskRequest):
-    result = risk_model.predict(request.dict())
+    model = risk_model_holder.get()
+    input_data = request.dict()
+    result = model.predict(input_data)
+    shadow_observe(model, [input_data])
     return result
 
 
+PREDICT_BATCH_MAX_ROWS = int(os.getenv("PREDICT_BATCH_MAX_ROWS", "100000"))
+# bodies larger than this are refused before they are read
+PREDICT_BATCH_MAX_BYTES = int(os.getenv("PREDICT_BATCH_MAX_BYTES", str(64 * 2**20)))
+
+
+async def _read_batch_body(request: Request) -> bytes:
+    too_large = HTTPException(status_code=413, detail=f"batch body larger than {PREDICT_BATCH_MAX_BYTES} bytes")
+    length = request.headers.get("content-length")
+    if length is not None and length.isdigit() and int(length) > PREDICT_BATCH_MAX_BYTES:
+        raise too_large
+    chunks, size = [], 0
+    async for chunk in request.stream():
+        size += len(chunk)
+        if size > PREDICT_BATCH_MAX_BYTES:  # chunked or understated Content-Length
+            raise too_large
+        chunks.append(chunk)
+    return b"".join(chunks)
+
+
+@app.post("/api/supply-chain/predict/batch")
+async def predict_supply_chain_risk_batch(request: Request):
+    """
+    Score many suppliers in one request. Body: JSON array of rows, JSON
+    object of columns, CSV with a header row, or Arrow IPC (see
+    ml/batch_input.py). The whole body is validated before scoring; results
+    stream back as NDJSON, one line per input row, in input order.
+    """
+    # the whole stream is scored by the model current at request start
+    model = risk_model_holder.get()
+    body = await _read_batch_body(request)
+    try:
+        X = await run_in_threadpool(
+            parse_batch_body, body, request.headers.get("content-type"), model.feature_names,
+            PREDICT_BATCH_MAX_ROWS,
+        )
+    except BatchTooLarge as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    except UnsupportedBatchFormat as e:
+        raise HTTPException(status_code=415, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+
+    def _lines():
+        # sync generator: Starlette runs it in the threadpool, chunk by chunk
+        shadow_observe(model, X)
+        for start, results in model.iter_predictions(X):
+            yield "".join(
+                json.dumps({"index": start + i, **r}) + "\n" for i, r in enumerate(results)
+            )
+
+    return StreamingResponse(_lines(), media_type="application/x-ndjson",
+                             headers={"X-Row-Count": str(len(X)), "X-Model-Version": model.version})
+
+
 
 
 @app.get("/api/predict")
@@ -314,32 +404,52 @@ def get_all_users(current_user: dict = Depends(require_role("admin"))):
 
 @app.post("/api/admin/retrain")
 def admin_retrain(
-    background_tasks: BackgroundTasks,
+    mode: str | None = None,
     current_user: dict = Depends(require_role("admin"))
 ):
-    background_tasks.add_task(retrain_model_background)
-
+    if mode not in (None, "incremental", "full"):
+        raise HTTPException(status_code=422, detail="mode must be 'incremental' or 'full'")
+    # an identical job still waiting in the queue is returned instead of a new one
+    job, deduplicated = job_executor.submit("retrain", mode=mode or RETRAIN_MODE)
 
     return {
-        "message": "Retraining started in background"
+        "message": "Retraining already queued" if deduplicated else "Retraining started in background",
+        "mode": job.params.get("mode"),
+        "job_id": job.id,
+        "status": job.status,
     }
+
+
+@app.delete("/api/admin/retrain/{job_id}")
+def admin_cancel_retrain(job_id: str, current_user: dict = Depends(require_role("admin"))):
+    job = job_executor.cancel(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"unknown job {job_id}")
+    return job.to_dict()
+
+
+@app.get("/api/admin/jobs")
+def admin_jobs(current_user: dict = Depends(require_role("admin"))):
+    return job_executor.stats()
+
+
 @app.get("/api/admin/model-version")
 def get_model_version(current_user: dict = Depends(require_role("admin"))):
-    try:
-        with open("ml/model_version.txt", "r") as f:
-            version = f.read()
-    except:
-        version = "unknown" 
-
-    return {"model_version": version}
+    registry = get_registry()
+    version = registry.active_version()
+    if version is None:
+        return {"model_version": "unknown"}
+    serving = risk_model_holder.status()["model_version"]
+    return {"model_version": version, "serving_version": serving, "metadata": registry.metadata(version)}
 
 
 @app.get("/api/admin/retrain-status")
-def get_retrain_status(current_user: dict = Depends(require_role("admin"))):
+def get_retrain_status(job_id: str | None = None, current_user: dict = Depends(require_role("admin"))):
 
+    # _id order is insertion order, so queued jobs (no started_at yet) count too
     latest_log = db.retrain_logs.find_one(
-        {},
-        sort=[("started_at", -1)]
+        {"job_id": job_id} if job_id else {},
+        sort=[("_id", -1)]
     )
 
     if not latest_log:
@@ -354,6 +464,76 @@ from services.admin_analytics import get_admin_stats
 def admin_dashboard(current_user: dict = Depends(require_role("admin"))):
     return get_admin_stats()
 
+
+@app.get("/api/admin/news-cache")
+def admin_news_cache(current_user: dict = Depends(require_role("admin"))):
+    return get_news_cache_stats()
+
+@app.get("/api/admin/predict-batching")
+def admin_predict_batching(current_user: dict = Depends(require_role("admin"))):
+    return risk_model_holder.get().batching_stats()
+
+@app.get("/api/admin/predict-cache")
+def admin_predict_cache(current_user: dict = Depends(require_role("admin"))):
+    return risk_model_holder.get().cache_stats()
+
+
+@app.get("/api/admin/memory")
+def admin_memory(current_user: dict = Depends(require_role("admin"))):
+    return risk_model_holder.get().memory_report()
+
+
+class ShadowRequest(BaseModel):
+    version: str
+    sample_rate: float = 0.05
+
+
+@app.get("/api/admin/models")
+def admin_models(current_user: dict = Depends(require_role("admin"))):
+    registry = get_registry()
+    return {"versions": registry.versions(), **registry.stats()}
+
+
+@app.post("/api/admin/models/{version}/activate")
+def admin_activate_model(version: str, current_user: dict = Depends(require_role("admin"))):
+    try:
+        model = activate_version(version)
+    except UnknownModelVersion:
+        raise HTTPException(status_code=404, detail=f"unknown model version {version}")
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"model {version} failed to load: {e}")
+    return {"message": f"Model {model.version} is now serving", **risk_model_holder.status()}
+
+
+@app.get("/api/admin/shadow")
+def admin_shadow_stats(current_user: dict = Depends(require_role("admin"))):
+    return shadow_stats()
+
+
+@app.post("/api/admin/shadow")
+def admin_start_shadow(req: ShadowRequest, current_user: dict = Depends(require_role("admin"))):
+    try:
+        return start_shadow(req.version, req.sample_rate)
+    except UnknownModelVersion:
+        raise HTTPException(status_code=404, detail=f"unknown model version {req.version}")
+
+
+@app.delete("/api/admin/shadow")
+def admin_stop_shadow(current_user: dict = Depends(require_role("admin"))):
+    return stop_shadow()
+
+
+@app.get("/api/admin/model/status")
+def admin_model_status(current_user: dict = Depends(require_role("admin"))):
+    return risk_model_holder.status()
+
+
+@app.post("/api/admin/model/reload")
+def admin_model_reload(current_user: dict = Depends(require_role("admin"))):
+    # load + smoke test + swap happen on a background thread; poll model/status
+    risk_model_holder.reload(background=True, fresh=True)
+    return {"message": "Model reload started", **risk_model_holder.status()}
+
 # Organization auto-creation logic (if needed) requires a current user context.  
 # This must be executed inside an authenticated endpoint, not at module import.
 
@@ -0,0 +1,161 @@
+# backend/ml/batch_input.py
+"""
+Parse batch prediction bodies into one validated float64 feature matrix.
+
+Accepted bodies (by Content-Type):
+  application/json     [{"feature": v, ...}, ...]         row objects
+                       {"feature": [v, ...], ...}         columnar
+  text/csv             header row naming the features, one row per line
+  application/vnd.apache.arrow.stream / .file
+                       Arrow IPC table (needs pyarrow)
+
+Columns are reordered to the model's feature order; extra columns are
+ignored. Every problem found is reported at once (ValueError), so a client
+can fix a 40k-row upload in one round trip instead of row by row.
+
+With max_rows, the row count is checked as soon as it is known, before any
+column or matrix is built (BatchTooLarge).
+"""
+import io
+import csv
+import json
+from typing import List
+
+import numpy as np
+
+try:
+    import pyarrow as pa
+    import pyarrow.ipc as pa_ipc
+    PYARROW_AVAILABLE = True
+except Exception:
+    pa = None
+    pa_ipc = None
+    PYARROW_AVAILABLE = False
+
+ARROW_CONTENT_TYPES = ("application/vnd.apache.arrow.stream", "application/vnd.apache.arrow.file")
+MAX_REPORTED_ERRORS = 20
+
+
+class UnsupportedBatchFormat(ValueError):
+    pass
+
+
+class BatchTooLarge(ValueError):
+    pass
+
+
+def _check_rows(n_rows: int, max_rows: int = None):
+    if max_rows is not None and n_rows > max_rows:
+        raise BatchTooLarge(f"at most {max_rows} rows per batch")
+
+
+def _column(values, name: str, errors: List[str], reported: set) -> np.ndarray:
+    try:
+        col = np.asarray(values, dtype=np.float64)
+    except (TypeError, ValueError):
+        col = np.empty(len(values), dtype=np.float64)
+        for i, v in enumerate(values):
+            try:
+                col[i] = float(v)
+            except (TypeError, ValueError):
+                col[i] = np.nan
+                reported.add((i, name))
+                if len(errors) < MAX_REPORTED_ERRORS:
+                    errors.append(f"row {i}: {name}={v!r} is not a number")
+    if col.ndim != 1:
+        raise ValueError(f"column {name} must be a flat list of numbers")
+    return col
+
+
+def _matrix(columns: dict, n_rows: int, feature_names: List[str]) -> np.ndarray:
+    missing = [f for f in feature_names if f not in columns]
+    if missing:
+        raise ValueError(f"missing features: {', '.join(missing)}")
+
+    errors: List[str] = []
+    reported = set()
+    X = np.empty((n_rows, len(feature_names)), dtype=np.float64)
+    for j, name in enumerate(feature_names):
+        col = _column(columns[name], name, errors, reported)
+        if len(col) != n_rows:
+            raise ValueError(f"column {name} has {len(col)} values, expected {n_rows}")
+        X[:, j] = col
+
+    bad = ~np.isfinite(X)
+    if bad.any():
+        for i, j in zip(*np.nonzero(bad)):
+            if len(errors) >= MAX_REPORTED_ERRORS:
+                break
+            if (int(i), feature_names[j]) not in reported:
+                errors.append(f"row {i}: {feature_names[j]} is missing or not finite")
+    if errors:
+        raise ValueError("; ".join(errors))
+    return X
+
+
+def _from_json(body: bytes, feature_names: List[str], max_rows: int = None) -> np.ndarray:
+    data = json.loads(body or b"null")
+    if isinstance(data, list):
+        _check_rows(len(data), max_rows)
+        if not all(isinstance(r, dict) for r in data):
+            raise ValueError("a JSON array body must contain one object per row")
+        missing = sorted({f for r in data for f in feature_names if f not in r},
+                         key=feature_names.index)
+        if missing:
+            rows = [i for i, r in enumerate(data) if any(f not in r for f in missing)][:MAX_REPORTED_ERRORS]
+            raise ValueError(f"missing features {', '.join(missing)} in rows {rows}")
+        columns = {f: [r[f] for r in data] for f in feature_names}
+        return _matrix(columns, len(data), feature_names)
+    if isinstance(data, dict):
+        lengths = {len(v) for v in data.values() if isinstance(v, list)}
+        n_rows = lengths.pop() if len(lengths) == 1 else (max(lengths) if lengths else 0)
+        _check_rows(n_rows, max_rows)
+        return _matrix(data, n_rows, feature_names)
+    raise ValueError("JSON body must be an array of rows or an object of columns")
+
+
+def _from_csv(body: bytes, feature_names: List[str], max_rows: int = None) -> np.ndarray:
+    reader = csv.reader(io.StringIO(body.decode("utf-8-sig")))
+    header = next(reader, None)
+    if not header:
+        raise ValueError("CSV body needs a header row")
+    header = [h.strip() for h in header]
+    rows = []
+    for r in reader:
+        if r:
+            rows.append(r)
+            _check_rows(len(rows), max_rows)
+    positions = {name: i for i, name in enumerate(header)}
+    columns = {}
+    for name in feature_names:
+        if name in positions:
+            i = positions[name]
+            columns[name] = [r[i].strip() if i < len(r) else "" for r in rows]
+    return _matrix(columns, len(rows), feature_names)
+
+
+def _from_arrow(body: bytes, feature_names: List[str], max_rows: int = None) -> np.ndarray:
+    if not PYARROW_AVAILABLE:
+        raise UnsupportedBatchFormat("Arrow bodies need pyarrow installed on the server")
+    buf = pa.py_buffer(body)
+    try:
+        table = pa_ipc.open_stream(buf).read_all()
+    except Exception:
+        table = pa_ipc.open_file(buf).read_all()
+    _check_rows(table.num_rows, max_rows)
+    columns = {name: table.column(name).to_numpy(zero_copy_only=False)
+               for name in feature_names if name in table.column_names}
+    return _matrix(columns, table.num_rows, feature_names)
+
+
+def parse_batch_body(body: bytes, content_type: str, feature_names: List[str],
+                     max_rows: int = None) -> np.ndarray:
+    """(n_rows, n_features) float64 matrix in `feature_names` order."""
+    ctype = (content_type or "application/json").split(";")[0].strip().lower()
+    if ctype in ("application/json", "text/json"):
+        return _from_json(body, feature_names, max_rows)
+    if ctype in ("text/csv", "application/csv"):
+        return _from_csv(body, feature_names, max_rows)
+    if ctype in ARROW_CONTENT_TYPES:
+        return _from_arrow(body, feature_names, max_rows)
+    raise UnsupportedBatchFormat(f"unsupported content type {ctype!r}")
@@ -2,8 +2,8 @@
 import csv
 import os
 from datetime import datetime
-from src.data_ingestion.fetch_news import fetch_news_for_country
-from src.ml_models.risk_predictor import compute_risk_from_news
+from src.data_ingestion.batch_query import fetch_news_batched
+from src.ml_models.risk_predictor import compute_risk_from_news_batch
 
 OUT_CSV = os.path.join("backend", "data", "training.csv")
 
@@ -16,10 +16,12 @@ COUNTRIES = [
 def collect_one_run():
     os.makedirs(os.path.dirname(OUT_CSV), exist_ok=True)
     rows = []
+    articles_by_country = fetch_news_batched(COUNTRIES, page_size=20)
+    risks = compute_risk_from_news_batch(articles_by_country)
     for country in COUNTRIES:
-        articles = fetch_news_for_country(country, page_size=20)
+        articles = articles_by_country.get(country, [])
         combined_text = "\n".join(((a.get("title") or "") + " " + (a.get("description") or "")) for a in articles)
-        risk = compute_risk_from_news(articles)
+        risk = risks[country]
         rows.append({
             "country": country,
             "date": datetime.utcnow().isoformat(),
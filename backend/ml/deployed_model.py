@@ -1,9 +1,18 @@
 import os
 import json
+import hashlib
+import shutil
+import time
+import warnings
+import threading
 import joblib
 import numpy as np
 
-import os
+from ml.micro_batch import MicroBatcher
+from ml.model_registry import ModelRegistry, ShadowScorer
+from ml.forest_compiler import compile_forest, verify_compiled, save_compiled, load_compiled, COMPILED_FORMAT
+from src.data_ingestion.news_cache import TTLLRUCache
+from src.utils.memory_report import process_memory, mapped_file_memory
 
 BASE_DIR = os.path.dirname(__file__)
 MODEL_DIR = os.path.join(BASE_DIR, "models")
@@ -15,70 +24,577 @@ FEATURE_IMPORTANCE_PATH = os.path.join(
 )
 FEATURE_NAMES_PATH = os.path.join(MODEL_DIR, "feature_names.json")
 
+# concurrent predict() calls are merged into one predict_proba over up to
+# PREDICT_BATCH_MAX_SIZE rows, waiting at most PREDICT_BATCH_MAX_WAIT_MS for
+# company; a max size of 1 turns batching off. With the compiled forest a
+# batch costs well under a millisecond, so by default nothing waits: requests
+# that arrive while a batch runs simply form the next one.
+PREDICT_BATCH_MAX_SIZE = int(os.getenv("PREDICT_BATCH_MAX_SIZE", "64"))
+PREDICT_BATCH_MAX_WAIT_MS = float(os.getenv("PREDICT_BATCH_MAX_WAIT_MS", "0"))
+
+# the forest is always compiled (its node tables also give the per-row
+# driver contributions). Small batches walk it in NumPy (~85us per row vs
+# ~8ms through sklearn); above COMPILED_FOREST_MAX_ROWS, or with
+# USE_COMPILED_FOREST=0, leaves come from sklearn's C-level apply()
+USE_COMPILED_FOREST = os.getenv("USE_COMPILED_FOREST", "1") == "1"
+COMPILED_FOREST_MAX_ROWS = int(os.getenv("COMPILED_FOREST_MAX_ROWS", "256"))
+
+# repeat queries (dashboards re-polling a portfolio) are answered from an LRU
+# keyed on the model version and the feature vector rounded to
+# PREDICT_CACHE_DECIMALS places; PREDICT_CACHE_SIZE=0 disables it. Each
+# RiskModel has its own cache, so reload_model() starts from an empty one.
+PREDICT_CACHE_SIZE = int(os.getenv("PREDICT_CACHE_SIZE", "4096"))
+PREDICT_CACHE_DECIMALS = int(os.getenv("PREDICT_CACHE_DECIMALS", "6"))
+
+# with MODEL_MMAP on, the compiled forest is written once per model file to
+# COMPILED_MODEL_DIR as .npy arrays and every worker memory-maps it
+# read-only: N uvicorn/gunicorn workers share one physical copy through the
+# page cache instead of each unpickling ~100MB. The sklearn pickle itself is
+# only loaded when something needs model.apply(), and then privately: sklearn
+# copies every tree's node arrays out of the pickle on load, so mapping it
+# would save nothing. Artifacts of replaced pickles are removed after a swap.
+MODEL_MMAP = os.getenv("MODEL_MMAP", "1") == "1"
+COMPILED_DIR = os.getenv("COMPILED_MODEL_DIR", os.path.join(MODEL_DIR, "compiled"))
+# a ".compiling-" directory this old was left behind by a process that died
+COMPILED_TMP_MAX_AGE = 3600
+
+# each serving process compares the registry's active version (an mtime-cached
+# read of registry.json) with the one it serves at most every
+# MODEL_SYNC_SECONDS, and swaps in the background when they differ; that is
+# how a version activated by another worker or a retrain job reaches every
+# uvicorn worker
+MODEL_SYNC_SECONDS = float(os.getenv("MODEL_SYNC_SECONDS", "2"))
+
+RISK_LEVEL_BINS = np.array([0.3, 0.6])
+RISK_LEVELS = np.array(["Low", "Medium", "High"])
+TOP_DRIVERS = 3
+
 
 class RiskModel:
-    def __init__(self):
-        self.model = joblib.load(MODEL_PATH)
+    def __init__(self, model_path: str = MODEL_PATH, version: str = MODEL_VERSION,
+                 feature_importance_path: str = FEATURE_IMPORTANCE_PATH):
+        self.version = version
+        self.model_path = model_path
+        self._model = None
+        self._model_lock = threading.Lock()
 
-        with open(FEATURE_IMPORTANCE_PATH, "r") as f:
+        with open(feature_importance_path, "r") as f:
             self.feature_importance = json.load(f)
 
         with open(FEATURE_NAMES_PATH, "r") as f:
             self.feature_names = json.load(f)
 
+        self._importance = np.array(
+            [self.feature_importance[feature] for feature in self.feature_names], dtype=np.float64
+        )
+        self._feature_array = np.array(self.feature_names, dtype=object)
+
+        self.compiled = None
+        self.compiled_path = None
+        try:
+            if MODEL_MMAP:
+                self.compiled = self._load_shared_compiled()
+            else:
+                compiled = compile_forest(self.model)
+                verify_compiled(self.model, compiled)
+                self.compiled = compiled
+        except Exception as e:
+            print("⚠️ Compiled forest unavailable, using sklearn and importance-based drivers:", e)
+        if self.compiled is None:
+            self.model  # fail at load time, not on the first request
+
+        self.cache = None
+        if PREDICT_CACHE_SIZE > 0:
+            self.cache = TTLLRUCache(max_entries=PREDICT_CACHE_SIZE, ttl=float("inf"))
+
+        self.batcher = None
+        if PREDICT_BATCH_MAX_SIZE > 1:
+            self.batcher = MicroBatcher(
+                self._predict_misses,
+                max_batch_size=PREDICT_BATCH_MAX_SIZE,
+                max_wait_ms=PREDICT_BATCH_MAX_WAIT_MS,
+                name="risk-predict-batch",
+            )
+
+    @property
+    def model(self):
+        """The sklearn estimator, loaded on first use."""
+        if self._model is None:
+            with self._model_lock:
+                if self._model is None:
+                    self._model = joblib.load(self.model_path)
+        return self._model
+
+    def _artifact_dir(self) -> str:
+        return _artifact_dir(self.model_path, self.version)
+
+    def _load_shared_compiled(self):
+        path = self._artifact_dir()
+        if not os.path.exists(os.path.join(path, "meta.json")):
+            compiled = compile_forest(self.model)
+            verify_compiled(self.model, compiled)
+            save_compiled(compiled, path, model_path=os.path.abspath(self.model_path), version=self.version)
+            print(f"Compiled forest written to {path}")
+        self.compiled_path = path
+        return load_compiled(path, mmap=True)
+
+    def memory_report(self) -> dict:
+        """Process memory plus how much of it is the shared compiled forest."""
+        report = {"process": process_memory(), "sklearn_loaded": self._model is not None}
+        if self.compiled is not None:
+            report["compiled_mb"] = round(self.compiled.nbytes / 2**20, 1)
+        if self.compiled_path is not None:
+            report["compiled_path"] = self.compiled_path
+            report["compiled_mapping"] = mapped_file_memory(self.compiled_path)
+            # what each extra worker would otherwise hold privately
+            saved = self.compiled.nbytes
+            if self._model is None:
+                saved += os.path.getsize(self.model_path)
+            report["saved_per_worker_mb"] = round(saved / 2**20, 1)
+        return report
+
     def predict(self, input_data: dict):
+        if self.cache is not None:
+            # a hit skips the batch queue and inference entirely
+            key = self._cache_keys(self.to_matrix([input_data]))[0]
+            cached, _ = self.cache.get(key)
+            if cached is not None:
+                return _copy_result(cached)
+        if self.batcher is None:
+            return self._predict_misses([input_data])[0]
+        return self.batcher(input_data)
+
+    def _predict_misses(self, inputs: list):
+        # predict() already looked these up in the cache
+        features = self.to_matrix(inputs)
+        results = self._score_matrix(features)
+        if self.cache is None:
+            return results
+        for key, result in zip(self._cache_keys(features), results):
+            self.cache.set(key, result)
+        return [_copy_result(r) for r in results]
+
+    def to_matrix(self, inputs: list) -> np.ndarray:
         # Ensure correct feature order
-        features = np.array(
-            [[input_data[feature] for feature in self.feature_names]]
-        )
+        return np.array(
+            [[input_data[feature] for feature in self.feature_names] for input_data in inputs],
+            dtype=np.float64,
+        ).reshape(len(inputs), len(self.feature_names))
 
-        probability = self.model.predict_proba(features)[0][1]
+    def predict_matrix(self, features: np.ndarray):
+        """Results for an (n, n_features) matrix already in feature_names order."""
+        if self.cache is None or not len(features):
+            return self._score_matrix(features)
 
-        risk_level = self._map_risk_level(probability)
+        keys = self._cache_keys(features)
+        results = [None] * len(features)
+        misses = []
+        for i, key in enumerate(keys):
+            cached, _ = self.cache.get(key)
+            if cached is None:
+                misses.append(i)
+            else:
+                results[i] = _copy_result(cached)
+        if misses:
+            for i, result in zip(misses, self._score_matrix(features[misses])):
+                self.cache.set(keys[i], result)
+                results[i] = _copy_result(result)
+        return results
 
-        top_drivers = self._get_top_drivers(input_data)
+    def _cache_keys(self, features: np.ndarray) -> list:
+        # + 0.0 folds -0.0 into 0.0 so both round to the same key
+        quantized = np.round(features, PREDICT_CACHE_DECIMALS) + 0.0
+        return [(self.version, row.tobytes()) for row in quantized]
 
-        return {
-            "model_version": MODEL_VERSION,
-            "risk_probability": float(probability),
-            "risk_level": risk_level,
-            "top_risk_drivers": top_drivers,
-        }
+    def cache_stats(self):
+        return self.cache.stats() if self.cache is not None else {"enabled": False}
+
+    def _score_matrix(self, features: np.ndarray):
+        probabilities, contributions = self.explain_matrix(features)
+        levels = RISK_LEVELS[np.searchsorted(RISK_LEVEL_BINS, probabilities, side="right")]
+        order = self._top_drivers(contributions)
+        drivers = self._feature_array[order].tolist()
+        top_contributions = np.take_along_axis(contributions, order, axis=1)
+        # only features that actually pushed risk up count as drivers
+        n_drivers = (top_contributions > 0).sum(axis=1).tolist()
+        top_contributions = np.round(top_contributions, 4).tolist()
+        return [
+            {
+                "model_version": self.version,
+                "risk_probability": probability,
+                "risk_level": level,
+                "top_risk_drivers": drivers[i][:n],
+                "top_risk_driver_contributions": top_contributions[i][:n],
+            }
+            for i, (probability, level, n) in enumerate(zip(probabilities.tolist(), levels.tolist(), n_drivers))
+        ]
+
+    def explain_matrix(self, features: np.ndarray):
+        """
+        (risk probabilities, per-feature contributions) for a feature matrix.
+        Contributions are path-based: how much each feature's splits moved the
+        risk probability from the forest's base rate (see ml/forest_compiler.py),
+        so base rate + row sum == probability.
+        """
+        if self.compiled is None:
+            probabilities = self._predict_proba(features)[:, 1]
+            # Multiply feature value by importance to estimate contribution
+            return probabilities, features * self._importance
+        if not USE_COMPILED_FOREST or (len(features) > COMPILED_FOREST_MAX_ROWS and self._model is not None):
+            nodes = self.compiled.leaves_from_apply(self.model, features)
+            return self.compiled.proba_at(nodes)[:, 1], self.compiled.contributions_at(nodes)
+        # without sklearn in memory, big batches walk the compiled forest in chunks
+        # rather than unpickling the estimator just for apply()
+        probabilities = np.empty(len(features))
+        contributions = np.empty((len(features), self.compiled.n_features))
+        for start in range(0, len(features), COMPILED_FOREST_MAX_ROWS):
+            stop = start + COMPILED_FOREST_MAX_ROWS
+            nodes = self.compiled.leaves(features[start:stop])
+            probabilities[start:stop] = self.compiled.proba_at(nodes)[:, 1]
+            contributions[start:stop] = self.compiled.contributions_at(nodes)
+        return probabilities, contributions
+
+    def iter_predictions(self, features: np.ndarray, chunk_size: int = 1024):
+        """predict_matrix over consecutive row chunks, for streaming large batches."""
+        for start in range(0, len(features), chunk_size):
+            yield start, self.predict_matrix(features[start:start + chunk_size])
+
+    def _predict_proba(self, features: np.ndarray) -> np.ndarray:
+        with warnings.catch_warnings():
+            # fitted on a DataFrame, scored with a plain array in the same column order
+            warnings.simplefilter("ignore", UserWarning)
+            return self.model.predict_proba(features)
+
+    def batching_stats(self):
+        return self.batcher.stats() if self.batcher is not None else {"enabled": False}
+
+    def close(self):
+        if self.batcher is not None:
+            self.batcher.close()
+        if self.cache is not None:
+            self.cache.clear()
+
+    def _top_drivers(self, contributions: np.ndarray) -> np.ndarray:
+        # features pushing risk up the most; stable, so ties keep feature order
+        return np.argsort(-contributions, axis=1, kind="stable")[:, :TOP_DRIVERS]
 
-    def _map_risk_level(self, probability):
-        if probability < 0.3:
-            return "Low"
-        elif probability < 0.6:
-            return "Medium"
+
+def _artifact_dir(model_path: str, version: str) -> str:
+    # keyed on the pickle's identity so a replaced file never reuses stale arrays
+    st = os.stat(model_path)
+    ident = f"{os.path.abspath(model_path)}:{st.st_size}:{st.st_mtime_ns}:{COMPILED_FORMAT}"
+    return os.path.join(COMPILED_DIR, f"{version}-{hashlib.sha1(ident.encode()).hexdigest()[:12]}")
+
+
+def prune_compiled_artifacts() -> list:
+    """
+    Delete compiled forests whose pickle was replaced or removed (or that use
+    an old format), and abandoned temp directories; returns what was removed.
+    Workers still mapping a deleted forest keep their pages until they swap.
+    """
+    removed = []
+    try:
+        names = os.listdir(COMPILED_DIR)
+    except FileNotFoundError:
+        return removed
+    for name in names:
+        path = os.path.join(COMPILED_DIR, name)
+        if name.startswith(".compiling-"):
+            try:
+                stale = time.time() - os.stat(path).st_mtime > COMPILED_TMP_MAX_AGE
+            except FileNotFoundError:
+                continue
         else:
-            return "High"
+            try:
+                with open(os.path.join(path, "meta.json")) as f:
+                    meta = json.load(f)
+                stale = _artifact_dir(meta["model_path"], meta["version"]) != path
+            except (OSError, ValueError, KeyError):
+                stale = True  # pickle gone, or not a complete artifact
+        if stale:
+            shutil.rmtree(path, ignore_errors=True)
+            removed.append(name)
+    return removed
 
-    def _get_top_drivers(self, input_data):
-        # Multiply feature value by importance to estimate contribution
-        contributions = {
-            feature: input_data[feature] * self.feature_importance[feature]
-            for feature in self.feature_names
-        }
 
-        # Sort descending
-        sorted_features = sorted(
-            contributions.items(), key=lambda x: x[1], reverse=True
-        )
+def _copy_result(result: dict) -> dict:
+    # cached results are shared; hand out copies so callers can't mutate them
+    return {k: list(v) if isinstance(v, list) else v for k, v in result.items()}
+
+
+def smoke_test(model: RiskModel, n_random: int = 64, seed: int = 0):
+    """
+    Score a small fixed batch (all zeros, all ones, midpoints and random rows)
+    through the full predict path; raises if anything is off. This also warms
+    the model (batch worker thread, first allocations) before it takes traffic.
+    """
+    rng = np.random.RandomState(seed)
+    n = len(model.feature_names)
+    X = np.vstack([np.zeros(n), np.ones(n), np.full(n, 0.5), rng.uniform(0, 1, size=(n_random, n))])
+    results = model._score_matrix(X)
+    if len(results) != len(X):
+        raise RuntimeError(f"smoke batch returned {len(results)} results for {len(X)} rows")
+    probabilities = np.array([r["risk_probability"] for r in results])
+    if not np.all(np.isfinite(probabilities)) or probabilities.min() < 0 or probabilities.max() > 1:
+        raise RuntimeError("smoke batch produced probabilities outside [0, 1]")
+    if any(r["risk_level"] not in RISK_LEVELS for r in results):
+        raise RuntimeError("smoke batch produced an unknown risk level")
+    # one request through predict() starts the batch worker
+    model.predict(dict(zip(model.feature_names, X[2].tolist())))
+
+
+class ModelHolder:
+    """
+    Owns the serving RiskModel. Request handlers call get() once per request
+    and use that instance to the end, so a swap never changes the model under
+    an in-flight request. reload() builds and smoke-tests the new model off
+    the request path, then swaps the reference in one assignment; the old
+    model keeps answering whoever still holds it (its batch queue drains,
+    late callers are scored inline).
 
-        return [feature for feature, _ in sorted_features[:3]]
+    With `active_version` (a callable), get() also follows that version:
+    every `sync_interval` seconds it compares it with the served one and
+    starts a background reload when they differ.
+
+    When the factory hands out cached instances (the registry's LRU),
+    `forget` drops the cached one for a version, so reload(fresh=True)
+    builds a new instance from the files on disk.
+    """
+
+    def __init__(self, factory=RiskModel, release=None, active_version=None,
+                 sync_interval: float = MODEL_SYNC_SECONDS, forget=None):
+        self.factory = factory
+        self.release = release  # called with a swapped-out model; default closes it
+        self.forget = forget    # called with the version (None: active) before a fresh reload
+        self.active_version = active_version
+        self.sync_interval = sync_interval
+        self._next_sync = 0.0
+        self._failed_version = None  # don't retry a version that failed to load
+        self._model = None
+        self._lock = threading.Lock()          # first load
+        self._reload_lock = threading.Lock()   # one reload at a time
+        self.loaded_at = None
+        self.swaps = 0
+        self.reloading = False
+        self.last_error = None
+
+    def get(self) -> RiskModel:
+        model = self._model
+        if model is None:
+            with self._lock:
+                if self._model is None:
+                    self._install(self._build())
+                model = self._model
+        elif self.active_version is not None:
+            self._maybe_sync(model)
+        return model
+
+    def _maybe_sync(self, model: RiskModel):
+        now = time.monotonic()
+        if now < self._next_sync or self.reloading:
+            return
+        self._next_sync = now + self.sync_interval
+        try:
+            wanted = self.active_version()
+        except Exception as e:
+            print("⚠️ Could not read the active model version:", e)
+            return
+        if wanted and wanted != model.version and wanted != self._failed_version:
+            print(f"Active model is now {wanted} (serving {model.version}); reloading")
+            self.reloading = True  # set here so concurrent get() calls don't start another
+            self.reload(background=True, version=wanted)
+
+    def warm(self):
+        """Load the first model on a background thread (app startup)."""
+        def _run():
+            try:
+                self.get()
+            except Exception as e:
+                self.last_error = f"{type(e).__name__}: {e}"
+                print("❌ Risk model failed to load:", self.last_error)
+        t = threading.Thread(target=_run, name="model-warmup", daemon=True)
+        t.start()
+        return t
+
+    def _build(self, **kwargs) -> RiskModel:
+        start = time.perf_counter()
+        model = self.factory(**kwargs)
+        smoke_test(model)
+        print(f"Risk model {model.version} loaded and warmed in {time.perf_counter() - start:.2f}s")
+        print("Risk model memory:", model.memory_report())
+        return model
+
+    def _install(self, model: RiskModel):
+        old, self._model = self._model, model
+        self.loaded_at = time.time()
+        if old is not None and old is not model:
+            self.swaps += 1
+            if self.release is not None:
+                self.release(old)
+            else:
+                old.close()
+
+    def reload(self, background: bool = False, fresh: bool = False, **kwargs):
+        """
+        Load a new model (kwargs go to RiskModel, e.g. model_path/version),
+        smoke-test it and swap it in. On failure the current model stays.
+        fresh=True re-reads the artifacts even if an instance is cached.
+        With background=True returns the worker thread instead.
+        """
+        if background:
+            kwargs["fresh"] = fresh
+            t = threading.Thread(target=self._reload_quietly, kwargs=kwargs, name="model-reload", daemon=True)
+            t.start()
+            return t
+        with self._reload_lock:
+            self.reloading = True
+            try:
+                if fresh and self.forget is not None and "model_path" not in kwargs:
+                    self.forget(kwargs.get("version"))
+                model = self._build(**kwargs)
+            except Exception as e:
+                self.last_error = f"{type(e).__name__}: {e}"
+                self._failed_version = kwargs.get("version")
+                print("❌ Model reload failed, keeping current model:", self.last_error)
+                raise
+            finally:
+                self.reloading = False
+            self.last_error = None
+            self._failed_version = None
+            with self._lock:
+                self._install(model)
+            if MODEL_MMAP:
+                try:
+                    removed = prune_compiled_artifacts()
+                    if removed:
+                        print("Removed stale compiled forests:", removed)
+                except Exception as e:
+                    print("⚠️ Could not prune compiled forests:", e)
+            return model
+
+    def _reload_quietly(self, **kwargs):
+        try:
+            self.reload(**kwargs)
+        except Exception:
+            pass  # already recorded in last_error
+
+    def status(self) -> dict:
+        model = self._model
+        return {
+            "model_version": model.version if model is not None else None,
+            "model_path": model.model_path if model is not None else None,
+            "loaded_at": self.loaded_at,
+            "swaps": self.swaps,
+            "reloading": self.reloading,
+            "last_error": self.last_error,
+        }
 
 
 # Helper to manage singleton model in running server
-_model_instance = None
+_registry = ModelRegistry(MODEL_DIR, factory=RiskModel)
+_registry_lock = threading.Lock()
+_registry_ready = False
+
+
+def get_registry() -> ModelRegistry:
+    """The process-wide registry; registers the bundled v1 model on first use."""
+    global _registry_ready
+    if not _registry_ready:
+        with _registry_lock:
+            if not _registry_ready:
+                if not _registry.versions() and os.path.exists(MODEL_PATH):
+                    metrics_path = os.path.join(MODEL_DIR, f"metrics_{MODEL_VERSION}.json")
+                    metrics = {}
+                    if os.path.exists(metrics_path):
+                        with open(metrics_path) as f:
+                            metrics = {k: v for k, v in json.load(f).items() if k in ("accuracy", "roc_auc")}
+                    _registry.register(MODEL_VERSION, MODEL_PATH, FEATURE_IMPORTANCE_PATH,
+                                       source="ml/train.py", metrics=metrics)
+                _registry_ready = True
+    return _registry
+
+
+def _load_registered(**kwargs):
+    # explicit files bypass the registry; otherwise a registered version (default: active)
+    if "model_path" in kwargs:
+        return RiskModel(**kwargs)
+    return get_registry().get(kwargs.get("version"))
+
+
+def _release(model):
+    get_registry().release(model)
+
+
+def _active_version():
+    return get_registry().active_version()
+
+
+def _forget(version=None):
+    registry = get_registry()
+    registry.forget(version or registry.active_version())
+
+
+_holder = ModelHolder(factory=_load_registered, release=_release, active_version=_active_version,
+                      forget=_forget)
+_shadow = None
+_shadow_lock = threading.Lock()
+
+
+def get_model_holder() -> ModelHolder:
+    return _holder
+
 
 def get_risk_model():
-    global _model_instance
-    if _model_instance is None:
-        _model_instance = RiskModel()
-    return _model_instance
+    return _holder.get()
+
+
+def reload_model(**kwargs):
+    """Re-read the served version's artifacts (or load the given files) and swap."""
+    kwargs.setdefault("fresh", True)
+    return _holder.reload(**kwargs)
+
+
+def activate_version(version: str):
+    """Make a registered version active and serve it; reverts if it fails the smoke test."""
+    registry = get_registry()
+    previous = registry.active_version()
+    registry.set_active(version)
+    try:
+        return _holder.reload(version=version)
+    except Exception:
+        if previous is not None:
+            registry.set_active(previous)
+        raise
+
+
+def start_shadow(version: str, sample_rate: float = 0.05) -> dict:
+    """Shadow-score `sample_rate` of live predictions with `version` (replaces any running shadow)."""
+    global _shadow
+    candidate = get_registry().get(version)
+    smoke_test(candidate)
+    with _shadow_lock:
+        old, _shadow = _shadow, ShadowScorer(candidate, sample_rate=sample_rate)
+    if old is not None:
+        old.stop()
+    return _shadow.stats()
+
+
+def stop_shadow() -> dict:
+    global _shadow
+    with _shadow_lock:
+        old, _shadow = _shadow, None
+    if old is None:
+        return {"running": False}
+    old.stop()
+    return old.stats()
+
+
+def shadow_observe(primary: RiskModel, features):
+    shadow = _shadow
+    if shadow is not None:
+        shadow.observe(primary, features)
 
 
-def reload_model():
-    global _model_instance
-    _model_instance = RiskModel()
-    return _model_instance
+def shadow_stats() -> dict:
+    shadow = _shadow
+    return shadow.stats() if shadow is not None else {"running": False}
@@ -0,0 +1,247 @@
+# backend/ml/forest_compiler.py
+"""
+Compile a fitted sklearn tree ensemble into flat NumPy node arrays and
+evaluate it without sklearn's per-call machinery (input validation, joblib
+dispatch, one Python-level predict per tree).
+
+All trees are concatenated into one set of contiguous arrays:
+  feature[n], threshold[n], left[n], right[n]  - split nodes
+  leaf_proba[n, n_classes]                     - class distribution per node
+Leaves point to themselves with an +inf threshold, so every tree can be
+advanced in lockstep for max_depth steps: each step is one gather and one
+comparison over (rows x trees). Probabilities are the mean of the leaf
+distributions, exactly what RandomForestClassifier.predict_proba computes
+(up to float summation order).
+
+Explanations use path-based (Saabas) attribution: walking from the root to
+a leaf, each split on feature f moves the positive-class probability from
+the parent's to the child's, and that change is credited to f. Since a leaf
+identifies its whole path, the per-feature sums are precomputed for every
+node at compile time (path_contrib, float32, positive class only: it is by
+far the largest array, n_nodes x n_features). Explaining a batch is then the
+same gather-and-mean over the reached leaves as predict_proba:
+  proba[:, -1] == bias[-1] + contributions.sum(axis=1)
+
+save_compiled / load_compiled store the arrays as plain .npy files that are
+opened with mmap_mode="r", so every worker process on a host maps the same
+physical pages instead of holding its own unpickled copy.
+"""
+import os
+import json
+import shutil
+import tempfile
+import warnings
+
+import numpy as np
+
+ARRAY_NAMES = ("feature", "threshold", "left", "right", "leaf_proba", "path_contrib", "roots")
+META_FILE = "meta.json"
+# bumped whenever the saved arrays change shape or meaning
+COMPILED_FORMAT = 2
+
+
+class CompiledForest:
+    def __init__(self, feature, threshold, left, right, leaf_proba, path_contrib, roots, max_depth,
+                 n_features, classes):
+        self.feature = feature
+        self.threshold = threshold
+        self.left = left
+        self.right = right
+        self.leaf_proba = leaf_proba
+        self.path_contrib = path_contrib  # (n_nodes, n_features) float32, positive class
+        self.roots = roots
+        self.max_depth = max_depth
+        self.n_features = n_features
+        self.classes_ = classes
+        self.n_trees = len(roots)
+
+    @property
+    def n_nodes(self) -> int:
+        return len(self.feature)
+
+    @property
+    def nbytes(self) -> int:
+        return sum(getattr(self, name).nbytes for name in ARRAY_NAMES)
+
+    def leaves(self, X: np.ndarray) -> np.ndarray:
+        """Leaf node index reached in every tree, shape (n_rows, n_trees)."""
+        # sklearn's trees compare float32 inputs against float64 thresholds
+        X = np.asarray(X, dtype=np.float32)
+        if X.ndim == 1:
+            X = X.reshape(1, -1)
+        if X.shape[1] != self.n_features:
+            raise ValueError(f"expected {self.n_features} features, got {X.shape[1]}")
+        rows = np.arange(len(X))[:, None]
+        nodes = np.broadcast_to(self.roots, (len(X), self.n_trees))
+        for _ in range(self.max_depth):
+            go_left = X[rows, self.feature[nodes]] <= self.threshold[nodes]
+            nodes = np.where(go_left, self.left[nodes], self.right[nodes])
+        return nodes
+
+    def leaves_from_apply(self, model, X: np.ndarray) -> np.ndarray:
+        """Same as leaves() via sklearn's C-level model.apply(); faster for large batches."""
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore")
+            return model.apply(X) + self.roots
+
+    def predict_proba(self, X: np.ndarray) -> np.ndarray:
+        return self.proba_at(self.leaves(X))
+
+    def proba_at(self, nodes: np.ndarray) -> np.ndarray:
+        return self.leaf_proba[nodes].sum(axis=1) / self.n_trees
+
+    @property
+    def bias(self) -> np.ndarray:
+        """Expected class distribution before any split (mean over the roots)."""
+        return self.leaf_proba[self.roots].mean(axis=0)
+
+    def contributions_at(self, nodes: np.ndarray) -> np.ndarray:
+        """(n_rows, n_features) positive-class contributions for reached leaves."""
+        return self.path_contrib[nodes].sum(axis=1, dtype=np.float64) / self.n_trees
+
+    def explain(self, X: np.ndarray):
+        """(proba, contributions) from a single traversal."""
+        nodes = self.leaves(X)
+        return self.proba_at(nodes), self.contributions_at(nodes)
+
+    def predict(self, X: np.ndarray) -> np.ndarray:
+        return self.classes_[np.argmax(self.predict_proba(X), axis=1)]
+
+
+def compile_forest(model) -> CompiledForest:
+    """Flatten a fitted RandomForestClassifier / ExtraTreesClassifier."""
+    estimators = getattr(model, "estimators_", None)
+    if not estimators or not hasattr(model, "classes_"):
+        raise TypeError(f"{type(model).__name__} is not a fitted tree-ensemble classifier")
+
+    n_features = int(model.n_features_in_)
+    features, thresholds, lefts, rights, probas, contribs, roots = [], [], [], [], [], [], []
+    offset, max_depth = 0, 0
+    for est in estimators:
+        tree = est.tree_
+        n = tree.node_count
+        idx = np.arange(n, dtype=np.intp)
+        is_leaf = tree.children_left == -1
+
+        left = np.where(is_leaf, idx, tree.children_left) + offset
+        right = np.where(is_leaf, idx, tree.children_right) + offset
+        feature = np.where(is_leaf, 0, tree.feature)
+        threshold = np.where(is_leaf, np.inf, tree.threshold)
+
+        value = tree.value[:, 0, :].astype(np.float64)
+        totals = value.sum(axis=1, keepdims=True)
+        totals[totals == 0] = 1.0
+
+        proba = value / totals
+
+        features.append(feature.astype(np.intp))
+        thresholds.append(threshold.astype(np.float64))
+        lefts.append(left.astype(np.intp))
+        rights.append(right.astype(np.intp))
+        probas.append(proba)
+        contribs.append(_path_contributions(tree, proba, n_features))
+        roots.append(offset)
+        offset += n
+        max_depth = max(max_depth, tree.max_depth)
+
+    return CompiledForest(
+        feature=np.ascontiguousarray(np.concatenate(features)),
+        threshold=np.ascontiguousarray(np.concatenate(thresholds)),
+        left=np.ascontiguousarray(np.concatenate(lefts)),
+        right=np.ascontiguousarray(np.concatenate(rights)),
+        leaf_proba=np.ascontiguousarray(np.concatenate(probas)),
+        path_contrib=np.ascontiguousarray(np.concatenate(contribs)),
+        roots=np.asarray(roots, dtype=np.intp),
+        max_depth=max_depth,
+        n_features=n_features,
+        classes=np.asarray(model.classes_),
+    )
+
+
+def _path_contributions(tree, proba: np.ndarray, n_features: int) -> np.ndarray:
+    """(node_count, n_features) float32: positive-class sums along the root->node path."""
+    positive = proba[:, -1]
+    contrib = np.zeros((len(positive), n_features))
+    frontier = np.array([0], dtype=np.intp)
+    # one level at a time: children inherit the parent's sums plus their own delta
+    while len(frontier):
+        parents = frontier[tree.children_left[frontier] != -1]
+        if not len(parents):
+            break
+        split_feature = tree.feature[parents]
+        for children in (tree.children_left[parents], tree.children_right[parents]):
+            contrib[children] = contrib[parents]
+            contrib[children, split_feature] += positive[children] - positive[parents]
+        frontier = np.concatenate([tree.children_left[parents], tree.children_right[parents]])
+    # summed per tree in float64; float32 storage is exact to ~1e-7 per node
+    return contrib.astype(np.float32)
+
+
+def verify_compiled(model, compiled: CompiledForest, n_rows: int = 256, atol: float = 1e-9, seed: int = 0) -> float:
+    """
+    Compare against sklearn on random rows spanning each feature's split
+    thresholds; returns the max abs difference, raising if it exceeds atol.
+    """
+    rng = np.random.RandomState(seed)
+    lo = np.zeros(compiled.n_features)
+    hi = np.ones(compiled.n_features)
+    for f in range(compiled.n_features):
+        t = compiled.threshold[(compiled.feature == f) & np.isfinite(compiled.threshold)]
+        if len(t):
+            lo[f], hi[f] = t.min() - 1.0, t.max() + 1.0
+    X = rng.uniform(lo, hi, size=(n_rows, compiled.n_features))
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")  # fitted with feature names, scored with an array
+        expected = model.predict_proba(X)
+    got = compiled.predict_proba(X)
+    diff = float(np.max(np.abs(expected - got)))
+    if diff > atol:
+        raise ValueError(f"compiled forest differs from sklearn by {diff}")
+    return diff
+
+
+def save_compiled(compiled: CompiledForest, path: str, **meta) -> str:
+    """
+    Write the arrays as .npy files under `path` (a directory). The directory
+    is built next to its final location and renamed into place, so readers
+    never see a partial artifact; if another process got there first its
+    copy is kept.
+    """
+    parent = os.path.dirname(os.path.abspath(path))
+    os.makedirs(parent, exist_ok=True)
+    tmp = tempfile.mkdtemp(prefix=".compiling-", dir=parent)
+    try:
+        for name in ARRAY_NAMES:
+            np.save(os.path.join(tmp, name + ".npy"), getattr(compiled, name), allow_pickle=False)
+        info = dict(meta, format=COMPILED_FORMAT, max_depth=int(compiled.max_depth), n_features=int(compiled.n_features),
+                    classes=np.asarray(compiled.classes_).tolist())
+        with open(os.path.join(tmp, META_FILE), "w") as f:
+            json.dump(info, f)
+        try:
+            os.rename(tmp, path)
+        except OSError:
+            if not os.path.exists(os.path.join(path, META_FILE)):
+                raise
+    finally:
+        if os.path.exists(tmp):
+            shutil.rmtree(tmp, ignore_errors=True)
+    return path
+
+
+def load_compiled(path: str, mmap: bool = True) -> CompiledForest:
+    """Open a saved forest; with mmap the arrays are read-only views of the files."""
+    with open(os.path.join(path, META_FILE)) as f:
+        meta = json.load(f)
+    if meta.get("format") != COMPILED_FORMAT:
+        raise ValueError(f"{path} has compiled format {meta.get('format')}, expected {COMPILED_FORMAT}")
+    arrays = {}
+    for name in ARRAY_NAMES:
+        arr = np.load(os.path.join(path, name + ".npy"), mmap_mode="r" if mmap else None, allow_pickle=False)
+        # plain ndarray view over the mapping: no copy, no memmap subclass overhead per op
+        arrays[name] = np.asarray(arr)
+    compiled = CompiledForest(
+        max_depth=meta["max_depth"], n_features=meta["n_features"],
+        classes=np.asarray(meta["classes"]), **arrays,
+    )
+    compiled.meta = meta
+    return compiled
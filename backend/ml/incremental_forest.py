@@ -0,0 +1,90 @@
+# backend/ml/incremental_forest.py
+"""
+Incremental random forest updates for retraining.
+
+Rather than refitting every tree on all history, a new version keeps the
+previous forest and appends `n_new_trees` trees fitted only on the data
+that arrived since (sklearn's warm_start: existing estimators are kept and
+only the extra ones are built). Trees are stored oldest first, so the
+retirement policy is FIFO: once the forest exceeds `max_trees`, the oldest
+trees are dropped, which also ages out what they learned from old data.
+
+The update is guarded: new rows are split into a fit part and a held-out
+window, and the candidate must not score worse than the base forest on that
+window by more than `max_accuracy_drop`.
+"""
+import numpy as np
+from sklearn.ensemble import RandomForestClassifier
+
+
+class IncrementalUpdateRejected(ValueError):
+    pass
+
+
+def holdout_split(X: np.ndarray, y: np.ndarray, fraction: float, seed: int = 0):
+    """(X_fit, y_fit, X_hold, y_hold) with a random `fraction` of rows held out."""
+    n_hold = int(round(len(X) * fraction))
+    if n_hold <= 0:
+        return X, y, X[:0], y[:0]
+    order = np.random.default_rng(seed).permutation(len(X))
+    hold, fit = order[:n_hold], order[n_hold:]
+    return X[fit], y[fit], X[hold], y[hold]
+
+
+def _accuracy(model, X, y) -> float:
+    return float(np.mean(model.predict(X) == y)) if len(X) else float("nan")
+
+
+def extend_forest(base, X: np.ndarray, y: np.ndarray, n_new_trees: int, max_trees: int,
+                  holdout_fraction: float = 0.2, max_accuracy_drop: float = 0.01, seed: int = 0,
+                  max_depth: int = None):
+    """
+    Append trees fitted on (X, y) to `base`, which is modified in place
+    (pass a freshly loaded forest, not the serving one). New trees are no
+    deeper than `max_depth` (or the base's own limit, if tighter). Returns (model, info);
+    raises IncrementalUpdateRejected when the guard fails or the new data
+    can't be used for an incremental update.
+    """
+    if not isinstance(base, RandomForestClassifier):
+        raise IncrementalUpdateRejected(f"{type(base).__name__} is not a RandomForestClassifier")
+    if X.shape[1] != base.n_features_in_:
+        raise IncrementalUpdateRejected(f"expected {base.n_features_in_} features, got {X.shape[1]}")
+
+    X_fit, y_fit, X_hold, y_hold = holdout_split(X, y, holdout_fraction, seed)
+    # every tree must see every class, or its predict_proba has fewer columns
+    if not np.array_equal(np.unique(y_fit), base.classes_):
+        raise IncrementalUpdateRejected("new data does not contain every class; use a full retrain")
+
+    base_accuracy = _accuracy(base, X_hold, y_hold)
+    n_before = len(base.estimators_)
+
+    # fresh seeds for the new trees (warm_start would otherwise replay the
+    # base random_state's sequence after any retired trees)
+    depth = base.max_depth
+    if max_depth is not None:
+        depth = max_depth if depth is None else min(depth, max_depth)
+    base.set_params(warm_start=True, n_estimators=n_before + n_new_trees, random_state=seed, max_depth=depth)
+    base.fit(X_fit, y_fit)
+    base.set_params(warm_start=False)
+
+    retired = max(0, len(base.estimators_) - max_trees)
+    if retired:
+        del base.estimators_[:retired]
+        base.set_params(n_estimators=len(base.estimators_))
+
+    candidate_accuracy = _accuracy(base, X_hold, y_hold)
+    info = {
+        "trees_before": n_before,
+        "trees_added": n_new_trees,
+        "trees_retired": retired,
+        "n_estimators": len(base.estimators_),
+        "rows_fit": len(X_fit),
+        "rows_holdout": len(X_hold),
+        "holdout_accuracy_base": base_accuracy,
+        "holdout_accuracy": candidate_accuracy,
+    }
+    if len(X_hold) and candidate_accuracy < base_accuracy - max_accuracy_drop:
+        raise IncrementalUpdateRejected(
+            f"held-out accuracy {candidate_accuracy:.4f} is below the current model's {base_accuracy:.4f}"
+        )
+    return base, info
@@ -0,0 +1,381 @@
+# backend/ml/job_executor.py
+"""
+Run training jobs (retrain, /api/train) in worker processes, off the web
+process that serves predictions.
+
+- At most RETRAIN_WORKERS jobs run at once; the rest wait in a FIFO queue.
+- Submitting a job identical (same kind and parameters) to one still queued
+  returns the queued job instead of adding another, so repeated clicks
+  collapse into one run.
+- Both hold across web processes through the jobs' retrain_logs documents
+  (unique, sparse indexes): a queued job holds queue_lock=<kind + params>,
+  so an identical submission anywhere returns it; a running job holds
+  run_slot=<0..RETRAIN_WORKERS-1>, taken just before its process starts.
+  A job waiting for a slot another process holds is retried on the next
+  heartbeat.
+- The owning executor refreshes heartbeat_at on its queued and running jobs
+  every RETRAIN_JOB_HEARTBEAT_SECONDS; a lock whose heartbeat is older than
+  RETRAIN_JOB_STALE_SECONDS belonged to a process that died and is taken
+  over (the job is marked "abandoned").
+- cancel() drops a queued job, or terminates the process of a running one.
+  Artifacts are only registered after they are fully written, so a killed
+  job leaves at most an unregistered file behind.
+- Every job has a retrain_logs document (keyed by job_id) that the worker
+  updates as it moves through stages; /api/admin/retrain-status reads it.
+
+Workers are started with the "spawn" method: forking a web process that
+holds threads and a MongoDB client is not safe. Each job gets a fresh
+interpreter, which also returns all training memory to the OS on exit.
+"""
+import os
+import json
+import uuid
+import threading
+import importlib
+import multiprocessing
+from collections import OrderedDict, deque
+from datetime import datetime
+from typing import Callable, Optional
+
+from pymongo.errors import DuplicateKeyError
+
+RETRAIN_WORKERS = int(os.getenv("RETRAIN_WORKERS", "1"))
+JOB_HISTORY = 100
+RETRAIN_JOB_HEARTBEAT_SECONDS = float(os.getenv("RETRAIN_JOB_HEARTBEAT_SECONDS", "10"))
+RETRAIN_JOB_STALE_SECONDS = float(os.getenv("RETRAIN_JOB_STALE_SECONDS", "60"))
+
+# kind -> "module:function"; resolved inside the worker process
+JOB_TARGETS = {
+    "retrain": "ml.retrain_service:retrain_model_background",
+    "train": "ml.job_executor:run_train_job",
+}
+FINAL_STATES = ("finished", "failed", "cancelled")
+
+
+def _log_collection():
+    from database import db
+    return db.retrain_logs if db is not None else None
+
+
+def update_job_log(job_id: str, fields: dict, push: dict = None, release: bool = False):
+    """Best-effort update of a job's retrain_logs document; release drops its locks."""
+    try:
+        logs = _log_collection()
+        if logs is None:
+            return
+        update = {"$set": fields} if fields else {}
+        if push:
+            update["$push"] = push
+        if release:
+            update["$unset"] = {"queue_lock": "", "run_slot": ""}
+        logs.update_one({"job_id": job_id}, update)
+    except Exception as e:
+        print("⚠️ Could not update retrain log:", e)
+
+
+def job_stage(job_id: Optional[str], stage: str, **fields):
+    """Record that a job entered `stage` (no-op outside the executor)."""
+    if job_id is None:
+        return
+    now = datetime.utcnow()
+    update_job_log(job_id, {"stage": stage, **fields}, push={"stages": {"stage": stage, "at": now}})
+
+
+def _worker_main(target: str, job_id: str, params: dict):
+    module_name, func_name = target.split(":")
+    func = getattr(importlib.import_module(module_name), func_name)
+    func(job_id=job_id, **params)
+
+
+def run_train_job(job_id: str = None, n_samples: int = None):
+    """Worker side of /api/train: ml.train.train() with stage progress."""
+    from ml.train import train, N_SAMPLES
+    update_job_log(job_id, {"status": "running", "started_at": datetime.utcnow()})
+    try:
+        _, metrics = train(save_model=True, n_samples=n_samples or N_SAMPLES,
+                           on_stage=lambda stage: job_stage(job_id, stage))
+    except Exception as e:
+        update_job_log(job_id, {"status": "failed", "error": str(e), "completed_at": datetime.utcnow()})
+        return
+    # the artifacts were rewritten in place; refresh the registry entry
+    from ml.deployed_model import MODEL_VERSION, MODEL_PATH, FEATURE_IMPORTANCE_PATH, get_registry
+    get_registry().register(MODEL_VERSION, MODEL_PATH, FEATURE_IMPORTANCE_PATH, source="ml/train.py",
+                            metrics={k: metrics[k] for k in ("accuracy", "roc_auc")})
+    update_job_log(job_id, {
+        "status": "completed",
+        "completed_at": datetime.utcnow(),
+        "metrics": {k: metrics[k] for k in ("accuracy", "roc_auc", "n_samples")},
+        "stage_timings": metrics["stages"],
+    })
+
+
+class Job:
+    def __init__(self, kind: str, params: dict):
+        self.id = uuid.uuid4().hex
+        self.kind = kind
+        self.params = params
+        self.key = (kind, tuple(sorted(params.items())))
+        self.lock_key = f"{kind}:{json.dumps(params, sort_keys=True, default=str)}"
+        self.status = "queued"
+        self.queued_at = datetime.utcnow()
+        self.started_at = None
+        self.finished_at = None
+        self.exitcode = None
+        self.process = None
+        self.done = threading.Event()
+
+    @classmethod
+    def from_log(cls, doc: dict) -> "Job":
+        """A job claimed by another process, as seen in its retrain_logs document."""
+        job = cls(doc.get("kind"), doc.get("params") or {})
+        job.id = doc["job_id"]
+        job.status = doc.get("status", "queued")
+        job.queued_at = doc.get("queued_at")
+        job.started_at = doc.get("started_at")
+        return job
+
+    def to_dict(self) -> dict:
+        return {
+            "job_id": self.id,
+            "kind": self.kind,
+            "params": self.params,
+            "status": self.status,
+            "queued_at": self.queued_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "exitcode": self.exitcode,
+        }
+
+
+class JobExecutor:
+    def __init__(self, max_workers: int = RETRAIN_WORKERS, on_complete: Callable[[Job], None] = None):
+        self.max_workers = max(1, int(max_workers))
+        self.on_complete = on_complete  # called in the web process after a job exits cleanly
+        self._ctx = multiprocessing.get_context("spawn")
+        self._lock = threading.Lock()
+        self._pending: "deque[Job]" = deque()
+        self._running = {}
+        self._jobs: "OrderedDict[str, Job]" = OrderedDict()
+        self.submitted = 0
+        self.deduplicated = 0
+        self._indexed = False
+        self._heartbeat = None
+        self._stopped = threading.Event()
+
+    # ---- submit / cancel -------------------------------------------------
+    def submit(self, kind: str, **params):
+        """(job, deduplicated): a new queued job, or the identical one already queued."""
+        if kind not in JOB_TARGETS:
+            raise ValueError(f"unknown job kind {kind!r}")
+        job = Job(kind, params)
+        with self._lock:
+            for queued in self._pending:
+                if queued.key == job.key:
+                    self.deduplicated += 1
+                    return queued, True
+        holder = self._claim(job)
+        if holder is not None:
+            with self._lock:
+                self.deduplicated += 1
+                # queued here after all (our own claim, raced with this call)
+                local = self._jobs.get(holder["job_id"])
+            return (local if local is not None else Job.from_log(holder)), True
+        with self._lock:
+            self.submitted += 1
+            self._pending.append(job)
+            self._remember(job)
+        self._start_heartbeat()
+        self._start_next()
+        return job, False
+
+    def _claim(self, job: Job) -> Optional[dict]:
+        """
+        Create the job's log document holding queue_lock for its kind and
+        parameters. Returns the document of the identical job already queued
+        instead, if any; None when claimed (or when MongoDB is unavailable,
+        in which case only this process' queue applies).
+        """
+        try:
+            logs = _log_collection()
+            if logs is None:
+                return None
+            self._ensure_indexes(logs)
+            for _ in range(3):
+                now = datetime.utcnow()
+                doc = {
+                    "job_id": job.id, "kind": job.kind, "params": job.params, "status": "queued",
+                    "queued_at": job.queued_at, "heartbeat_at": now, "started_at": None, "stages": [],
+                    "queue_lock": job.lock_key,
+                }
+                try:
+                    logs.insert_one(doc)
+                    return None
+                except DuplicateKeyError:
+                    holder = logs.find_one({"queue_lock": job.lock_key})
+                    if holder is not None and not self._take_over(logs, holder, "queue_lock"):
+                        return holder
+            print("⚠️ Could not claim retrain job in MongoDB, queueing locally")
+            return None
+        except Exception as e:
+            print("⚠️ Could not claim retrain job in MongoDB, queueing locally:", e)
+            return None
+
+    def _take_slot(self, job: Job) -> bool:
+        """Take a free run_slot (0..max_workers-1) for a job about to start."""
+        try:
+            logs = _log_collection()
+            if logs is None:
+                return True
+            self._ensure_indexes(logs)
+            for slot in range(self.max_workers):
+                for _ in range(2):
+                    try:
+                        logs.update_one({"job_id": job.id}, {"$set": {"run_slot": slot, "heartbeat_at": datetime.utcnow()},
+                                                             "$unset": {"queue_lock": ""}})
+                        return True
+                    except DuplicateKeyError:
+                        holder = logs.find_one({"run_slot": slot})
+                        if holder is not None and not self._take_over(logs, holder, "run_slot"):
+                            break
+            return False
+        except Exception as e:
+            print("⚠️ Could not take a retrain slot in MongoDB, running anyway:", e)
+            return True
+
+    @staticmethod
+    def _take_over(logs, holder: dict, field: str) -> bool:
+        """Free `holder`'s lock if its owner stopped heartbeating; True if it is free now."""
+        seen = holder.get("heartbeat_at") or holder.get("queued_at") or datetime.utcnow()
+        if (datetime.utcnow() - seen).total_seconds() <= RETRAIN_JOB_STALE_SECONDS:
+            return False
+        print(f"⚠️ Job {holder.get('job_id')} stopped heartbeating; taking over its {field}")
+        logs.update_one({"_id": holder["_id"], field: holder[field]},
+                        {"$set": {"status": "abandoned"}, "$unset": {"queue_lock": "", "run_slot": ""}})
+        return True
+
+    def _ensure_indexes(self, logs):
+        if not self._indexed:
+            logs.create_index("queue_lock", unique=True, sparse=True)
+            logs.create_index("run_slot", unique=True, sparse=True)
+            self._indexed = True
+
+    def _start_heartbeat(self):
+        with self._lock:
+            if self._heartbeat is not None:
+                return
+            self._heartbeat = threading.Thread(target=self._beat, name="job-heartbeat", daemon=True)
+        self._heartbeat.start()
+
+    def _beat(self):
+        while not self._stopped.wait(RETRAIN_JOB_HEARTBEAT_SECONDS):
+            with self._lock:
+                ids = [j.id for j in self._pending] + list(self._running)
+                waiting = bool(self._pending)
+            if not ids:
+                continue
+            try:
+                logs = _log_collection()
+                if logs is not None:
+                    logs.update_many({"job_id": {"$in": ids}}, {"$set": {"heartbeat_at": datetime.utcnow()}})
+            except Exception as e:
+                print("⚠️ Could not refresh job heartbeats:", e)
+            if waiting:
+                self._start_next()  # a slot held by another process may have freed up
+
+    def cancel(self, job_id: str) -> Optional[Job]:
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None or job.status in FINAL_STATES:
+                return job
+            if job in self._pending:
+                self._pending.remove(job)
+                self._finish(job, "cancelled")
+                release = True
+            else:
+                job.status = "cancelled"  # _watch sees it once the process is gone
+                job.process.terminate()
+                release = False  # released by _watch once the process has exited
+        update_job_log(job_id, {"status": "cancelled", "completed_at": datetime.utcnow()}, release=release)
+        return job
+
+    def wait(self, job: Job, timeout: float = None) -> bool:
+        return job.done.wait(timeout)
+
+    # ---- workers ---------------------------------------------------------
+    def _start_next(self):
+        with self._lock:
+            while self._pending and len(self._running) < self.max_workers:
+                if not self._take_slot(self._pending[0]):
+                    break  # every slot is busy in some process; retried by the heartbeat
+                job = self._pending.popleft()
+                job.status = "running"
+                job.started_at = datetime.utcnow()
+                job.process = self._ctx.Process(
+                    target=_worker_main, args=(JOB_TARGETS[job.kind], job.id, job.params),
+                    name=f"{job.kind}-{job.id[:8]}", daemon=True,
+                )
+                job.process.start()
+                self._running[job.id] = job
+                threading.Thread(target=self._watch, args=(job,), name=f"watch-{job.id[:8]}", daemon=True).start()
+
+    def _watch(self, job: Job):
+        job.process.join()
+        with self._lock:
+            self._running.pop(job.id, None)
+            job.exitcode = job.process.exitcode
+            if job.status == "cancelled":
+                self._finish(job, "cancelled")
+            elif job.exitcode == 0:
+                self._finish(job, "finished")  # the worker logged its own outcome
+            else:
+                self._finish(job, "failed")
+        if job.status == "failed":
+            update_job_log(job.id, {"status": "failed", "error": f"worker exited with code {job.exitcode}",
+                                    "completed_at": job.finished_at}, release=True)
+        else:
+            update_job_log(job.id, {}, release=True)
+        if job.status == "finished" and self.on_complete is not None:
+            try:
+                self.on_complete(job)
+            except Exception as e:
+                print("⚠️ Job completion hook failed:", e)
+        job.done.set()
+        self._start_next()
+
+    def _finish(self, job: Job, status: str):
+        job.status = status
+        job.finished_at = datetime.utcnow()
+        if status == "cancelled":
+            job.done.set()
+
+    def _remember(self, job: Job):
+        self._jobs[job.id] = job
+        while len(self._jobs) > JOB_HISTORY:
+            oldest = next(iter(self._jobs.values()))
+            if oldest.status not in ("queued", "running"):
+                self._jobs.popitem(last=False)
+            else:
+                break
+
+    # ---- status ----------------------------------------------------------
+    def get(self, job_id: str) -> Optional[Job]:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "max_workers": self.max_workers,
+                "running": [j.to_dict() for j in self._running.values()],
+                "queued": [j.to_dict() for j in self._pending],
+                "submitted": self.submitted,
+                "deduplicated": self.deduplicated,
+            }
+
+    def shutdown(self):
+        """Drop queued jobs and terminate running ones (app shutdown)."""
+        self._stopped.set()
+        with self._lock:
+            jobs = list(self._pending) + list(self._running.values())
+        for job in jobs:
+            self.cancel(job.id)
@@ -0,0 +1,156 @@
+# backend/ml/micro_batch.py
+"""
+In-process dynamic micro-batching for model inference.
+
+Concurrent callers submit one item each; a worker thread takes the first
+waiting item, keeps collecting until it has `max_batch_size` items or
+`max_wait_ms` has passed since that first item arrived, runs the batch
+function once and hands every caller its own result (or exception).
+
+Used by RiskModel.predict so that simultaneous /api/supply-chain/predict
+requests share one vectorized predict_proba call instead of paying
+sklearn's per-call overhead each.
+"""
+import time
+import queue
+import threading
+from collections import deque
+from concurrent.futures import Future
+from typing import Any, Callable, List
+
+from src.utils.stats import percentile
+
+
+class MicroBatcher:
+    def __init__(self, batch_fn: Callable[[List[Any]], List[Any]], max_batch_size: int = 64,
+                 max_wait_ms: float = 2.0, name: str = "micro-batch", window: int = 2048):
+        self.batch_fn = batch_fn
+        self.max_batch_size = max(1, int(max_batch_size))
+        self.max_wait = max(0.0, max_wait_ms) / 1000.0
+        self.name = name
+        self._queue: "queue.Queue" = queue.Queue()
+        self._lock = threading.Lock()
+        self._thread = None
+        self._closed = False
+
+        # metrics; recent samples kept in bounded windows
+        self.batches = 0
+        self.items = 0
+        self.errors = 0
+        self.max_seen_batch = 0
+        self._batch_sizes = deque(maxlen=window)
+        self._queue_waits = deque(maxlen=window)
+
+    # ---- callers --------------------------------------------------------
+    def submit(self, item: Any) -> Future:
+        fut: Future = Future()
+        # checked and enqueued under the lock close() takes, so nothing can
+        # land behind the shutdown sentinel
+        with self._lock:
+            closed = self._closed
+            if not closed:
+                self._ensure_worker()
+                self._queue.put((item, fut, time.perf_counter()))
+        if closed:
+            # e.g. a request still holding a model that was just swapped out
+            try:
+                fut.set_result(self.batch_fn([item])[0])
+            except Exception as e:
+                fut.set_exception(e)
+        return fut
+
+    def __call__(self, item: Any, timeout: float = None) -> Any:
+        """Submit one item and block for its result."""
+        return self.submit(item).result(timeout)
+
+    # ---- worker ---------------------------------------------------------
+    def _ensure_worker(self):
+        # caller holds self._lock
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+            self._thread.start()
+
+    def _collect(self, first) -> list:
+        batch = [first]
+        deadline = first[2] + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.perf_counter()
+            try:
+                entry = self._queue.get_nowait() if remaining <= 0 else self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            if entry is None:
+                self._queue.put(None)  # let _run see the shutdown after this batch
+                break
+            batch.append(entry)
+        return batch
+
+    def _run(self):
+        while True:
+            first = self._queue.get()
+            if first is None:
+                self._drain()
+                return
+            batch = self._collect(first)
+            started = time.perf_counter()
+            items = [item for item, _, _ in batch]
+            try:
+                results = self.batch_fn(items)
+                if len(results) != len(items):
+                    raise RuntimeError(f"{self.name}: batch function returned {len(results)} results for {len(items)} items")
+            except Exception as e:
+                with self._lock:
+                    self.errors += 1
+                for _, fut, _ in batch:
+                    fut.set_exception(e)
+            else:
+                for (_, fut, _), result in zip(batch, results):
+                    fut.set_result(result)
+            with self._lock:
+                self.batches += 1
+                self.items += len(batch)
+                self.max_seen_batch = max(self.max_seen_batch, len(batch))
+                self._batch_sizes.append(len(batch))
+                self._queue_waits.extend(started - submitted for _, _, submitted in batch)
+
+    def _drain(self):
+        # nothing should follow the sentinel; fail anything that does rather
+        # than leave its caller waiting forever
+        while True:
+            try:
+                entry = self._queue.get_nowait()
+            except queue.Empty:
+                return
+            if entry is not None:
+                entry[1].set_exception(RuntimeError(f"{self.name}: batcher closed"))
+
+    def close(self):
+        """Stop the worker after it drains what is already queued."""
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            if self._thread is not None and self._thread.is_alive():
+                self._queue.put(None)
+
+    # ---- metrics --------------------------------------------------------
+    def stats(self) -> dict:
+        with self._lock:
+            sizes = sorted(self._batch_sizes)
+            waits = sorted(self._queue_waits)
+            ms = lambda v: round(v * 1000, 3)
+            return {
+                "max_batch_size": self.max_batch_size,
+                "max_wait_ms": ms(self.max_wait),
+                "batches": self.batches,
+                "items": self.items,
+                "errors": self.errors,
+                "queued": self._queue.qsize(),
+                "avg_batch_size": round(self.items / self.batches, 2) if self.batches else 0.0,
+                "max_seen_batch_size": self.max_seen_batch,
+                "batch_size_p50": percentile(sizes, 50),
+                "batch_size_p95": percentile(sizes, 95),
+                "queue_wait_p50_ms": ms(percentile(waits, 50)),
+                "queue_wait_p95_ms": ms(percentile(waits, 95)),
+                "queue_wait_p99_ms": ms(percentile(waits, 99)),
+            }
@@ -0,0 +1,313 @@
+# backend/ml/model_registry.py
+"""
+Registry of risk model versions.
+
+ml/models/registry.json records every registered version with its files and
+metadata (created_at, source, metrics, rows used, ...) plus which version is
+active. The file is the source of truth shared by processes (a retrain job
+registers, API workers pick it up); each process keeps it in memory and
+re-reads it only when its mtime changes.
+
+Models are loaded lazily, on the first get(version), and kept in an LRU of
+at most REGISTRY_MAX_LOADED instances; the active version is never evicted.
+Serving processes notice a new active version through ModelHolder's
+periodic check (ml/deployed_model.py) and swap to it in the background.
+
+ShadowScorer re-scores a sampled fraction of live traffic with a candidate
+version on a background thread, so the response path only pays for a
+random() and a non-blocking queue put. Primary and candidate are timed on the
+same rows, uncached, so their latencies compare like for like.
+"""
+import os
+import json
+import time
+import random
+import queue
+import threading
+import tempfile
+from collections import OrderedDict, deque
+from datetime import datetime
+from typing import Callable, Optional
+
+import numpy as np
+
+from src.utils.single_flight import SingleFlight
+from src.utils.stats import percentile
+
+REGISTRY_FILE = "registry.json"
+REGISTRY_MAX_LOADED = int(os.getenv("REGISTRY_MAX_LOADED", "2"))
+
+
+class UnknownModelVersion(KeyError):
+    pass
+
+
+class ModelRegistry:
+    def __init__(self, root: str, factory: Callable, max_loaded: int = REGISTRY_MAX_LOADED):
+        self.root = root
+        self.path = os.path.join(root, REGISTRY_FILE)
+        self.factory = factory  # factory(model_path=..., version=..., feature_importance_path=...)
+        self.max_loaded = max(1, int(max_loaded))
+        self._lock = threading.RLock()
+        self._data = {"active": None, "versions": {}}
+        self._mtime = None
+        self._loaded: "OrderedDict[str, object]" = OrderedDict()
+        self._loading = SingleFlight()
+        self.loads = 0
+        self.evictions = 0
+
+    # ---- registry file ---------------------------------------------------
+    def _refresh(self):
+        try:
+            mtime = os.stat(self.path).st_mtime_ns
+        except FileNotFoundError:
+            return
+        if mtime != self._mtime:
+            with open(self.path) as f:
+                self._data = json.load(f)
+            self._mtime = mtime
+
+    def _write(self):
+        os.makedirs(self.root, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(prefix=".registry-", dir=self.root)
+        with os.fdopen(fd, "w") as f:
+            json.dump(self._data, f, indent=4, default=str)
+        os.replace(tmp, self.path)
+        self._mtime = os.stat(self.path).st_mtime_ns
+
+    def register(self, version: str, model_path: str, feature_importance_path: str = None,
+                 activate: bool = False, **metadata) -> dict:
+        """Add (or update) a version; extra keyword arguments are stored as metadata."""
+        entry = {
+            "version": version,
+            "model_path": os.path.abspath(model_path),
+            "feature_importance_path": os.path.abspath(feature_importance_path) if feature_importance_path else None,
+            "created_at": datetime.utcnow().isoformat(),
+            "size_bytes": os.path.getsize(model_path),
+            **metadata,
+        }
+        with self._lock:
+            self._refresh()
+            self._data["versions"][version] = entry
+            if activate or self._data.get("active") is None:
+                self._data["active"] = version
+            self._write()
+        return entry
+
+    def set_active(self, version: str):
+        with self._lock:
+            self._refresh()
+            if version not in self._data["versions"]:
+                raise UnknownModelVersion(version)
+            self._data["active"] = version
+            self._write()
+
+    def active_version(self) -> Optional[str]:
+        with self._lock:
+            self._refresh()
+            return self._data.get("active")
+
+    def metadata(self, version: str) -> dict:
+        with self._lock:
+            self._refresh()
+            try:
+                return dict(self._data["versions"][version])
+            except KeyError:
+                raise UnknownModelVersion(version)
+
+    def versions(self) -> list:
+        """Registered versions, newest first, with whether each is active / loaded."""
+        with self._lock:
+            self._refresh()
+            active = self._data.get("active")
+            entries = [
+                dict(entry, active=version == active, loaded=version in self._loaded)
+                for version, entry in self._data["versions"].items()
+            ]
+        return sorted(entries, key=lambda e: e.get("created_at") or "", reverse=True)
+
+    # ---- loaded models ---------------------------------------------------
+    def get(self, version: str = None):
+        """The model for `version` (default: active), loading it on first use."""
+        version = version or self.active_version()
+        if version is None:
+            raise UnknownModelVersion("no model version registered")
+        with self._lock:
+            model = self._loaded.get(version)
+            if model is not None:
+                self._loaded.move_to_end(version)
+                return model
+        # concurrent requests for the same version share one load
+        return self._loading.do(version, self._load, version)
+
+    def _load(self, version: str):
+        # a caller that missed the LRU just before an earlier load finished
+        # lands here as a new leader; don't build a second instance
+        with self._lock:
+            model = self._loaded.get(version)
+            if model is not None:
+                return model
+        entry = self.metadata(version)
+        kwargs = {"model_path": entry["model_path"], "version": version}
+        if entry.get("feature_importance_path"):
+            kwargs["feature_importance_path"] = entry["feature_importance_path"]
+        model = self.factory(**kwargs)
+        with self._lock:
+            existing = self._loaded.get(version)
+            if existing is None:
+                self.loads += 1
+                self._loaded[version] = model
+                self._loaded.move_to_end(version)
+                self._evict()
+        if existing is not None:
+            model.close()  # lost the race; keep the instance others already hold
+            return existing
+        return model
+
+    def _evict(self):
+        active = self._data.get("active")
+        while len(self._loaded) > self.max_loaded:
+            victim = next((v for v in self._loaded if v != active), None)
+            if victim is None:
+                return
+            model = self._loaded.pop(victim)
+            self.evictions += 1
+            # anyone still holding it keeps a working model (scored inline)
+            model.close()
+
+    def forget(self, version: str):
+        """
+        Drop the loaded instance of `version` so the next get() reads its
+        files again (they were rewritten in place). Not closed here: whoever
+        serves it releases it when it is swapped out.
+        """
+        with self._lock:
+            return self._loaded.pop(version, None)
+
+    def release(self, model):
+        """Close a model dropped by its user unless the LRU still holds it."""
+        with self._lock:
+            if not any(m is model for m in self._loaded.values()):
+                model.close()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "active": self._data.get("active"),
+                "registered": len(self._data["versions"]),
+                "loaded": list(self._loaded),
+                "max_loaded": self.max_loaded,
+                "loads": self.loads,
+                "evictions": self.evictions,
+            }
+
+
+class ShadowScorer:
+    """
+    Compare a candidate model against the serving one on sampled traffic.
+    observe() is called on the request path after the response is computed;
+    everything else happens on the worker thread.
+    """
+
+    def __init__(self, candidate, sample_rate: float = 0.05, max_queue: int = 256, window: int = 2048):
+        self.candidate = candidate
+        self.sample_rate = min(1.0, max(0.0, float(sample_rate)))
+        self._queue: "queue.Queue" = queue.Queue(maxsize=max_queue)
+        self._lock = threading.Lock()
+        self._stopped = False
+        self.started_at = time.time()
+
+        self.sampled = 0
+        self.dropped = 0
+        self.errors = 0
+        self.rows = 0
+        self.level_agree = 0
+        self._abs_diffs = deque(maxlen=window)
+        self._primary_ms = deque(maxlen=window)
+        self._candidate_ms = deque(maxlen=window)
+        self._thread = threading.Thread(target=self._run, name="shadow-score", daemon=True)
+        self._thread.start()
+
+    def observe(self, primary, features):
+        """
+        Maybe queue rows for shadow scoring: an (n, n_features) matrix or a
+        list of input dicts (only converted once sampled).
+        """
+        if self._stopped or self.sample_rate <= 0:
+            return
+        if len(features) == 1:
+            if random.random() >= self.sample_rate:
+                return
+            if not isinstance(features, np.ndarray):
+                features = primary.to_matrix(features)
+        else:
+            if not isinstance(features, np.ndarray):
+                features = primary.to_matrix(features)
+            features = features[np.random.random_sample(len(features)) < self.sample_rate]
+            if not len(features):
+                return
+        try:
+            # copy: the caller may reuse or release its buffer
+            self._queue.put_nowait((primary, np.array(features)))
+        except queue.Full:
+            with self._lock:
+                self.dropped += 1
+            return
+        with self._lock:
+            self.sampled += 1
+
+    def _run(self):
+        while True:
+            entry = self._queue.get()
+            if entry is None:
+                return
+            primary, features = entry
+            if primary is self.candidate:
+                continue  # candidate was promoted meanwhile
+            try:
+                start = time.perf_counter()
+                expected = primary._score_matrix(features)
+                mid = time.perf_counter()
+                got = self.candidate._score_matrix(features)
+                end = time.perf_counter()
+            except Exception as e:
+                with self._lock:
+                    self.errors += 1
+                print("⚠️ Shadow scoring failed:", e)
+                continue
+            with self._lock:
+                self.rows += len(features)
+                self._primary_ms.append((mid - start) * 1000.0)
+                self._candidate_ms.append((end - mid) * 1000.0)
+                for e, g in zip(expected, got):
+                    self.level_agree += e["risk_level"] == g["risk_level"]
+                    self._abs_diffs.append(abs(e["risk_probability"] - g["risk_probability"]))
+
+    def stop(self):
+        self._stopped = True
+        try:
+            self._queue.put_nowait(None)
+        except queue.Full:
+            threading.Thread(target=self._queue.put, args=(None,), daemon=True).start()
+
+    def stats(self) -> dict:
+        with self._lock:
+            diffs = sorted(self._abs_diffs)
+            p_ms = sorted(self._primary_ms)
+            c_ms = sorted(self._candidate_ms)
+            return {
+                "candidate_version": self.candidate.version,
+                "sample_rate": self.sample_rate,
+                "running": not self._stopped,
+                "started_at": self.started_at,
+                "sampled_requests": self.sampled,
+                "dropped": self.dropped,
+                "errors": self.errors,
+                "queued": self._queue.qsize(),
+                "rows_compared": self.rows,
+                "risk_level_agreement": round(self.level_agree / self.rows, 4) if self.rows else None,
+                "probability_abs_diff_mean": round(float(np.mean(diffs)), 6) if diffs else None,
+                "probability_abs_diff_p95": round(percentile(diffs, 95), 6) if diffs else None,
+                "primary_latency_ms": {"p50": round(percentile(p_ms, 50), 3), "p95": round(percentile(p_ms, 95), 3)},
+                "candidate_latency_ms": {"p50": round(percentile(c_ms, 50), 3), "p95": round(percentile(c_ms, 95), 3)},
+            }
@@ -0,0 +1,139 @@
+# backend/ml/prediction_stream.py
+"""
+Stream stored predictions out of MongoDB into training arrays.
+
+Only the feature fields and the predicted probability are projected, the
+cursor is read batch by batch, and each batch is written straight into
+preallocated float32 / int8 arrays in `feature_names` order. Memory is
+bounded by `max_rows`: once the arrays are full, further documents are
+sampled into them with reservoir sampling (Algorithm R), so the result is
+a uniform sample of the whole collection however large it grows.
+
+Documents store their features under "input_data" (the predict endpoints)
+or "input" (database/prediction_repository.py); both are read. Documents
+missing a feature or the probability are skipped and counted.
+"""
+import os
+from typing import List, Tuple
+
+import numpy as np
+
+RETRAIN_BATCH_SIZE = int(os.getenv("RETRAIN_BATCH_SIZE", "5000"))
+RETRAIN_MAX_ROWS = int(os.getenv("RETRAIN_MAX_ROWS", "2000000"))
+INPUT_FIELDS = ("input_data", "input")
+
+
+def prediction_projection(feature_names: List[str]) -> dict:
+    projection = {"_id": 0, "result.risk_probability": 1}
+    for field in INPUT_FIELDS:
+        for name in feature_names:
+            projection[f"{field}.{name}"] = 1
+    return projection
+
+
+def _batch_arrays(docs: list, feature_names: List[str]) -> Tuple[np.ndarray, np.ndarray, int]:
+    rows, labels = [], []
+    for doc in docs:
+        inputs = doc.get("input_data") or doc.get("input") or {}
+        try:
+            row = [float(inputs[name]) for name in feature_names]
+            probability = float(doc["result"]["risk_probability"])
+        except (KeyError, TypeError, ValueError):
+            continue
+        rows.append(row)
+        # same binary target as the served model: its positive-class decision
+        labels.append(probability >= 0.5)
+    X = np.array(rows, dtype=np.float32).reshape(len(rows), len(feature_names))
+    y = np.array(labels, dtype=np.int8)
+    return X, y, len(docs) - len(rows)
+
+
+class ReservoirArrays:
+    """Fixed-capacity (X, y) arrays filled in order, then reservoir-sampled."""
+
+    def __init__(self, n_features: int, max_rows: int, expected_rows: int = 0, seed: int = 0):
+        self.max_rows = max(1, int(max_rows))
+        capacity = min(self.max_rows, max(1024, int(expected_rows)))
+        self.X = np.empty((capacity, n_features), dtype=np.float32)
+        self.y = np.empty(capacity, dtype=np.int8)
+        self.filled = 0
+        self.seen = 0
+        self._rng = np.random.default_rng(seed)
+
+    def _grow(self, needed: int):
+        capacity = min(self.max_rows, max(needed, 2 * len(self.X)))
+        X = np.empty((capacity, self.X.shape[1]), dtype=np.float32)
+        y = np.empty(capacity, dtype=np.int8)
+        X[:self.filled] = self.X[:self.filled]
+        y[:self.filled] = self.y[:self.filled]
+        self.X, self.y = X, y
+
+    def add(self, X: np.ndarray, y: np.ndarray):
+        # fill phase: rows go in as they come
+        take = min(len(X), self.max_rows - self.filled)
+        if take:
+            if self.filled + take > len(self.X):
+                self._grow(self.filled + take)
+            self.X[self.filled:self.filled + take] = X[:take]
+            self.y[self.filled:self.filled + take] = y[:take]
+            self.filled += take
+            self.seen += take
+        rest = len(X) - take
+        if rest <= 0:
+            return
+        # reservoir phase: the i-th row seen (0-based) replaces a random slot
+        # with probability max_rows / (i + 1)
+        positions = self.seen + np.arange(rest)
+        slots = self._rng.integers(0, positions + 1)
+        keep = slots < self.max_rows
+        self.X[slots[keep]] = X[take:][keep]
+        self.y[slots[keep]] = y[take:][keep]
+        self.seen += rest
+
+    def arrays(self) -> Tuple[np.ndarray, np.ndarray]:
+        return self.X[:self.filled], self.y[:self.filled]
+
+
+def load_prediction_arrays(collection, feature_names: List[str], max_rows: int = RETRAIN_MAX_ROWS,
+                           batch_size: int = RETRAIN_BATCH_SIZE, query: dict = None, seed: int = 0):
+    """
+    (X float32 (n, n_features), y int8, stats) from a predictions collection,
+    with n <= max_rows. stats: documents seen, rows used, documents skipped.
+    """
+    query = query or {}
+    try:
+        expected = collection.estimated_document_count() if not query else collection.count_documents(query)
+    except Exception:
+        expected = 0
+    reservoir = ReservoirArrays(len(feature_names), max_rows, expected_rows=expected, seed=seed)
+    skipped = 0
+    documents = 0
+
+    cursor = collection.find(query, prediction_projection(feature_names)).batch_size(batch_size)
+    batch = []
+    try:
+        for doc in cursor:
+            batch.append(doc)
+            if len(batch) >= batch_size:
+                X, y, bad = _batch_arrays(batch, feature_names)
+                reservoir.add(X, y)
+                skipped += bad
+                documents += len(batch)
+                batch = []
+        if batch:
+            X, y, bad = _batch_arrays(batch, feature_names)
+            reservoir.add(X, y)
+            skipped += bad
+            documents += len(batch)
+    finally:
+        cursor.close()
+
+    X, y = reservoir.arrays()
+    stats = {
+        "documents_seen": documents,
+        "rows_valid": reservoir.seen,
+        "rows_used": len(X),
+        "skipped": skipped,
+        "sampled": reservoir.seen > reservoir.filled,
+    }
+    return X, y, stats
@@ -44,75 +44,151 @@
 #     }
 
 
+import os
+import json
 import joblib
 from datetime import datetime
 from sklearn.ensemble import RandomForestClassifier
 from database import db
-from ml.deployed_model import reload_model
-
-MODEL_PATH = "ml/model.pkl"
-MODEL_VERSION_PATH = "ml/model_version.txt"
-
-
-def retrain_model_background():
+from ml.deployed_model import MODEL_DIR, FEATURE_NAMES_PATH, get_registry, activate_version
+from ml.prediction_stream import load_prediction_arrays
+from ml.incremental_forest import extend_forest, IncrementalUpdateRejected
+from ml.job_executor import job_stage
+
+# "incremental": keep the active forest and append RETRAIN_NEW_TREES trees
+# fitted only on predictions stored since it was trained, retiring the oldest
+# trees beyond RETRAIN_MAX_TREES (see ml/incremental_forest.py). "full":
+# refit RETRAIN_FULL_TREES trees on all history. Incremental falls back to
+# full when there is no active version to extend.
+# Trees are capped at RETRAIN_MAX_DEPTH (ml/train.py's depth): the compiled
+# forest stores n_features floats per node, so unbounded trees fitted on
+# millions of rows would make every serving process map hundreds of MB.
+RETRAIN_MODE = os.getenv("RETRAIN_MODE", "incremental")
+RETRAIN_FULL_TREES = int(os.getenv("RETRAIN_FULL_TREES", "100"))
+RETRAIN_NEW_TREES = int(os.getenv("RETRAIN_NEW_TREES", "25"))
+RETRAIN_MAX_TREES = int(os.getenv("RETRAIN_MAX_TREES", "200"))
+RETRAIN_MAX_DEPTH = int(os.getenv("RETRAIN_MAX_DEPTH", "8"))
+RETRAIN_HOLDOUT_FRACTION = float(os.getenv("RETRAIN_HOLDOUT_FRACTION", "0.2"))
+RETRAIN_MAX_ACCURACY_DROP = float(os.getenv("RETRAIN_MAX_ACCURACY_DROP", "0.01"))
+
+
+def retrain_model_background(mode: str = None, job_id: str = None):
+
+    mode = mode or RETRAIN_MODE
+    if mode not in ("incremental", "full"):
+        raise ValueError(f"unknown retrain mode {mode!r}")
 
     retrain_log = {
         "status": "running",
+        "mode": mode,
         "started_at": datetime.utcnow(),
     }
 
-    log_id = db.retrain_logs.insert_one(retrain_log).inserted_id
+    # jobs from ml/job_executor.py already have a log document (status "queued")
+    if job_id is not None:
+        log_filter = {"job_id": job_id}
+        db.retrain_logs.update_one(log_filter, {"$set": retrain_log})
+    else:
+        log_filter = {"_id": db.retrain_logs.insert_one(retrain_log).inserted_id}
 
     try:
-        records = list(db.predictions.find())
-
-        if len(records) < 10:
+        with open(FEATURE_NAMES_PATH) as f:
+            feature_names = json.load(f)
+
+        registry = get_registry()
+        base_version = registry.active_version()
+        if base_version is None:
+            mode = "full"
+        base = registry.metadata(base_version) if mode == "incremental" else {}
+
+        # everything stored before the cutoff is covered by this version; the
+        # next incremental run starts from there
+        cutoff = datetime.utcnow()
+        query = {}
+        if base.get("trained_through"):
+            query = {"created_at": {"$gte": datetime.fromisoformat(base["trained_through"]), "$lt": cutoff}}
+
+        job_stage(job_id, "load_data", mode=mode)
+        # streamed in cursor batches into bounded arrays (see ml/prediction_stream.py)
+        X, y, data_stats = load_prediction_arrays(db.predictions, feature_names, query=query)
+
+        if len(X) < 10:
             db.retrain_logs.update_one(
-                {"_id": log_id},
-                {"$set": {"status": "failed", "reason": "Not enough data"}}
+                log_filter,
+                {"$set": {"status": "failed", "reason": "Not enough data", "mode": mode, "data": data_stats}}
             )
             return
 
-        X = []
-        y = []
-
-        for r in records:
-            X.append(list(r["input_data"].values()))
-            y.append(r["result"]["risk_level"])
-
-        model = RandomForestClassifier(n_estimators=100)
-        model.fit(X, y)
-
-        joblib.dump(model, MODEL_PATH)
-
+        job_stage(job_id, "fit", data=data_stats)
+        if mode == "incremental":
+            try:
+                model, info = extend_forest(
+                    joblib.load(base["model_path"]), X, y,
+                    n_new_trees=RETRAIN_NEW_TREES,
+                    max_trees=RETRAIN_MAX_TREES,
+                    max_depth=RETRAIN_MAX_DEPTH,
+                    holdout_fraction=RETRAIN_HOLDOUT_FRACTION,
+                    max_accuracy_drop=RETRAIN_MAX_ACCURACY_DROP,
+                    seed=int(cutoff.timestamp()),
+                )
+            except IncrementalUpdateRejected as e:
+                # the current model keeps serving; this data is retried next time
+                db.retrain_logs.update_one(
+                    log_filter,
+                    {"$set": {"status": "rejected", "reason": str(e), "base_version": base_version,
+                              "completed_at": datetime.utcnow(), "data": data_stats}}
+                )
+                return
+            info["base_version"] = base_version
+        else:
+            model = RandomForestClassifier(n_estimators=RETRAIN_FULL_TREES, max_depth=RETRAIN_MAX_DEPTH, n_jobs=-1)
+            model.fit(X, y)
+            info = {"n_estimators": model.n_estimators, "training_accuracy": float(model.score(X, y))}
+
+        job_stage(job_id, "save")
         version = datetime.utcnow().strftime("%Y%m%d%H%M%S")
+        model_path = os.path.join(MODEL_DIR, f"risk_model_{version}.pkl")
+        importance_path = os.path.join(MODEL_DIR, f"feature_importance_{version}.json")
 
-        with open(MODEL_VERSION_PATH, "w") as f:
-            f.write(version)
+        joblib.dump(model, model_path)
+        with open(importance_path, "w") as f:
+            json.dump(dict(zip(feature_names, model.feature_importances_.tolist())), f, indent=4)
 
-        reload_model()
+        get_registry().register(
+            version, model_path, importance_path,
+            source="retrain_service", mode=mode, data_used=len(X), data=data_stats,
+            trained_through=cutoff.isoformat(), **info,
+        )
+        # serve it only once it has passed the smoke test (in a worker process
+        # this validates it and records it as active; the web process reloads
+        # when the job exits, see main.py)
+        job_stage(job_id, "activate", model_version=version)
+        activate_version(version)
 
         db.retrain_logs.update_one(
-            {"_id": log_id},
+            log_filter,
             {"$set": {
                 "status": "completed",
                 "completed_at": datetime.utcnow(),
                 "model_version": version,
-                "data_used": len(records)
+                "data_used": len(X),
+                "data": data_stats,
+                **info,
             }}
         )
 
     except Exception as e:
         db.retrain_logs.update_one(
-            {"_id": log_id},
+            log_filter,
             {"$set": {
                 "status": "failed",
-                "error": str(e)
+                "error": str(e),
+                "completed_at": datetime.utcnow(),
             }}
         )
 
 
-def retrain_model():
+def retrain_model(mode: str = None):
     # Synchronous wrapper for retrain_model_background
-    retrain_model_background()
+    retrain_model_background(mode)
     return {"message": "Retraining started"}
@@ -1,11 +1,14 @@
 import os
 import json
+import time
+import tempfile
+import threading
+import contextlib
 import joblib
 import numpy as np
 import pandas as pd
 
 from sklearn.ensemble import RandomForestClassifier
-from sklearn.model_selection import train_test_split
 from sklearn.metrics import (
     accuracy_score,
     roc_auc_score,
@@ -16,90 +19,209 @@ from sklearn.metrics import (
 # CONFIG
 # ---------------------------
 
-MODEL_DIR = "models"
+MODEL_DIR = os.path.join(os.path.dirname(__file__), "models")
 os.makedirs(MODEL_DIR, exist_ok=True)
 
 RANDOM_STATE = 42
-N_SAMPLES = 10000
+N_SAMPLES = int(os.getenv("TRAIN_N_SAMPLES", "10000"))
+TEST_SIZE = 0.2
+
+# rows are generated / scored CHUNK_SIZE at a time, so the only full-size
+# arrays are the float32 feature matrix (28 bytes per row) and the labels;
+# tens of millions of rows fit in a few GB. Trees are built and evaluated on
+# all cores (TRAIN_N_JOBS=-1).
+CHUNK_SIZE = int(os.getenv("TRAIN_CHUNK_SIZE", "1000000"))
+N_JOBS = int(os.getenv("TRAIN_N_JOBS", "-1"))
+
+FEATURE_NAMES = [
+    "political_stability_index",
+    "logistics_performance_index",
+    "supplier_financial_health",
+    "disaster_exposure_score",
+    "trade_dependency_ratio",
+    "historical_disruption_rate",
+    "esg_risk_score",
+]
+# beta(a, b) parameters per feature, in FEATURE_NAMES order
+FEATURE_BETA = [(2, 2), (2, 2), (2, 2), (2, 5), (2, 3), (2, 4), (2, 3)]
 
 
 # ---------------------------
-# 1️⃣ Generate Domain-Based Dataset
+# Stage timing / memory
 # ---------------------------
 
-def generate_supply_chain_dataset(n_samples=10000):
-    np.random.seed(RANDOM_STATE)
-
-    data = pd.DataFrame({
-        "political_stability_index": np.random.beta(2, 2, n_samples),
-        "logistics_performance_index": np.random.beta(2, 2, n_samples),
-        "supplier_financial_health": np.random.beta(2, 2, n_samples),
-        "disaster_exposure_score": np.random.beta(2, 5, n_samples),
-        "trade_dependency_ratio": np.random.beta(2, 3, n_samples),
-        "historical_disruption_rate": np.random.beta(2, 4, n_samples),
-        "esg_risk_score": np.random.beta(2, 3, n_samples),
-    })
-
-    # Define risk logic (composite weighted formula)
-    risk_score = (
-        (1 - data["political_stability_index"]) * 0.2 +
-        (1 - data["supplier_financial_health"]) * 0.2 +
-        data["disaster_exposure_score"] * 0.2 +
-        data["historical_disruption_rate"] * 0.2 +
-        data["trade_dependency_ratio"] * 0.1 +
-        data["esg_risk_score"] * 0.1
-    )
-
-    # Binary target
-    data["risk_label"] = (risk_score > 0.5).astype(int)
-
-    return data
+def _rss_bytes() -> int:
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError):
+        import resource
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+@contextlib.contextmanager
+def profile_stage(name: str, stages: list, on_stage=None, interval: float = 0.01):
+    """Append the block's wall time and peak RSS (sampled every 10ms) to `stages`."""
+    if on_stage is not None:
+        on_stage(name)  # called with the stage name as the stage starts
+    start = time.perf_counter()
+    rss_before = _rss_bytes()
+    peak = [rss_before]
+    stop = threading.Event()
+
+    def sample():
+        while not stop.wait(interval):
+            peak[0] = max(peak[0], _rss_bytes())
+
+    sampler = threading.Thread(target=sample, name="train-memory", daemon=True)
+    sampler.start()
+    try:
+        yield
+    finally:
+        stop.set()
+        sampler.join()
+        entry = {
+            "stage": name,
+            "seconds": round(time.perf_counter() - start, 3),
+            "rss_before_mb": round(rss_before / 2**20, 1),
+            "peak_rss_mb": round(max(peak[0], _rss_bytes()) / 2**20, 1),
+        }
+        stages.append(entry)
+        print(f"[{name}] {entry['seconds']}s, peak RSS {entry['peak_rss_mb']} MB")
 
 
 # ---------------------------
-# 2️⃣ Train Model
+# Artifact writes
 # ---------------------------
 
-def train():
-    print("Generating dataset...")
-    df = generate_supply_chain_dataset(N_SAMPLES)
+def _atomic_write(path, write):
+    """
+    write(tmp_path) into a temp file in MODEL_DIR, then rename it over
+    `path`: serving processes map the pickle and read the JSON files, so they
+    must see either the old file or the complete new one, never a partial one.
+    """
+    fd, tmp = tempfile.mkstemp(prefix="." + os.path.basename(path) + "-", dir=os.path.dirname(path))
+    os.close(fd)
+    try:
+        write(tmp)
+        os.chmod(tmp, 0o644)  # mkstemp files are owner-only
+        os.replace(tmp, path)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+
+
+def _write_json(path, obj):
+    def write(tmp):
+        with open(tmp, "w") as f:
+            json.dump(obj, f, indent=4)
+    _atomic_write(path, write)
+
+
+# ---------------------------
+# 1️⃣ Generate Domain-Based Dataset
+# ---------------------------
 
-    X = df.drop("risk_label", axis=1)
-    y = df["risk_label"]
+def generate_supply_chain_arrays(n_samples=N_SAMPLES, chunk_size=CHUNK_SIZE, seed=RANDOM_STATE):
+    """
+    (X float32 (n, 7), y int8) built chunk by chunk into preallocated
+    arrays; float64 intermediates never exceed one chunk. Each chunk has its
+    own seed, so the data depends only on n_samples, chunk_size and seed.
+    """
+    X = np.empty((n_samples, len(FEATURE_NAMES)), dtype=np.float32)
+    y = np.empty(n_samples, dtype=np.int8)
+    n_chunks = max(1, -(-n_samples // chunk_size))
+    seeds = np.random.SeedSequence(seed).spawn(n_chunks)
+    for i, start in enumerate(range(0, n_samples, chunk_size)):
+        stop = min(start + chunk_size, n_samples)
+        rng = np.random.default_rng(seeds[i])
+        block = X[start:stop]
+        for j, (a, b) in enumerate(FEATURE_BETA):
+            block[:, j] = rng.beta(a, b, stop - start)
+
+        # Define risk logic (composite weighted formula), on the float32 values the model sees
+        f = block.astype(np.float64)
+        risk_score = (
+            (1 - f[:, 0]) * 0.2 +
+            (1 - f[:, 2]) * 0.2 +
+            f[:, 3] * 0.2 +
+            f[:, 5] * 0.2 +
+            f[:, 4] * 0.1 +
+            f[:, 6] * 0.1
+        )
+        # Binary target
+        y[start:stop] = risk_score > 0.5
+    return X, y
 
-    feature_names = list(X.columns)
 
-    X_train, X_test, y_train, y_test = train_test_split(
-        X, y, test_size=0.2, random_state=RANDOM_STATE
-    )
+def generate_supply_chain_dataset(n_samples=10000):
+    """DataFrame view of generate_supply_chain_arrays (small samples / inspection)."""
+    X, y = generate_supply_chain_arrays(n_samples)
+    data = pd.DataFrame(X, columns=FEATURE_NAMES)
+    data["risk_label"] = y
+    return data
 
-    print("Training RandomForest model...")
 
-    model = RandomForestClassifier(
-        n_estimators=200,
-        max_depth=8,
-        random_state=RANDOM_STATE
-    )
+# ---------------------------
+# 2️⃣ Train Model
+# ---------------------------
 
-    model.fit(X_train, y_train)
+def predict_proba_chunked(model, X, chunk_size=CHUNK_SIZE):
+    """Positive-class probabilities, scored chunk by chunk into a float32 array."""
+    proba = np.empty(len(X), dtype=np.float32)
+    for start in range(0, len(X), chunk_size):
+        proba[start:start + chunk_size] = model.predict_proba(X[start:start + chunk_size])[:, 1]
+    return proba
+
+
+def train(save_model=True, n_samples=N_SAMPLES, n_jobs=N_JOBS, on_stage=None):
+    if n_samples < 2:
+        raise ValueError(f"n_samples must be at least 2 (one training and one test row), got {n_samples}")
+    stages = []
+    with profile_stage("generate", stages, on_stage):
+        print(f"Generating dataset ({n_samples} rows)...")
+        X, y = generate_supply_chain_arrays(n_samples)
+
+    # rows are i.i.d. draws, so a tail split is as random as a shuffled
+    # one and, unlike train_test_split, both halves are views (no copies)
+    # at least one row on each side: X[:-0] would be an empty training set
+    n_test = min(max(int(round(n_samples * TEST_SIZE)), 1), n_samples - 1)
+    X_train, X_test = X[:-n_test], X[-n_test:]
+    y_train, y_test = y[:-n_test], y[-n_test:]
+    if len(np.unique(y_train)) < 2:
+        raise ValueError(f"the {len(y_train)} training rows contain only one class; use more samples")
+
+    with profile_stage("fit", stages, on_stage):
+        print("Training RandomForest model...")
+        model = RandomForestClassifier(
+            n_estimators=200,
+            max_depth=8,
+            random_state=RANDOM_STATE,
+            n_jobs=n_jobs,
+        )
+        # float32 C-contiguous input is what the trees use internally: no copy
+        model.fit(X_train, y_train)
 
     # ---------------------------
     # 3️⃣ Evaluate
     # ---------------------------
 
-    y_pred = model.predict(X_test)
-    y_proba = model.predict_proba(X_test)[:, 1]
+    with profile_stage("evaluate", stages, on_stage):
+        y_proba = predict_proba_chunked(model, X_test)
+        y_pred = (y_proba > 0.5).astype(np.int8)
 
-    accuracy = accuracy_score(y_test, y_pred)
-    roc_auc = roc_auc_score(y_test, y_proba)
+        accuracy = accuracy_score(y_test, y_pred)
+        roc_auc = roc_auc_score(y_test, y_proba)
 
-    metrics = {
-        "accuracy": float(accuracy),
-        "roc_auc": float(roc_auc),
-        "classification_report": classification_report(
-            y_test, y_pred, output_dict=True
-        ),
-    }
+        metrics = {
+            "accuracy": float(accuracy),
+            "roc_auc": float(roc_auc),
+            "classification_report": classification_report(
+                y_test, y_pred, output_dict=True
+            ),
+            "n_samples": int(n_samples),
+        }
 
     print("Accuracy:", accuracy)
     print("ROC-AUC:", roc_auc)
@@ -108,23 +230,24 @@ def train():
     # 4️⃣ Save Artifacts
     # ---------------------------
 
-    joblib.dump(model, os.path.join(MODEL_DIR, "risk_model_v1.pkl"))
-
-    with open(os.path.join(MODEL_DIR, "metrics_v1.json"), "w") as f:
-        json.dump(metrics, f, indent=4)
+    if save_model:
+        with profile_stage("save", stages, on_stage):
+            _atomic_write(os.path.join(MODEL_DIR, "risk_model_v1.pkl"), lambda tmp: joblib.dump(model, tmp))
 
-    with open(os.path.join(MODEL_DIR, "feature_names.json"), "w") as f:
-        json.dump(feature_names, f, indent=4)
+            feature_importance = dict(
+                zip(FEATURE_NAMES, model.feature_importances_.tolist())
+            )
 
-    feature_importance = dict(
-        zip(feature_names, model.feature_importances_)
-    )
+            _write_json(os.path.join(MODEL_DIR, "feature_names.json"), FEATURE_NAMES)
+            _write_json(os.path.join(MODEL_DIR, "feature_importance_v1.json"), feature_importance)
 
-    with open(os.path.join(MODEL_DIR, "feature_importance_v1.json"), "w") as f:
-        json.dump(feature_importance, f, indent=4)
+    metrics["stages"] = stages
+    if save_model:
+        _write_json(os.path.join(MODEL_DIR, "metrics_v1.json"), metrics)
+        print("Model and artifacts saved in /models directory.")
 
-    print("Model and artifacts saved in /models directory.")
+    return model, metrics
 
 
 if __name__ == "__main__":
-    train()
\ No newline at end of file
+    train()
@@ -2,10 +2,11 @@
 import os
 import pandas as pd
 import joblib
-from sentence_transformers import SentenceTransformer
 from sklearn.model_selection import train_test_split
 from sklearn.neural_network import MLPRegressor
 from sklearn.metrics import mean_absolute_error, r2_score
+from src.ml_models.embedder import LazyEmbedder
+from src.ml_models.embedding_cache import get_embedding_cache
 DATA_CSV = os.path.join("backend", "data", "training.csv")
 EMBED_MODEL_NAME = "all-MiniLM-L6-v2"   # fast, small
 EMBED_INFO = os.path.join("backend", "ml", "embedder_name.txt")
@@ -26,10 +27,12 @@ def main():
 
     print(f"Loaded {len(texts)} samples")
 
-    # embed
-    embedder = SentenceTransformer(EMBED_MODEL_NAME)
+    # embed (only rows not in the embedding cache; the model loads only if needed)
+    embedder = LazyEmbedder(EMBED_MODEL_NAME)
+    cache = get_embedding_cache(EMBED_MODEL_NAME)
     print("Computing embeddings...")
-    X = embedder.encode(texts, show_progress_bar=True, batch_size=64)
+    X = cache.encode(texts, lambda batch: embedder.encode(batch, show_progress_bar=True, batch_size=64))
+    print("Embedding cache:", cache.stats())
 
     # train/val
     X_train, X_val, y_train, y_val = train_test_split(X, y, test_size=0.12, random_state=42)
@@ -45,9 +48,14 @@ def main():
     print(f"Validation MAE: {mae:.3f}, R2: {r2:.3f}")
 
     os.makedirs(os.path.dirname(MODEL_OUT), exist_ok=True)
-    joblib.dump(reg, MODEL_OUT)
-    with open(EMBED_INFO, "w") as f:
+    # serving workers mmap regressor.pkl: write a new file and rename it over
+    # the old one, never truncate the mapped file in place
+    tmp = MODEL_OUT + f".tmp-{os.getpid()}"
+    joblib.dump(reg, tmp)
+    os.replace(tmp, MODEL_OUT)
+    with open(EMBED_INFO + ".tmp", "w") as f:
         f.write(EMBED_MODEL_NAME)
+    os.replace(EMBED_INFO + ".tmp", EMBED_INFO)
 
     print("Saved regressor:", MODEL_OUT)
     print("Saved embedder info:", EMBED_INFO)
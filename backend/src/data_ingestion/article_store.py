@@ -0,0 +1,225 @@
+# backend/src/data_ingestion/article_store.py
+"""
+Content-addressed, append-only on-disk store for fetched news articles.
+
+Layout (under ARTICLE_STORE_DIR):
+  articles.seg  - append-only segment; one JSON record per line
+  articles.idx  - append-only index; one JSON line per record with its
+                  content hash, url, country, published_at, offset and
+                  length, plus a link line (hash, country, published_at)
+                  each time a stored article comes back for another country
+
+Articles are deduplicated by URL and by a hash of their normalized
+title + description: each is stored once, but belongs to every country it
+was fetched for. Per-country listings are ordered from the index alone, so
+only the records actually returned are decoded. Reads go through a
+read-only mmap of the segment, and the index is tailed on demand so records
+appended by another process (e.g. build_dataset.py while the API is
+running) become visible.
+"""
+import os
+import json
+import mmap
+import heapq
+import hashlib
+import threading
+from typing import Dict, Iterable, List, Optional
+
+try:
+    import fcntl  # POSIX only; used to serialize appends across processes
+except ImportError:
+    fcntl = None
+
+DATA_DIR = os.path.normpath(os.path.join(os.path.dirname(__file__), "..", "..", "data"))
+ARTICLE_STORE_DIR = os.getenv("ARTICLE_STORE_DIR", os.path.join(DATA_DIR, "article_store"))
+
+SEGMENT_FILE = "articles.seg"
+INDEX_FILE = "articles.idx"
+
+
+def article_hash(article: Dict) -> str:
+    """Stable content hash of an article's normalized title + description."""
+    title = " ".join((article.get("title") or "").split()).lower()
+    desc = " ".join((article.get("description") or "").split()).lower()
+    return hashlib.sha1(f"{title}\n{desc}".encode("utf-8")).hexdigest()
+
+
+def _country_key(country: str) -> str:
+    return " ".join((country or "").split()).lower()
+
+
+class ArticleStore:
+    def __init__(self, root: str = ARTICLE_STORE_DIR):
+        self.root = root
+        os.makedirs(root, exist_ok=True)
+        self._seg_path = os.path.join(root, SEGMENT_FILE)
+        self._idx_path = os.path.join(root, INDEX_FILE)
+        # touch both files so readers can open them before the first write
+        for path in (self._seg_path, self._idx_path):
+            open(path, "ab").close()
+
+        self._lock = threading.RLock()
+        self._by_hash: Dict[str, tuple] = {}      # hash -> (offset, length)
+        self._by_url: Dict[str, str] = {}         # url -> hash
+        self._by_country: Dict[str, List[str]] = {}   # country -> hashes, in arrival order
+        self._country_sets: Dict[str, set] = {}
+        self._published: Dict[str, str] = {}      # hash -> published_at ("" if unknown)
+        self._idx_pos = 0
+        self._mmap: Optional[mmap.mmap] = None
+        self._mmap_size = 0
+        self._catch_up()
+
+    # ---- index ----------------------------------------------------------
+    def _catch_up(self):
+        """Load index lines appended since the last call (by us or others)."""
+        seg_size = os.path.getsize(self._seg_path)
+        with open(self._idx_path, "rb") as f:
+            f.seek(self._idx_pos)
+            for line in f:
+                if not line.endswith(b"\n"):
+                    break  # partially written line; retry next time
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    self._idx_pos += len(line)
+                    continue
+                if "o" in entry and entry["o"] + entry["n"] > seg_size:
+                    break  # segment write not visible yet
+                self._idx_pos += len(line)
+                self._index_entry(entry)
+
+    def _index_entry(self, entry: Dict):
+        h = entry["h"]
+        if "o" in entry and h not in self._by_hash:
+            self._by_hash[h] = (entry["o"], entry["n"])
+            if entry.get("u"):
+                self._by_url[entry["u"]] = h
+            if "p" in entry:
+                self._published[h] = entry["p"] or ""
+            else:
+                # index line written before published_at was indexed
+                self._published[h] = self._read(h).get("published_at") or ""
+        if h not in self._by_hash:
+            return
+        country = entry.get("c") or ""
+        members = self._country_sets.setdefault(country, set())
+        if h not in members:
+            members.add(h)
+            self._by_country.setdefault(country, []).append(h)
+
+    # ---- reads ----------------------------------------------------------
+    def _view(self, end: int) -> mmap.mmap:
+        if self._mmap is None or end > self._mmap_size:
+            if self._mmap is not None:
+                self._mmap.close()
+            with open(self._seg_path, "rb") as f:
+                self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            self._mmap_size = len(self._mmap)
+        return self._mmap
+
+    def _read(self, h: str) -> Dict:
+        offset, length = self._by_hash[h]
+        view = self._view(offset + length)
+        return json.loads(view[offset:offset + length])
+
+    def contains(self, article: Dict) -> bool:
+        with self._lock:
+            url = article.get("url")
+            if url and url in self._by_url:
+                return True
+            return article_hash(article) in self._by_hash
+
+    def get(self, h: str) -> Optional[Dict]:
+        with self._lock:
+            if h not in self._by_hash:
+                self._catch_up()
+            if h not in self._by_hash:
+                return None
+            return self._read(h)
+
+    def articles_for_country(self, country: str, limit: int = None) -> List[Dict]:
+        """Stored articles for a country, newest first by published_at."""
+        with self._lock:
+            self._catch_up()
+            hashes = self._by_country.get(_country_key(country), [])
+            # newest first, ties in arrival order; only the chosen records are decoded
+            if limit:
+                hashes = heapq.nlargest(limit, hashes, key=self._published.__getitem__)
+            else:
+                hashes = sorted(hashes, key=self._published.__getitem__, reverse=True)
+            return [self._read(h) for h in hashes]
+
+    def countries(self) -> List[str]:
+        with self._lock:
+            self._catch_up()
+            return [c for c in self._by_country if c]
+
+    def __len__(self):
+        with self._lock:
+            self._catch_up()
+            return len(self._by_hash)
+
+    # ---- writes ---------------------------------------------------------
+    def add_many(self, articles: Iterable[Dict], country: str = None) -> List[Dict]:
+        """
+        Persist articles not seen before for this country and return just
+        those, in input order. Callers hand only this delta to scoring. An
+        article already stored for another country (same URL or content
+        hash) is not stored again, only linked to this country.
+        """
+        country_key = _country_key(country)
+        new_articles = []
+        with self._lock, open(self._seg_path, "ab") as seg, open(self._idx_path, "ab") as idx:
+            if fcntl is not None:
+                fcntl.flock(seg.fileno(), fcntl.LOCK_EX)
+            try:
+                self._catch_up()
+                for a in articles:
+                    url = a.get("url")
+                    h = article_hash(a)
+                    if h not in self._by_hash and url and url in self._by_url:
+                        h = self._by_url[url]
+                    if h in self._country_sets.get(country_key, ()):
+                        continue
+
+                    if h in self._by_hash:
+                        entry = {"h": h, "c": country_key, "p": self._published[h]}
+                    else:
+                        record = dict(a, content_hash=h, country=country)
+                        data = json.dumps(record, ensure_ascii=False).encode("utf-8")
+                        seg.seek(0, os.SEEK_END)
+                        offset = seg.tell()
+                        seg.write(data + b"\n")
+                        seg.flush()
+                        entry = {"h": h, "u": url, "c": country_key, "p": a.get("published_at") or "",
+                                 "o": offset, "n": len(data)}
+                    line = (json.dumps(entry) + "\n").encode("utf-8")
+                    idx.write(line)
+                    idx.flush()
+                    self._idx_pos += len(line)
+                    self._index_entry(entry)
+                    new_articles.append(a)
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(seg.fileno(), fcntl.LOCK_UN)
+        return new_articles
+
+    def close(self):
+        with self._lock:
+            if self._mmap is not None:
+                self._mmap.close()
+                self._mmap = None
+                self._mmap_size = 0
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_article_store() -> ArticleStore:
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = ArticleStore()
+    return _store
@@ -0,0 +1,166 @@
+# backend/src/data_ingestion/batch_query.py
+"""
+Batched multi-country NewsAPI queries.
+
+Instead of one request per country, countries are packed into OR queries
+("India" OR "China" OR ...) and the returned articles are demultiplexed
+back to each country by matching country mentions in title/description.
+Every request goes through the shared NEWSAPI_RATE_LIMITER token bucket.
+"""
+import re
+from typing import Dict, List
+
+from src.data_ingestion import fetch_news as _news
+
+NEWSAPI_MAX_PAGE_SIZE = 100
+NEWSAPI_MAX_QUERY_LEN = 500
+DEFAULT_COUNTRIES_PER_QUERY = 10
+
+# canonical name first; used as the search term, the rest only for matching
+COUNTRY_ALIASES = {
+    "india": ["India", "Indian"],
+    "united states": ["United States", "USA", "US", "U.S.", "America", "American"],
+    "china": ["China", "Chinese"],
+    "germany": ["Germany", "German"],
+    "united kingdom": ["United Kingdom", "UK", "U.K.", "Britain", "British"],
+    "france": ["France", "French"],
+    "japan": ["Japan", "Japanese"],
+    "brazil": ["Brazil", "Brazilian"],
+    "australia": ["Australia", "Australian"],
+    "russia": ["Russia", "Russian"],
+    "canada": ["Canada", "Canadian"],
+    "south africa": ["South Africa", "South African"],
+    "italy": ["Italy", "Italian"],
+    "spain": ["Spain", "Spanish"],
+    "mexico": ["Mexico", "Mexican"],
+    "singapore": ["Singapore", "Singaporean"],
+    "netherlands": ["Netherlands", "Dutch"],
+    "south korea": ["South Korea", "Korea", "Korean"],
+}
+
+ISO2_TO_COUNTRY = {
+    "IN": "india", "US": "united states", "CN": "china", "DE": "germany",
+    "GB": "united kingdom", "UK": "united kingdom", "FR": "france", "JP": "japan",
+    "BR": "brazil", "AU": "australia", "RU": "russia", "CA": "canada",
+    "ZA": "south africa", "IT": "italy", "ES": "spain", "MX": "mexico",
+    "SG": "singapore", "NL": "netherlands", "KR": "south korea",
+}
+
+
+def country_aliases(country: str) -> List[str]:
+    name = country.strip()
+    key = ISO2_TO_COUNTRY.get(name.upper(), " ".join(name.split()).lower())
+    return COUNTRY_ALIASES.get(key, [name])
+
+
+def _mention_pattern(aliases: List[str]):
+    parts = []
+    for alias in aliases:
+        escaped = re.escape(alias)
+        # acronyms (US, UK) must match case-sensitively so "us" doesn't count
+        parts.append(f"(?-i:{escaped})" if alias.replace(".", "").isupper() else escaped)
+    return re.compile(r"(?<!\w)(?:" + "|".join(parts) + r")(?!\w)", re.IGNORECASE)
+
+
+def plan_batches(countries: List[str], countries_per_query: int = DEFAULT_COUNTRIES_PER_QUERY) -> List[List[str]]:
+    """Group countries so each OR query stays within NewsAPI's limits."""
+    batches, current, length = [], [], 0
+    for country in countries:
+        term_len = len(country_aliases(country)[0]) + 2 + 4  # quotes + " OR "
+        if current and (len(current) >= countries_per_query or length + term_len > NEWSAPI_MAX_QUERY_LEN):
+            batches.append(current)
+            current, length = [], 0
+        current.append(country)
+        length += term_len
+    if current:
+        batches.append(current)
+    return batches
+
+
+def build_query(countries: List[str]) -> str:
+    return " OR ".join(f'"{country_aliases(c)[0]}"' for c in countries)
+
+
+def demux_articles(articles: List[Dict], countries: List[str], page_size: int) -> Dict[str, List[Dict]]:
+    """
+    Split a combined result set back out per country. An article mentioning
+    several countries is assigned to each; each country keeps at most
+    `page_size` articles in the original (newest-first) order.
+    """
+    patterns = {c: _mention_pattern(country_aliases(c)) for c in countries}
+    out = {c: [] for c in countries}
+    for a in articles:
+        text = f"{a.get('title') or ''} {a.get('description') or ''}"
+        for c, pattern in patterns.items():
+            if len(out[c]) < page_size and pattern.search(text):
+                out[c].append(a)
+    return out
+
+
+def fetch_news_batched(
+    countries: List[str],
+    page_size: int = 10,
+    api_key: str = None,
+    countries_per_query: int = DEFAULT_COUNTRIES_PER_QUERY,
+    use_cache: bool = True,
+    since: Dict[str, str] = None,
+) -> Dict[str, List[Dict]]:
+    """
+    Fetch news for many countries with one NewsAPI request per batch.
+    Returns {country: articles} and fills the
+    per-country news cache so later single-country lookups hit it.
+
+    If a batch comes back saturated (a full page) some countries may have
+    been crowded out; those with no matches fall back to a single query.
+
+    `since` maps country -> published_at watermark. Each batch then asks
+    only for articles newer than its oldest watermark and every country
+    keeps just the articles past its own; incremental fetches bypass the
+    cache.
+    """
+    countries = list(dict.fromkeys(countries))
+    key = api_key or _news.NEWSAPI_KEY
+    if not key:
+        print("⚠️ NEWSAPI_KEY missing — using mock data.")
+        return {c: _news._mock_articles(c) for c in countries}
+
+    since = {c: w for c, w in (since or {}).items() if w}
+    incremental = bool(since)
+    results: Dict[str, List[Dict]] = {}
+    pending = []
+    for c in countries:
+        cached = None
+        if use_cache and not incremental:
+            cached = _news._lookup_cache(_news._cache_key(c, page_size), c, page_size, key)
+        if cached is not None:
+            results[c] = cached
+        else:
+            pending.append(c)
+
+    for batch in plan_batches(pending, countries_per_query):
+        batch_page_size = min(NEWSAPI_MAX_PAGE_SIZE, page_size * len(batch))
+        # a country without a watermark needs the full window, so no `from`
+        batch_since = min(since[c] for c in batch) if all(c in since for c in batch) else None
+        try:
+            articles = _news._request_articles(build_query(batch), batch_page_size, key, batch_since)
+        except Exception as e:
+            # don't cache failures or retry country by country against a failing API
+            print(f"❌ Error fetching batched news for {batch}: {e}")
+            continue
+
+        saturated = len(articles) >= batch_page_size
+        # in incremental mode filter by each country's watermark before capping
+        cap = len(articles) if incremental else page_size
+        for c, matched in demux_articles(articles, batch, cap).items():
+            if not matched and saturated:
+                results[c] = _news.fetch_news_for_country(
+                    c, page_size=page_size, api_key=key, use_cache=False, since=since.get(c)
+                )
+                continue
+            if incremental:
+                results[c] = _news._copy_articles(_news.newer_than(matched, since.get(c))[:page_size])
+                continue
+            _news.NEWS_CACHE.set(_news._cache_key(c, page_size), matched)
+            results[c] = _news._copy_articles(matched)
+
+    return {c: results.get(c, []) for c in countries}
@@ -13,6 +13,9 @@ Usage examples:
   # specify countries and output file
   python backend/src/data_ingestion/build_dataset.py --countries IN,US,CN --out ../data/dataset.csv --pagesize 10
 
+  # replay/backfill from the local article store without network calls
+  python backend/src/data_ingestion/build_dataset.py --offline
+
 Notes:
 - Relies on your fetch_news_for_country() and compute_risk_from_news() helpers.
 - If external APIs (weather, port) are not configured, the script uses safe mock values.
@@ -27,18 +30,18 @@ from typing import List, Dict, Any
 # Import existing project helpers
 try:
     from src.data_ingestion.fetch_news import fetch_news_for_country
-    from src.ml_models.risk_predictor import compute_risk_from_news
+    from src.data_ingestion.batch_query import fetch_news_batched, DEFAULT_COUNTRIES_PER_QUERY
+    from src.data_ingestion.article_store import get_article_store
+    from src.ml_models.risk_predictor import compute_risk_from_news, compute_risk_from_news_batch
 except Exception:
     # fallback for alternative import path if running from different cwd
     from src.data_ingestion.fetch_news import fetch_news_for_country
-    from src.ml_models.risk_predictor import compute_risk_from_news
+    from src.data_ingestion.batch_query import fetch_news_batched, DEFAULT_COUNTRIES_PER_QUERY
+    from src.data_ingestion.article_store import get_article_store
+    from src.ml_models.risk_predictor import compute_risk_from_news, compute_risk_from_news_batch
 
-# light NLP helper
-try:
-    from textblob import TextBlob
-    TEXTBLOB_AVAILABLE = True
-except Exception:
-    TEXTBLOB_AVAILABLE = False
+from src.utils.keyword_matcher import KeywordMatcher
+from src.ml_models.text_features import TextFeatureEngine
 
 # Optional: OpenWeatherMap (if you add key to .env)
 import os
@@ -52,6 +55,16 @@ OUT_DIR_DEFAULT = os.path.normpath(OUT_DIR_DEFAULT)
 DEFAULT_OUT = os.path.join(OUT_DIR_DEFAULT, "dataset.csv")
 
 
+# keyword list and scoring (matches your risk keywords); +10 per keyword present
+FEATURE_KEYWORDS = [
+    "strike", "delay", "congestion", "shortage", "conflict",
+    "sanction", "flood", "earthquake", "shutdown", "protest", "blockade", "virus", "pandemic"
+]
+FEATURE_MATCHER = KeywordMatcher.uniform(FEATURE_KEYWORDS, 10)
+# sentiment + keyword features, cached per article; empty text -> 10.0 like before
+FEATURE_ENGINE = TextFeatureEngine(FEATURE_MATCHER, empty_negative_pct=10.0)
+
+
 # --- helpers ---------------------------------------------------------------
 def extract_text_features(articles: List[Dict[str, Any]]):
     """
@@ -66,31 +79,12 @@ def extract_text_features(articles: List[Dict[str, Any]]):
         combined_texts.append(t.strip())
 
     bigtext = " ".join(combined_texts)
-    # sentiment (TextBlob) fallback to small negative default if not installed
-    if TEXTBLOB_AVAILABLE and bigtext.strip():
-        try:
-            polarity = TextBlob(bigtext).sentiment.polarity  # -1..1
-            news_negative_pct = max(0.0, -polarity * 100)  # convert negative polarity to percent
-        except Exception:
-            news_negative_pct = 10.0
-    else:
-        # heuristic fallback: if keywords present, increase negativity
-        news_negative_pct = 10.0
-
-    # keyword list and scoring (matches your risk keywords)
-    keywords = [
-        "strike", "delay", "congestion", "shortage", "conflict",
-        "sanction", "flood", "earthquake", "shutdown", "protest", "blockade", "virus", "pandemic"
-    ]
-    kw_score = 0
-    text_lower = bigtext.lower()
-    for kw in keywords:
-        if kw in text_lower:
-            kw_score += 10
+    # same values as TextBlob / keyword matching over bigtext (10.0 if TextBlob is missing)
+    feats = FEATURE_ENGINE.features(articles)
 
     return {
-        "news_negative_pct": round(float(news_negative_pct), 3),
-        "keyword_score": int(kw_score),
+        "news_negative_pct": round(float(feats["news_negative_pct"]), 3),
+        "keyword_score": int(feats["keyword_score"]),
         "combined_text": bigtext[:10000]  # store truncated text for debug if needed
     }
 
@@ -122,15 +116,18 @@ def fetch_port_delay_index(country: str):
     return round(max(0, random.gauss(base, 12)), 3)
 
 
-def build_row_for_country(country: str, page_size: int = 10):
+def build_row_for_country(country: str, page_size: int = 10, articles: List[Dict[str, Any]] = None,
+                          heuristic: Dict[str, Any] = None):
     """
     Build one aggregated row for the given country:
-    - fetch recent news
+    - fetch recent news (unless `articles` were already fetched by the caller)
     - compute text features
     - fetch simple external signals or fallback
-    - compute label using compute_risk_from_news(articles) heuristic
+    - compute label using compute_risk_from_news(articles) heuristic (or the
+      precomputed batch result passed as `heuristic`)
     """
-    articles = fetch_news_for_country(country, page_size=page_size)
+    if articles is None:
+        articles = fetch_news_for_country(country, page_size=page_size)
     if articles is None:
         articles = []
 
@@ -144,7 +141,8 @@ def build_row_for_country(country: str, page_size: int = 10):
     hist_delay = round(max(0, port_delay_index * random.uniform(0.6, 1.2)), 3)
 
     # use your heuristic to create the weak-supervised label
-    heuristic = compute_risk_from_news(articles) if len(articles) > 0 else {"risk_score": 10.0}
+    if heuristic is None or len(articles) == 0:
+        heuristic = compute_risk_from_news(articles) if len(articles) > 0 else {"risk_score": 10.0}
     label = float(heuristic.get("risk_score", 10.0))
 
     row = {
@@ -163,7 +161,26 @@ def build_row_for_country(country: str, page_size: int = 10):
 
 
 # --- main ETL flow ---------------------------------------------------------
-def build_dataset(countries: List[str], pagesize: int = 10, out_path: str = DEFAULT_OUT, pause_seconds: float = 1.0):
+def load_articles(countries: List[str], pagesize: int = 10, offline: bool = False,
+                  countries_per_query: int = DEFAULT_COUNTRIES_PER_QUERY) -> Dict[str, List[Dict[str, Any]]]:
+    """
+    Articles per country. Online: fetch with batched, rate-limited NewsAPI
+    queries and persist to the article store. Offline: read the newest
+    `pagesize` stored articles.
+    """
+    store = get_article_store()
+    if offline:
+        return {c: store.articles_for_country(c, limit=pagesize) for c in countries}
+
+    articles_by_country = fetch_news_batched(countries, page_size=pagesize, countries_per_query=countries_per_query)
+    for c, articles in articles_by_country.items():
+        new = store.add_many(articles, country=c)
+        print(f"[=] {c}: {len(articles)} fetched, {len(new)} new in article store")
+    return articles_by_country
+
+
+def build_dataset(countries: List[str], pagesize: int = 10, out_path: str = DEFAULT_OUT, offline: bool = False,
+                  countries_per_query: int = DEFAULT_COUNTRIES_PER_QUERY):
     os.makedirs(os.path.dirname(out_path), exist_ok=True)
     fieldnames = [
         "ts", "country", "news_negative_pct", "keyword_score", "weather_risk",
@@ -174,6 +191,12 @@ def build_dataset(countries: List[str], pagesize: int = 10, out_path: str = DEFA
     append = os.path.exists(out_path)
     mode = "a" if append else "w"
     written = 0
+    # fetch news for all countries up front (or replay from the store);
+    # request pacing is handled by the NewsAPI token bucket
+    articles_by_country = load_articles(countries, pagesize=pagesize, offline=offline,
+                                        countries_per_query=countries_per_query)
+    # weak-supervision labels for every country in one vectorized pass
+    heuristics = compute_risk_from_news_batch({c: articles_by_country.get(c) or [] for c in countries})
     with open(out_path, mode, newline="", encoding="utf-8") as f:
         writer = csv.DictWriter(f, fieldnames=fieldnames)
         if not append:
@@ -181,7 +204,8 @@ def build_dataset(countries: List[str], pagesize: int = 10, out_path: str = DEFA
 
         for c in countries:
             try:
-                row = build_row_for_country(c, page_size=pagesize)
+                row = build_row_for_country(c, page_size=pagesize, articles=articles_by_country.get(c),
+                                            heuristic=heuristics.get(c))
                 row["ts"] = time.strftime("%Y-%m-%dT%H:%M:%S")
                 # ensure all fields present
                 writer.writerow({k: row.get(k, "") for k in fieldnames})
@@ -189,7 +213,6 @@ def build_dataset(countries: List[str], pagesize: int = 10, out_path: str = DEFA
                 print(f"[+] written row for {c}: risk={row['risk_score']}, n_articles={row['n_articles']}")
             except Exception as e:
                 print(f"[!] failed for {c}: {e}")
-            time.sleep(pause_seconds)
 
     print(f"Dataset build complete. {written} rows written to {out_path}")
     return out_path
@@ -202,7 +225,9 @@ def parse_args():
                    help="Comma-separated list of country codes (ISO2 or custom names).")
     p.add_argument("--pagesize", type=int, default=8, help="How many news articles to fetch per country.")
     p.add_argument("--out", type=str, default=DEFAULT_OUT, help="Output CSV path.")
-    p.add_argument("--pause", type=float, default=1.0, help="Seconds to pause between API calls to avoid rate limits.")
+    p.add_argument("--batch", type=int, default=DEFAULT_COUNTRIES_PER_QUERY,
+                   help="Countries combined into one NewsAPI query (rate limits via NEWSAPI_RATE_PER_SEC).")
+    p.add_argument("--offline", action="store_true", help="Read articles from the local article store instead of NewsAPI.")
     return p.parse_args()
 
 
@@ -212,4 +237,5 @@ if __name__ == "__main__":
     out = os.path.abspath(args.out)
     print("Building dataset for countries:", countries)
     print("Saving to:", out)
-    build_dataset(countries, pagesize=args.pagesize, out_path=out, pause_seconds=args.pause)
+    build_dataset(countries, pagesize=args.pagesize, out_path=out, offline=args.offline,
+                  countries_per_query=args.batch)
@@ -1,70 +1,118 @@
 # backend/src/data_ingestion/fetch_news.py
 
 import os
+import json
+import threading
 import requests
+from requests.adapters import HTTPAdapter
 from typing import List, Dict
 from dotenv import load_dotenv
 
+from src.data_ingestion.news_cache import TTLLRUCache, STALE
+from src.utils.rate_limit import TokenBucket
+
 # Load variables from .env
 load_dotenv()
 
-NEWSAPI_URL = "https://newsapi.org/v2/everything"
+# Point NEWSAPI_URL at the local stand-in (newsapi_standin.py) for offline runs
+NEWSAPI_URL = os.getenv("NEWSAPI_URL", "https://newsapi.org/v2/everything")
 NEWSAPI_KEY = os.getenv("NEWSAPI_KEY")  # now correctly loaded
+# When set, every raw NewsAPI response is appended to this JSON-lines corpus
+NEWSAPI_RECORD_PATH = os.getenv("NEWSAPI_RECORD_PATH")
 
+REQUEST_TIMEOUT = 10
+# Connection pool size of the shared session
+MAX_CONCURRENCY = int(os.getenv("NEWSAPI_MAX_CONCURRENCY", "16"))
 
-def fetch_news_for_country(country: str, page_size: int = 10, api_key: str = None) -> List[Dict]:
-    """
-    Fetch recent news articles for a country.
-    Uses NewsAPI if API key exists, otherwise returns mocked sample data.
-    """
+# All NewsAPI requests (single-country and batched) draw from one token bucket
+NEWSAPI_RATE_LIMITER = TokenBucket(
+    rate=float(os.getenv("NEWSAPI_RATE_PER_SEC", "5")),
+    capacity=float(os.getenv("NEWSAPI_BURST", "20")),
+)
 
-    # If caller passed custom key, override default
-    key = api_key or NEWSAPI_KEY
+# Shared keep-alive pool: one requests.Session for every caller
+_session = None
+_session_lock = threading.Lock()
+_record_lock = threading.Lock()
 
-    # No API key → return mock data
-    if not key:
-        print("⚠️ NEWSAPI_KEY missing — using mock data.")
-        return [
-            {
-                "title": f"Port congestion rising in {country}",
-                "description": "Ships experiencing delays.",
-                "source": "MockNews",
-                "published_at": None,
-                "url": None
-            },
-            {
-                "title": f"Strike at major {country} seaport disrupts shipments",
-                "description": "Workers halt operations for 48 hours.",
-                "source": "MockNews",
-                "published_at": None,
-                "url": None
-            },
-            {
-                "title": f"{country} trade deal eases shipping bottlenecks",
-                "description": "New policy expected to reduce delays.",
-                "source": "MockNews",
-                "published_at": None,
-                "url": None
-            }
-        ]
-
-    # Real API call
+# In-process article cache keyed on (normalized country, page size)
+NEWS_CACHE = TTLLRUCache(
+    max_entries=int(os.getenv("NEWS_CACHE_MAX_ENTRIES", "256")),
+    ttl=float(os.getenv("NEWS_CACHE_TTL_SECONDS", "300")),
+    stale_ttl=float(os.getenv("NEWS_CACHE_STALE_SECONDS", "1800")),
+)
+
+
+def _get_session() -> requests.Session:
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                session = requests.Session()
+                adapter = HTTPAdapter(
+                    pool_connections=MAX_CONCURRENCY, pool_maxsize=MAX_CONCURRENCY
+                )
+                session.mount("https://", adapter)
+                session.mount("http://", adapter)
+                _session = session
+    return _session
+
+
+def _mock_articles(country: str) -> List[Dict]:
+    return [
+        {
+            "title": f"Port congestion rising in {country}",
+            "description": "Ships experiencing delays.",
+            "source": "MockNews",
+            "published_at": None,
+            "url": None
+        },
+        {
+            "title": f"Strike at major {country} seaport disrupts shipments",
+            "description": "Workers halt operations for 48 hours.",
+            "source": "MockNews",
+            "published_at": None,
+            "url": None
+        },
+        {
+            "title": f"{country} trade deal eases shipping bottlenecks",
+            "description": "New policy expected to reduce delays.",
+            "source": "MockNews",
+            "published_at": None,
+            "url": None
+        }
+    ]
+
+
+def _build_params(query: str, page_size: int, key: str, since: str = None) -> Dict:
     params = {
-        "q": country,
+        "q": query,
         "pageSize": page_size,
         "sortBy": "publishedAt",
         "language": "en",
         "apiKey": key,
     }
+    if since:
+        params["from"] = since
+    return params
 
+
+def _record_response(params: Dict, data: Dict):
+    """Append a raw response to the record corpus (no-op unless configured)."""
+    if not NEWSAPI_RECORD_PATH:
+        return
+    entry = {
+        "params": {k: v for k, v in params.items() if k != "apiKey"},
+        "response": data,
+    }
     try:
-        resp = requests.get(NEWSAPI_URL, params=params, timeout=10)
-        resp.raise_for_status()
-        data = resp.json()
+        with _record_lock, open(NEWSAPI_RECORD_PATH, "a", encoding="utf-8") as f:
+            f.write(json.dumps(entry, ensure_ascii=False) + "\n")
     except Exception as e:
-        print(f"❌ Error fetching news: {e}")
-        return []
+        print(f"⚠️ Failed to record NewsAPI response: {e}")
 
+
+def _parse_articles(data: Dict) -> List[Dict]:
     articles = []
     for a in data.get("articles", []):
         articles.append({
@@ -74,5 +122,106 @@ def fetch_news_for_country(country: str, page_size: int = 10, api_key: str = Non
             "published_at": a.get("publishedAt"),
             "url": a.get("url"),
         })
-
     return articles
+
+
+def _request_articles(query: str, page_size: int, key: str, since: str = None) -> List[Dict]:
+    # Real API call over the shared keep-alive session; raises on failure
+    NEWSAPI_RATE_LIMITER.acquire()
+    params = _build_params(query, page_size, key, since)
+    resp = _get_session().get(NEWSAPI_URL, params=params, timeout=REQUEST_TIMEOUT)
+    resp.raise_for_status()
+    data = resp.json()
+    _record_response(params, data)
+    return _parse_articles(data)
+
+
+def newer_than(articles: List[Dict], since: str = None) -> List[Dict]:
+    """Articles published strictly after `since` (NewsAPI's `from` is inclusive)."""
+    if not since:
+        return articles
+    return [a for a in articles if (a.get("published_at") or "") > since]
+
+
+def latest_published_at(articles: List[Dict]):
+    return max((a.get("published_at") for a in articles if a.get("published_at")), default=None)
+
+
+def _cache_key(country: str, page_size: int):
+    return (" ".join(country.split()).lower(), int(page_size))
+
+
+def _copy_articles(articles: List[Dict]) -> List[Dict]:
+    # callers may mutate what they get back; never hand out cached dicts
+    return [dict(a) for a in articles]
+
+
+def _refresh_in_background(cache_key, country: str, page_size: int, key: str):
+    if not NEWS_CACHE.begin_refresh(cache_key):
+        return
+
+    def _run():
+        try:
+            NEWS_CACHE.set(cache_key, _request_articles(country, page_size, key))
+        except Exception as e:
+            print(f"❌ Background news refresh failed for {country}: {e}")
+        finally:
+            NEWS_CACHE.end_refresh(cache_key)
+
+    threading.Thread(target=_run, name=f"news-refresh-{country}", daemon=True).start()
+
+
+def _lookup_cache(cache_key, country: str, page_size: int, key: str):
+    """Return cached articles (refreshing stale ones in the background) or None."""
+    cached, state = NEWS_CACHE.get(cache_key)
+    if cached is None:
+        return None
+    if state == STALE:
+        _refresh_in_background(cache_key, country, page_size, key)
+    return _copy_articles(cached)
+
+
+def get_news_cache_stats() -> Dict:
+    return NEWS_CACHE.stats()
+
+
+def fetch_news_for_country(country: str, page_size: int = 10, api_key: str = None, use_cache: bool = True,
+                           since: str = None) -> List[Dict]:
+    """
+    Fetch recent news articles for a country.
+    Uses NewsAPI if API key exists, otherwise returns mocked sample data.
+    Responses are served from NEWS_CACHE when available; pass use_cache=False
+    to force a network fetch (the result still refreshes the cache).
+    With `since` (an ISO published_at watermark) only newer articles are
+    requested and returned; such incremental fetches bypass the cache.
+    """
+
+    # If caller passed custom key, override default
+    key = api_key or NEWSAPI_KEY
+
+    # No API key → return mock data
+    if not key:
+        print("⚠️ NEWSAPI_KEY missing — using mock data.")
+        return _mock_articles(country)
+
+    if since:
+        try:
+            return newer_than(_request_articles(country, page_size, key, since), since)
+        except Exception as e:
+            print(f"❌ Error fetching news: {e}")
+            return []
+
+    cache_key = _cache_key(country, page_size)
+    if use_cache:
+        cached = _lookup_cache(cache_key, country, page_size, key)
+        if cached is not None:
+            return cached
+
+    try:
+        articles = _request_articles(country, page_size, key)
+    except Exception as e:
+        print(f"❌ Error fetching news: {e}")
+        return []
+
+    NEWS_CACHE.set(cache_key, articles)
+    return _copy_articles(articles)
@@ -0,0 +1,99 @@
+# backend/src/data_ingestion/news_cache.py
+
+import time
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional, Tuple
+
+FRESH = "fresh"
+STALE = "stale"
+
+
+class TTLLRUCache:
+    """
+    Bounded in-process cache with per-entry TTL and LRU eviction.
+
+    Entries younger than `ttl` are fresh. Entries between `ttl` and
+    `ttl + stale_ttl` are still returned (marked stale) so the caller can
+    serve them immediately and refresh in the background. Anything older
+    is dropped and counted as a miss.
+    """
+
+    def __init__(self, max_entries: int = 256, ttl: float = 300.0, stale_ttl: float = 1800.0):
+        self.max_entries = max(1, int(max_entries))
+        self.ttl = float(ttl)
+        self.stale_ttl = float(stale_ttl)
+        self._data: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+        self._refreshing = set()
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._stale_hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._expirations = 0
+
+    def get(self, key: Hashable) -> Tuple[Optional[Any], Optional[str]]:
+        """Return (value, FRESH|STALE) or (None, None) on a miss."""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self._misses += 1
+                return None, None
+
+            stored_at, value = entry
+            age = now - stored_at
+            if age <= self.ttl:
+                self._data.move_to_end(key)
+                self._hits += 1
+                return value, FRESH
+            if age <= self.ttl + self.stale_ttl:
+                self._data.move_to_end(key)
+                self._stale_hits += 1
+                return value, STALE
+
+            del self._data[key]
+            self._expirations += 1
+            self._misses += 1
+            return None, None
+
+    def set(self, key: Hashable, value: Any):
+        with self._lock:
+            self._data[key] = (time.monotonic(), value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+                self._evictions += 1
+
+    def begin_refresh(self, key: Hashable) -> bool:
+        """Claim the background refresh for `key`; False if one is already running."""
+        with self._lock:
+            if key in self._refreshing:
+                return False
+            self._refreshing.add(key)
+            return True
+
+    def end_refresh(self, key: Hashable):
+        with self._lock:
+            self._refreshing.discard(key)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self._hits + self._stale_hits + self._misses
+            return {
+                "entries": len(self._data),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl,
+                "stale_ttl_seconds": self.stale_ttl,
+                "hits": self._hits,
+                "stale_hits": self._stale_hits,
+                "misses": self._misses,
+                "evictions": self._evictions,
+                "expirations": self._expirations,
+                "refreshing": len(self._refreshing),
+                "hit_rate": round((self._hits + self._stale_hits) / lookups, 4) if lookups else 0.0,
+            }
@@ -0,0 +1,171 @@
+"""
+backend/src/data_ingestion/newsapi_standin.py
+
+Local NewsAPI stand-in that replays a recorded corpus, for load tests and
+offline benchmarks.
+
+Record a corpus by running anything that fetches news with
+NEWSAPI_RECORD_PATH set, e.g.:
+  NEWSAPI_RECORD_PATH=data/newsapi_corpus.jsonl python -m src.data_ingestion.build_dataset
+
+Replay it:
+  python -m src.data_ingestion.newsapi_standin --corpus data/newsapi_corpus.jsonl \
+      --port 8900 --latency-ms 80 --latency-sigma 0.6 --error-rate 0.02
+
+Then point the ingestion code at it (any non-empty key works):
+  NEWSAPI_URL=http://127.0.0.1:8900/v2/everything NEWSAPI_KEY=standin uvicorn main:app
+"""
+import json
+import math
+import time
+import random
+import argparse
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from typing import Dict, List
+from urllib.parse import urlparse, parse_qs
+
+
+def _norm(q: str) -> str:
+    return " ".join((q or "").replace('"', " ").split()).lower()
+
+
+class Corpus:
+    """Recorded responses indexed by normalized query, plus a flat article pool."""
+
+    def __init__(self, path: str):
+        self.by_query: Dict[str, List[Dict]] = {}
+        self.articles: List[Dict] = []
+        seen = set()
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                entry = json.loads(line)
+                q = _norm((entry.get("params") or {}).get("q"))
+                articles = (entry.get("response") or {}).get("articles", [])
+                self.by_query.setdefault(q, [])
+                for a in articles:
+                    ident = a.get("url") or (a.get("title"), a.get("publishedAt"))
+                    if ident in seen:
+                        continue
+                    seen.add(ident)
+                    self.by_query[q].append(a)
+                    self.articles.append(a)
+
+    def search(self, q: str) -> List[Dict]:
+        """Recorded articles for `q`; OR queries are answered term by term."""
+        terms = [_norm(t) for t in q.split(" OR ")] if " OR " in q else [_norm(q)]
+        found, seen = [], set()
+        for term in terms:
+            hits = self.by_query.get(term)
+            if hits is None:
+                # never recorded on its own: fall back to a text match over the pool
+                hits = [a for a in self.articles
+                        if term in f"{a.get('title') or ''} {a.get('description') or ''}".lower()]
+            for a in hits:
+                ident = a.get("url") or (a.get("title"), a.get("publishedAt"))
+                if ident not in seen:
+                    seen.add(ident)
+                    found.append(a)
+        found.sort(key=lambda a: a.get("publishedAt") or "", reverse=True)
+        return found
+
+
+class StandInHandler(BaseHTTPRequestHandler):
+    server_version = "NewsAPIStandIn/1.0"
+
+    def _send(self, status: int, body: Dict):
+        data = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        srv = self.server
+        url = urlparse(self.path)
+        if url.path.rstrip("/") != "/v2/everything":
+            return self._send(404, {"status": "error", "code": "notFound"})
+
+        params = {k: v[-1] for k, v in parse_qs(url.query).items()}
+        with srv.rng_lock:
+            latency = srv.sample_latency()
+            fail = srv.rng.random() < srv.opts.error_rate
+            error_code = srv.rng.choice(srv.error_codes) if fail else None
+            fill = srv.rng.uniform(srv.opts.fill_min, srv.opts.fill_max)
+
+        if latency > 0:
+            time.sleep(latency)
+        if fail:
+            return self._send(error_code, {"status": "error", "code": "standInInjectedError"})
+
+        articles = srv.corpus.search(params.get("q", ""))
+        since = params.get("from")
+        if since:
+            articles = [a for a in articles if (a.get("publishedAt") or "") >= since]
+        page_size = min(100, int(params.get("pageSize", 100) or 100))
+        limit = max(0, min(page_size, int(round(page_size * fill))))
+        self._send(200, {"status": "ok", "totalResults": len(articles), "articles": articles[:limit]})
+
+    def log_message(self, fmt, *args):
+        if self.server.opts.verbose:
+            super().log_message(fmt, *args)
+
+
+class StandInServer(ThreadingHTTPServer):
+    daemon_threads = True
+    # the default backlog of 5 turns concurrent load into SYN-retry stalls
+    request_queue_size = 256
+
+    def __init__(self, opts, corpus: Corpus):
+        super().__init__((opts.host, opts.port), StandInHandler)
+        self.opts = opts
+        self.corpus = corpus
+        self.error_codes = [int(c) for c in str(opts.error_codes).split(",") if c.strip()] or [500]
+        self.rng = random.Random(opts.seed)
+        self.rng_lock = threading.Lock()
+
+    def sample_latency(self) -> float:
+        # lognormal with the configured median, so tails are realistic
+        if self.opts.latency_ms <= 0:
+            return 0.0
+        mu = math.log(self.opts.latency_ms / 1000.0)
+        return self.rng.lognormvariate(mu, self.opts.latency_sigma)
+
+
+def parse_args(argv=None):
+    p = argparse.ArgumentParser(description="Replay recorded NewsAPI responses locally.")
+    p.add_argument("--corpus", required=True, help="JSON-lines corpus written via NEWSAPI_RECORD_PATH.")
+    p.add_argument("--host", default="127.0.0.1")
+    p.add_argument("--port", type=int, default=8900)
+    p.add_argument("--latency-ms", type=float, default=50.0, help="Median response latency (0 disables).")
+    p.add_argument("--latency-sigma", type=float, default=0.5, help="Lognormal shape; larger = heavier tail.")
+    p.add_argument("--error-rate", type=float, default=0.0, help="Fraction of requests answered with an error.")
+    p.add_argument("--error-codes", default="429,500", help="Comma-separated HTTP codes used for injected errors.")
+    p.add_argument("--fill-min", type=float, default=1.0, help="Min fraction of pageSize to return.")
+    p.add_argument("--fill-max", type=float, default=1.0, help="Max fraction of pageSize to return.")
+    p.add_argument("--seed", type=int, default=42)
+    p.add_argument("--verbose", action="store_true")
+    return p.parse_args(argv)
+
+
+def serve(opts) -> StandInServer:
+    """Start the stand-in on a background thread and return the server."""
+    server = StandInServer(opts, Corpus(opts.corpus))
+    threading.Thread(target=server.serve_forever, name="newsapi-standin", daemon=True).start()
+    return server
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    corpus = Corpus(args.corpus)
+    server = StandInServer(args, corpus)
+    print(f"NewsAPI stand-in: {len(corpus.articles)} articles / {len(corpus.by_query)} queries "
+          f"on http://{args.host}:{args.port}/v2/everything")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,140 @@
+# backend/src/ml_models/embedder.py
+"""
+Lazily loaded SentenceTransformer.
+
+Importing sentence_transformers pulls in torch and loading the model costs
+seconds and a few hundred MB, so nothing happens until the first get() (or an
+explicit warmup()). Workers that never embed stay small and start fast.
+
+  EMBEDDER_IDLE_UNLOAD_SECONDS  unload after this long without use (0 = never)
+"""
+import os
+import time
+import threading
+
+DEFAULT_EMBED_MODEL_NAME = "all-MiniLM-L6-v2"
+
+
+class LazyEmbedder:
+    def __init__(self, model_name: str = DEFAULT_EMBED_MODEL_NAME, idle_unload_seconds: float = 0):
+        self.model_name = model_name
+        self.idle_unload_seconds = idle_unload_seconds
+        self._model = None
+        self._failed = False
+        self._lock = threading.Lock()
+        self._last_used = 0.0
+        self._watcher = None
+        self.loads = 0
+        self.unloads = 0
+
+    @property
+    def loaded(self) -> bool:
+        return self._model is not None
+
+    def _load(self):
+        from sentence_transformers import SentenceTransformer
+        start = time.perf_counter()
+        model = SentenceTransformer(self.model_name)
+        print(f"Embedder {self.model_name} loaded in {time.perf_counter() - start:.2f}s")
+        return model
+
+    def get(self):
+        """The model, loading it on first use; None if it can't be loaded."""
+        model = self._model
+        if model is None:
+            with self._lock:
+                model = self._model
+                if model is None and not self._failed:
+                    try:
+                        model = self._load()
+                    except Exception as e:
+                        # don't retry on every call; reset() allows another attempt
+                        print("⚠️ Embedder unavailable:", e)
+                        self._failed = True
+                        return None
+                    self._model = model
+                    self.loads += 1
+                    self._start_watcher()
+        self._last_used = time.monotonic()
+        return model
+
+    def encode(self, texts, **kwargs):
+        model = self.get()
+        if model is None:
+            raise RuntimeError(f"Embedder {self.model_name} is not available")
+        return model.encode(texts, **kwargs)
+
+    def warmup(self, background: bool = True):
+        """Load (and run one tiny encode) now, by default on a daemon thread."""
+        def _run():
+            model = self.get()
+            if model is not None:
+                model.encode(["warmup"])
+        if not background:
+            _run()
+            return None
+        t = threading.Thread(target=_run, name="embedder-warmup", daemon=True)
+        t.start()
+        return t
+
+    def unload(self):
+        """Drop the model; in-flight encodes keep their own reference."""
+        with self._lock:
+            if self._model is not None:
+                self._model = None
+                self.unloads += 1
+                print(f"Embedder {self.model_name} unloaded")
+
+    def unload_if_idle(self) -> bool:
+        if not self.idle_unload_seconds or self._model is None:
+            return False
+        if time.monotonic() - self._last_used < self.idle_unload_seconds:
+            return False
+        self.unload()
+        return True
+
+    def reset(self):
+        with self._lock:
+            self._failed = False
+
+    def _start_watcher(self):
+        # called with the lock held
+        if not self.idle_unload_seconds or (self._watcher and self._watcher.is_alive()):
+            return
+        self._watcher = threading.Thread(target=self._watch, name="embedder-idle", daemon=True)
+        self._watcher.start()
+
+    def _watch(self):
+        interval = max(1.0, self.idle_unload_seconds / 4.0)
+        while self._model is not None:
+            time.sleep(interval)
+            if self.unload_if_idle():
+                return
+
+    def stats(self) -> dict:
+        idle = time.monotonic() - self._last_used if self._last_used else None
+        return {
+            "model": self.model_name,
+            "loaded": self.loaded,
+            "loads": self.loads,
+            "unloads": self.unloads,
+            "idle_seconds": round(idle, 1) if idle is not None else None,
+            "idle_unload_seconds": self.idle_unload_seconds,
+        }
+
+
+_embedder = None
+_embedder_lock = threading.Lock()
+
+
+def get_lazy_embedder(model_name: str = None) -> LazyEmbedder:
+    """Process-wide LazyEmbedder; the first caller's model_name wins."""
+    global _embedder
+    if _embedder is None:
+        with _embedder_lock:
+            if _embedder is None:
+                _embedder = LazyEmbedder(
+                    model_name or DEFAULT_EMBED_MODEL_NAME,
+                    idle_unload_seconds=float(os.getenv("EMBEDDER_IDLE_UNLOAD_SECONDS", "0")),
+                )
+    return _embedder
@@ -0,0 +1,217 @@
+# backend/src/ml_models/embedding_cache.py
+"""
+Persistent embedding cache shared by training and inference.
+
+Layout (under EMBEDDING_CACHE_DIR/<embedder name>/):
+  meta.json    - {"model": name, "dim": d}
+  vectors.f32  - append-only float32 matrix, one row of `dim` values per text
+  vectors.idx  - append-only index; one "<text hash> <row>" line per vector
+
+Rows are keyed by a sha1 of the exact text, and each embedder gets its own
+directory, so switching models never mixes vectors. Reads go through a
+read-only np.memmap of the matrix, so every worker on the host shares one
+copy in the page cache; the index is tailed on demand like the article
+store, so rows appended by another process (a training run) become visible.
+"""
+import os
+import json
+import hashlib
+import threading
+from typing import Callable, Dict, List, Optional, Sequence
+
+import numpy as np
+
+try:
+    import fcntl  # POSIX only; used to serialize appends across processes
+except ImportError:
+    fcntl = None
+
+DATA_DIR = os.path.normpath(os.path.join(os.path.dirname(__file__), "..", "..", "data"))
+EMBEDDING_CACHE_DIR = os.getenv("EMBEDDING_CACHE_DIR", os.path.join(DATA_DIR, "embedding_cache"))
+
+META_FILE = "meta.json"
+VECTORS_FILE = "vectors.f32"
+INDEX_FILE = "vectors.idx"
+ROW_DTYPE = np.float32
+
+
+def text_hash(text: str) -> str:
+    return hashlib.sha1((text or "").encode("utf-8")).hexdigest()
+
+
+def _safe_name(model_name: str) -> str:
+    return "".join(ch if ch.isalnum() or ch in "-_." else "_" for ch in model_name)
+
+
+class EmbeddingCache:
+    def __init__(self, model_name: str, root: str = EMBEDDING_CACHE_DIR):
+        self.model_name = model_name
+        self.root = os.path.join(root, _safe_name(model_name))
+        os.makedirs(self.root, exist_ok=True)
+        self._meta_path = os.path.join(self.root, META_FILE)
+        self._vec_path = os.path.join(self.root, VECTORS_FILE)
+        self._idx_path = os.path.join(self.root, INDEX_FILE)
+        for path in (self._vec_path, self._idx_path):
+            open(path, "ab").close()
+
+        self._lock = threading.RLock()
+        self._rows: Dict[str, int] = {}   # text hash -> row
+        self._n_rows = 0                  # rows covered by the index (max row + 1)
+        self._idx_pos = 0
+        self.dim: Optional[int] = None
+        self._matrix: Optional[np.memmap] = None
+        self.hits = 0
+        self.misses = 0
+        self._catch_up()
+
+    # ---- index ----------------------------------------------------------
+    def _load_meta(self):
+        if self.dim is None and os.path.exists(self._meta_path):
+            with open(self._meta_path) as f:
+                self.dim = int(json.load(f)["dim"])
+
+    def _catch_up(self):
+        """Load index lines appended since the last call (by us or others)."""
+        self._load_meta()
+        if self.dim is None:
+            return
+        visible_rows = self._file_rows()
+        with open(self._idx_path, "rb") as f:
+            f.seek(self._idx_pos)
+            for line in f:
+                if not line.endswith(b"\n"):
+                    break  # partially written line; retry next time
+                h, row = line.split()
+                row = int(row)
+                if row >= visible_rows:
+                    break  # vector write not visible yet
+                self._idx_pos += len(line)
+                self._rows.setdefault(h.decode("ascii"), row)
+                self._n_rows = max(self._n_rows, row + 1)
+
+    def _file_rows(self) -> int:
+        return os.path.getsize(self._vec_path) // (self.dim * ROW_DTYPE().itemsize)
+
+    # ---- reads ----------------------------------------------------------
+    def _view(self) -> np.ndarray:
+        if self._matrix is None or len(self._matrix) < self._n_rows:
+            self._matrix = np.memmap(self._vec_path, dtype=ROW_DTYPE, mode="r",
+                                     shape=(self._n_rows, self.dim))
+        return self._matrix
+
+    def lookup(self, hashes: Sequence[str]) -> List[Optional[int]]:
+        """Row number for each hash, or None when it isn't cached."""
+        with self._lock:
+            if any(h not in self._rows for h in hashes):
+                self._catch_up()
+            return [self._rows.get(h) for h in hashes]
+
+    def rows(self, row_ids: Sequence[int]) -> np.ndarray:
+        with self._lock:
+            if not len(row_ids):
+                return np.zeros((0, self.dim or 0), dtype=ROW_DTYPE)
+            return np.asarray(self._view()[np.asarray(row_ids, dtype=np.int64)])
+
+    def __len__(self):
+        with self._lock:
+            self._catch_up()
+            return len(self._rows)
+
+    # ---- writes ---------------------------------------------------------
+    def add_many(self, hashes: Sequence[str], vectors: np.ndarray) -> int:
+        """Append vectors for hashes not cached yet; returns how many were added."""
+        vectors = np.ascontiguousarray(vectors, dtype=ROW_DTYPE)
+        if vectors.ndim != 2 or len(vectors) != len(hashes):
+            raise ValueError("vectors must be a (len(hashes), dim) matrix")
+        added = 0
+        with self._lock, open(self._vec_path, "ab") as vec, open(self._idx_path, "ab") as idx:
+            if fcntl is not None:
+                fcntl.flock(vec.fileno(), fcntl.LOCK_EX)
+            try:
+                self._catch_up()
+                if self.dim is None:
+                    self.dim = int(vectors.shape[1])
+                    with open(self._meta_path, "w") as f:
+                        json.dump({"model": self.model_name, "dim": self.dim}, f)
+                elif vectors.shape[1] != self.dim:
+                    raise ValueError(f"expected dim {self.dim}, got {vectors.shape[1]}")
+
+                keep, seen = [], set()
+                for i, h in enumerate(hashes):
+                    if h not in self._rows and h not in seen:
+                        seen.add(h)
+                        keep.append(i)
+                if keep:
+                    # vectors first, then index, so readers never see a row without
+                    # data; rows left behind by a crashed writer are just skipped
+                    first = self._file_rows()
+                    if os.path.getsize(self._idx_path) != self._idx_pos:
+                        idx.truncate(self._idx_pos)  # torn line from a crashed writer
+                    vec.seek(first * self.dim * ROW_DTYPE().itemsize)
+                    vec.truncate()
+                    vec.write(vectors[keep].tobytes())
+                    vec.flush()
+                    lines = "".join(f"{hashes[i]} {first + k}\n" for k, i in enumerate(keep)).encode("ascii")
+                    idx.write(lines)
+                    idx.flush()
+                    self._idx_pos += len(lines)
+                    for k, i in enumerate(keep):
+                        self._rows[hashes[i]] = first + k
+                    self._n_rows = first + len(keep)
+                    added = len(keep)
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(vec.fileno(), fcntl.LOCK_UN)
+        return added
+
+    # ---- main entry point ------------------------------------------------
+    def encode(self, texts: Sequence[str], encode_fn: Callable[[List[str]], np.ndarray]) -> np.ndarray:
+        """
+        Embeddings for `texts` as a float32 (n, dim) matrix. Only texts not
+        cached yet (deduplicated) are passed to `encode_fn`, then appended.
+        """
+        texts = list(texts)
+        hashes = [text_hash(t) for t in texts]
+        row_ids = self.lookup(hashes)
+
+        missing: Dict[str, str] = {}
+        for h, t, r in zip(hashes, texts, row_ids):
+            if r is None and h not in missing:
+                missing[h] = t
+        if missing:
+            new_vectors = np.asarray(encode_fn(list(missing.values())), dtype=ROW_DTYPE)
+            self.add_many(list(missing.keys()), new_vectors)
+            row_ids = self.lookup(hashes)
+        with self._lock:
+            self.hits += len(texts) - len(missing)
+            self.misses += len(missing)
+        return self.rows(row_ids)
+
+    def stats(self) -> dict:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "model": self.model_name,
+                "rows": self._n_rows,
+                "dim": self.dim,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / total, 4) if total else 0.0,
+            }
+
+    def close(self):
+        with self._lock:
+            self._matrix = None
+
+
+_caches: Dict[str, EmbeddingCache] = {}
+_caches_lock = threading.Lock()
+
+
+def get_embedding_cache(model_name: str) -> EmbeddingCache:
+    """Process-wide cache for one embedder."""
+    with _caches_lock:
+        cache = _caches.get(model_name)
+        if cache is None:
+            cache = _caches[model_name] = EmbeddingCache(model_name)
+        return cache
@@ -1,5 +1,14 @@
 # backend/src/ml_models/risk_predictor.py# backend/src/ml_models/risk_predictor.py
-from typing import List, Dict
+import os
+import threading
+from collections import Counter, OrderedDict
+from typing import List, Dict, Hashable
+
+import numpy as np
+
+from src.utils.keyword_matcher import KeywordMatcher
+from src.data_ingestion.article_store import article_hash
+from src.data_ingestion.news_cache import TTLLRUCache
 
 RISK_KEYWORDS = {
     "war": 25,
@@ -14,6 +23,41 @@ RISK_KEYWORDS = {
     "inflation": 10,
 }
 
+# compiled once; finds every keyword in a text in a single pass
+RISK_MATCHER = KeywordMatcher(RISK_KEYWORDS)
+
+# array views of the lexicon for batch scoring
+_KW_NAMES = list(RISK_KEYWORDS)
+_KW_INDEX = {kw: i for i, kw in enumerate(_KW_NAMES)}
+_KW_WEIGHTS = np.array([RISK_KEYWORDS[kw] for kw in _KW_NAMES])
+
+# per-article partial results (keywords hit) memoized by content hash
+ARTICLE_HITS_CACHE = TTLLRUCache(
+    max_entries=int(os.getenv("ARTICLE_HITS_CACHE_SIZE", "20000")),
+    ttl=float("inf"),
+)
+
+LOW_RISK_RESULT = {
+    "risk_score": 10,
+    "status": "Low risk",
+    "risk_label": "Low",
+    "explanation": "No relevant news found — low current risk.",
+    "top_risk_factors": [],
+    "top_articles": [],
+}
+
+def article_hits(article: Dict) -> tuple:
+    """Risk keywords present in one article (lexicon order), memoized by content hash."""
+    h = article_hash(article)
+    hits, _ = ARTICLE_HITS_CACHE.get(h)
+    if hits is None:
+        title = (article.get("title") or "").lower()
+        desc = (article.get("description") or "").lower()
+        hits = tuple(RISK_MATCHER.hits(f"{title} {desc}"))
+        ARTICLE_HITS_CACHE.set(h, hits)
+    return hits
+
+
 def compute_risk_from_news(articles: List[Dict]) -> Dict:
     """
     Deterministic risk scoring from list of articles.
@@ -26,27 +70,23 @@ def compute_risk_from_news(articles: List[Dict]) -> Dict:
       - top_articles (first 5 articles)
     """
     if not articles:
-        return {
-            "risk_score": 10,
-            "status": "Low risk",
-            "risk_label": "Low",
-            "explanation": "No relevant news found — low current risk.",
-            "top_risk_factors": [],
-            "top_articles": [],
-        }
+        return dict(LOW_RISK_RESULT)
 
     # Count matches and accumulate weighted score
     score = 0
     keyword_hits = {}
     for a in articles:
-        title = (a.get("title") or "").lower()
-        desc = (a.get("description") or "").lower()
-        text = f"{title} {desc}"
-        for kw, w in RISK_KEYWORDS.items():
-            if kw in text:
-                score += w
-                keyword_hits[kw] = keyword_hits.get(kw, 0) + w
+        for kw in article_hits(a):
+            w = RISK_KEYWORDS[kw]
+            score += w
+            keyword_hits[kw] = keyword_hits.get(kw, 0) + w
 
+    return _summarize(score, keyword_hits, articles)
+
+
+def _summarize(score, keyword_hits: Dict, articles: List[Dict]) -> Dict:
+    """Turn the accumulated score and per-keyword contributions (in first-
+    appearance order) into the result dict."""
     # Heuristic normalization: scale to 0-100 based on max plausible sum
     # max per article if many keywords matched could be large; we normalize by number of articles
     max_per_article = max(RISK_KEYWORDS.values()) * 2  # rough upper bound
@@ -88,4 +128,142 @@ def compute_risk_from_news(articles: List[Dict]) -> Dict:
         "explanation": explanation,
         "top_risk_factors": top_factors,
         "top_articles": top_articles,
-    }
\ No newline at end of file
+    }
+
+
+def compute_risk_from_news_batch(articles_by_country: Dict[str, List[Dict]]) -> Dict[str, Dict]:
+    """
+    Score many countries at once. Returns {country: result} where each
+    result is exactly what compute_risk_from_news would return for that
+    country's articles.
+
+    Matching still runs once per article; everything after it works on a
+    countries x keywords hit matrix: weighting, normalization, Low/Moderate/
+    High thresholds and top-factor ordering (by contribution, ties broken by
+    first appearance like the dict-insertion order of the single version).
+    """
+    countries = list(articles_by_country)
+    n_countries, n_kw = len(countries), len(_KW_NAMES)
+    if n_countries == 0:
+        return {}
+
+    n_articles = np.zeros(n_countries, dtype=np.int64)
+    flat_idx, first_seen = [], []
+    for row, country in enumerate(countries):
+        articles = articles_by_country[country] or []
+        n_articles[row] = len(articles)
+        for a_idx, a in enumerate(articles):
+            for kw in article_hits(a):
+                k = _KW_INDEX[kw]
+                flat_idx.append(row * n_kw + k)
+                first_seen.append(a_idx * n_kw + k)
+
+    flat_idx = np.asarray(flat_idx, dtype=np.int64)
+    # articles containing each keyword, per country
+    hits = np.bincount(flat_idx, minlength=n_countries * n_kw).reshape(n_countries, n_kw)
+    contrib = hits * _KW_WEIGHTS
+    scores = contrib.sum(axis=1)
+
+    # order in which each keyword first appeared for its country
+    order_key = np.full(n_countries * n_kw, np.iinfo(np.int64).max, dtype=np.int64)
+    if flat_idx.size:
+        np.minimum.at(order_key, flat_idx, np.asarray(first_seen, dtype=np.int64))
+    order_key = order_key.reshape(n_countries, n_kw)
+
+    # same float expression as compute_risk_from_news, evaluated column-wise
+    max_per_article = max(RISK_KEYWORDS.values()) * 2
+    safe_n = np.maximum(n_articles, 1)
+    raw = (scores / (safe_n * max_per_article)) * 100 * 0.9 + 10
+    normalized = np.clip(np.trunc(np.minimum(100, raw)), 0, 100).astype(np.int64)
+
+    level = np.select([normalized >= 75, normalized >= 40], [2, 1], default=0)
+    statuses = ("Low risk", "Moderate risk", "High risk")
+    labels = ("Low", "Moderate", "High")
+
+    # rank keywords per country: contribution desc, then first appearance
+    ranked = np.lexsort((order_key, -contrib), axis=-1)[:, :5]
+    top_contrib = np.take_along_axis(contrib, ranked, axis=1)
+
+    results = {}
+    for row, country in enumerate(countries):
+        if n_articles[row] == 0:
+            results[country] = dict(LOW_RISK_RESULT)
+            continue
+
+        n_hit = int(np.count_nonzero(top_contrib[row]))
+        factor_kw = [_KW_NAMES[k] for k in ranked[row, :n_hit]]
+        factor_w = top_contrib[row, :n_hit].tolist()
+        if n_hit:
+            top_factors = [f"{k} (+{v})" for k, v in zip(factor_kw, factor_w)]
+            explanation = (
+                f"Detected {scores[row].item()} weighted keyword hits. "
+                f"Top factors: {', '.join(factor_kw[:3])}."
+            )
+        else:
+            top_factors = []
+            explanation = "No strong risk keywords detected in recent articles."
+
+        results[country] = {
+            "risk_score": int(normalized[row]),
+            "status": statuses[level[row]],
+            "risk_label": labels[level[row]],
+            "explanation": explanation,
+            "top_risk_factors": top_factors,
+            "top_articles": articles_by_country[country][:5],
+        }
+    return results
+
+
+class RiskWindowAggregator:
+    """
+    Keeps a running risk aggregate per key (e.g. country) over its current
+    article window. update() diffs the new window against the previous one
+    by content hash, so only articles that arrived or aged out touch the
+    totals; the result equals compute_risk_from_news(window).
+    """
+
+    def __init__(self, max_keys: int = 512):
+        self.max_keys = max_keys
+        self._windows: "OrderedDict[Hashable, dict]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def update(self, key: Hashable, articles: List[Dict]) -> Dict:
+        if not articles:
+            with self._lock:
+                self._windows.pop(key, None)
+            return dict(LOW_RISK_RESULT)
+
+        hashes = [article_hash(a) for a in articles]
+        with self._lock:
+            win = self._windows.pop(key, None) or {"counts": Counter(), "hits": {}, "contrib": Counter()}
+            self._windows[key] = win
+            while len(self._windows) > self.max_keys:
+                self._windows.popitem(last=False)
+
+            new_counts = Counter(hashes)
+            for h, n in (win["counts"] - new_counts).items():
+                for kw in win["hits"][h]:
+                    win["contrib"][kw] -= RISK_KEYWORDS[kw] * n
+                if h not in new_counts:
+                    del win["hits"][h]
+            added = new_counts - win["counts"]
+            for a, h in zip(articles, hashes):
+                if h in added and h not in win["hits"]:
+                    win["hits"][h] = article_hits(a)
+            for h, n in added.items():
+                for kw in win["hits"][h]:
+                    win["contrib"][kw] += RISK_KEYWORDS[kw] * n
+            win["counts"] = new_counts
+
+            # contributions in first-appearance order (tie order of the sort)
+            present = {kw for kw, v in win["contrib"].items() if v > 0}
+            keyword_hits = {}
+            for h in hashes:
+                if len(keyword_hits) == len(present):
+                    break
+                for kw in win["hits"][h]:
+                    if kw not in keyword_hits:
+                        keyword_hits[kw] = win["contrib"][kw]
+            score = sum(keyword_hits.values())
+
+        return _summarize(score, keyword_hits, articles)
@@ -0,0 +1,113 @@
+# backend/src/ml_models/text_features.py
+"""
+Shared text-feature engine: negative-sentiment percentage and keyword score.
+
+Used by the ETL (build_dataset.extract_text_features), the online path
+(deployed_model.predict_text / predict_articles), the scheduler (one
+feature_matrix over every country's window, via
+deployed_model.predict_article_windows) and the feature-based branch of
+/api/analyze, which used to each build a TextBlob over the whole
+concatenated text on every call.
+
+Each article's own text is analysed once and its partial result is cached
+by content hash: the polarity of every sentiment assessment TextBlob finds
+in it, and the keywords it contains. The combined polarity is the average
+over all assessments of all articles (what TextBlob computes over the
+concatenated text, except that no modifier or "!" reaches across from one
+article into the next), so repeated articles cost a lookup instead of a
+re-parse.
+"""
+import os
+from typing import Dict, Iterable, List
+
+import numpy as np
+
+from src.utils.keyword_matcher import KeywordMatcher
+from src.data_ingestion.article_store import article_hash
+from src.data_ingestion.news_cache import TTLLRUCache
+
+# light NLP helper
+try:
+    from textblob.en import sentiment as pattern_sentiment
+    TEXTBLOB_AVAILABLE = True
+except Exception:
+    pattern_sentiment = None
+    TEXTBLOB_AVAILABLE = False
+
+# article hash -> assessment polarities, shared by every engine
+SENTIMENT_CACHE = TTLLRUCache(
+    max_entries=int(os.getenv("SENTIMENT_CACHE_SIZE", "20000")),
+    ttl=float("inf"),
+)
+
+FEATURE_COLUMNS = ["news_negative_pct", "keyword_score"]
+
+
+def article_text(article: Dict) -> str:
+    return ((article.get("title") or "") + " " + (article.get("description") or "")).strip()
+
+
+def _article_sentiment(article: Dict, h: str) -> tuple:
+    """Polarities of the sentiment assessments in one article, scored on its own."""
+    polarities, _ = SENTIMENT_CACHE.get(h)
+    if polarities is None:
+        polarities = tuple(p for _, p, _, _ in pattern_sentiment(article_text(article)).assessments)
+        SENTIMENT_CACHE.set(h, polarities)
+    return polarities
+
+
+class TextFeatureEngine:
+    """
+    `matcher` scores +weight per distinct keyword present anywhere in the
+    articles. `empty_negative_pct` is what an empty text maps to (the ETL
+    uses 10.0, the online paths let TextBlob return 0.0); 10.0 is also the
+    fallback whenever TextBlob is unavailable or fails.
+    """
+
+    def __init__(self, matcher: KeywordMatcher, empty_negative_pct: float = 0.0,
+                 fallback_negative_pct: float = 10.0, cache_size: int = 20000):
+        self.matcher = matcher
+        self.empty_negative_pct = empty_negative_pct
+        self.fallback_negative_pct = fallback_negative_pct
+        self._hits = TTLLRUCache(max_entries=cache_size, ttl=float("inf"))
+
+    def _keyword_hits(self, article: Dict, h: str) -> tuple:
+        hits, _ = self._hits.get(h)
+        if hits is None:
+            hits = tuple(self.matcher.hits(article_text(article)))
+            self._hits.set(h, hits)
+        return hits
+
+    def features(self, articles: List[Dict]) -> Dict[str, float]:
+        """news_negative_pct and keyword_score for one list of articles."""
+        articles = [a for a in articles if article_text(a)]
+        if not articles:
+            return {"news_negative_pct": self.empty_negative_pct if TEXTBLOB_AVAILABLE
+                    else self.fallback_negative_pct, "keyword_score": 0}
+
+        hashes = [article_hash(a) for a in articles]
+
+        keywords = set()
+        for a, h in zip(articles, hashes):
+            keywords.update(self._keyword_hits(a, h))
+        keyword_score = sum(self.matcher.weights[kw] for kw in keywords)
+
+        if not TEXTBLOB_AVAILABLE:
+            return {"news_negative_pct": self.fallback_negative_pct, "keyword_score": keyword_score}
+        try:
+            polarities = [p for a, h in zip(articles, hashes) for p in _article_sentiment(a, h)]
+            polarity = sum(polarities) / float(len(polarities) or 1)
+            news_negative_pct = max(0.0, -polarity * 100)
+        except Exception:
+            news_negative_pct = self.fallback_negative_pct
+
+        return {"news_negative_pct": news_negative_pct, "keyword_score": keyword_score}
+
+    def features_for_text(self, text: str) -> Dict[str, float]:
+        """Features for a single pre-joined text (treated as one article)."""
+        return self.features([{"title": text or ""}])
+
+    def feature_matrix(self, article_lists: Iterable[List[Dict]]) -> np.ndarray:
+        """Batch API: one row of FEATURE_COLUMNS per list of articles."""
+        rows = [self.features(articles) for articles in article_lists]
+        return np.array([[r[c] for c in FEATURE_COLUMNS] for r in rows], dtype=np.float64).reshape(-1, len(FEATURE_COLUMNS))
@@ -0,0 +1,128 @@
+"""
+backend/src/utils/bench_ingest.py
+
+Throughput / tail-latency benchmark of the ingest -> score -> store path,
+reproducible offline against the NewsAPI stand-in.
+
+Usage:
+  # spin up the stand-in in-process from a recorded corpus and benchmark
+  python -m src.utils.bench_ingest --corpus data/newsapi_corpus.jsonl \
+      --requests 500 --concurrency 16 --latency-ms 80 --error-rate 0.01
+
+  # or benchmark whatever NEWSAPI_URL already points at
+  python -m src.utils.bench_ingest --requests 200 --skip-store
+"""
+import time
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+from typing import List
+
+from src.data_ingestion import fetch_news
+from src.data_ingestion import newsapi_standin
+from src.ml_models.risk_predictor import compute_risk_from_news
+from src.utils.stats import percentile
+
+DEFAULT_COUNTRIES = "India,United States,China,Germany,United Kingdom,France,Japan,Brazil"
+
+
+def _fetch(country: str, page_size: int, use_cache: bool) -> List[dict]:
+    # Same request/cache path as fetch_news_for_country, minus its
+    # catch-all: a failed request must count as an error, not as an
+    # empty (and suspiciously fast) success.
+    key = fetch_news.NEWSAPI_KEY
+    cache_key = fetch_news._cache_key(country, page_size)
+    if use_cache:
+        cached = fetch_news._lookup_cache(cache_key, country, page_size, key)
+        if cached is not None:
+            return cached
+    articles = fetch_news._request_articles(country, page_size, key)
+    fetch_news.NEWS_CACHE.set(cache_key, articles)
+    return articles
+
+
+def _one(country: str, page_size: int, use_cache: bool, skip_store: bool) -> float:
+    start = time.perf_counter()
+    articles = _fetch(country, page_size, use_cache)
+    risk = compute_risk_from_news(articles)
+    if not skip_store:
+        from src.utils.store_history import store_risk
+        store_risk(country, risk["risk_score"])
+    return time.perf_counter() - start
+
+
+def run_benchmark(countries: List[str], n_requests: int, concurrency: int, page_size: int = 12,
+                  use_cache: bool = False, skip_store: bool = False) -> dict:
+    latencies, errors = [], 0
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        futures = [
+            pool.submit(_one, countries[i % len(countries)], page_size, use_cache, skip_store)
+            for i in range(n_requests)
+        ]
+        for fut in futures:
+            try:
+                latencies.append(fut.result())
+            except Exception:
+                errors += 1
+    wall = time.perf_counter() - start
+
+    latencies.sort()
+    ms = lambda v: round(v * 1000, 2)
+    return {
+        "requests": n_requests,
+        "errors": errors,
+        "concurrency": concurrency,
+        "wall_seconds": round(wall, 3),
+        "throughput_rps": round(n_requests / wall, 2) if wall else 0.0,
+        "p50_ms": ms(percentile(latencies, 50)),
+        "p95_ms": ms(percentile(latencies, 95)),
+        "p99_ms": ms(percentile(latencies, 99)),
+        "max_ms": ms(latencies[-1]) if latencies else 0.0,
+    }
+
+
+def parse_args():
+    p = argparse.ArgumentParser(description="Benchmark ingest -> score -> store.")
+    p.add_argument("--corpus", help="Start the NewsAPI stand-in in-process from this corpus.")
+    p.add_argument("--countries", default=DEFAULT_COUNTRIES)
+    p.add_argument("--requests", type=int, default=200)
+    p.add_argument("--concurrency", type=int, default=8)
+    p.add_argument("--pagesize", type=int, default=12)
+    p.add_argument("--use-cache", action="store_true", help="Let the news cache absorb repeat fetches.")
+    p.add_argument("--skip-store", action="store_true", help="Don't write history rows (no MongoDB needed).")
+    p.add_argument("--unthrottled", action="store_true", help="Disable the NewsAPI token bucket.")
+    # stand-in knobs (only used with --corpus)
+    p.add_argument("--port", type=int, default=8900)
+    p.add_argument("--latency-ms", type=float, default=50.0)
+    p.add_argument("--latency-sigma", type=float, default=0.5)
+    p.add_argument("--error-rate", type=float, default=0.0)
+    p.add_argument("--fill-min", type=float, default=1.0)
+    p.add_argument("--fill-max", type=float, default=1.0)
+    p.add_argument("--seed", type=int, default=42)
+    return p.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    server = None
+    if args.corpus:
+        opts = newsapi_standin.parse_args([
+            "--corpus", args.corpus, "--port", str(args.port),
+            "--latency-ms", str(args.latency_ms), "--latency-sigma", str(args.latency_sigma),
+            "--error-rate", str(args.error_rate), "--fill-min", str(args.fill_min),
+            "--fill-max", str(args.fill_max), "--seed", str(args.seed),
+        ])
+        server = newsapi_standin.serve(opts)
+        fetch_news.NEWSAPI_URL = f"http://127.0.0.1:{args.port}/v2/everything"
+        fetch_news.NEWSAPI_KEY = fetch_news.NEWSAPI_KEY or "standin"
+    if args.unthrottled:
+        fetch_news.NEWSAPI_RATE_LIMITER.rate = 0
+
+    countries = [c.strip() for c in args.countries.split(",") if c.strip()]
+    print("Benchmarking against", fetch_news.NEWSAPI_URL)
+    result = run_benchmark(countries, args.requests, args.concurrency, page_size=args.pagesize,
+                           use_cache=args.use_cache, skip_store=args.skip_store)
+    for k, v in result.items():
+        print(f"{k:>16}: {v}")
+    if server is not None:
+        server.shutdown()
@@ -0,0 +1,90 @@
+# backend/src/utils/keyword_matcher.py
+"""
+Single-pass multi-keyword matcher shared by the heuristic scorer and the
+text-feature extractors.
+
+The lexicon is compiled once into one regex built from a character trie and
+wrapped in a zero-width lookahead, so a single finditer pass tries every
+start position and the cost per position depends on keyword length, not on
+how many keywords there are. At a given position the trie yields the longest
+keyword; shorter keywords that are prefixes of it are added from a
+precomputed table, so every keyword present in the text is reported.
+
+Two semantics are supported:
+  - substring (default): same as `kw in text.lower()`, what the scorers
+    have always used
+  - word_boundary: the keyword must start and end on a word boundary,
+    allowing common inflections (delays, sanctioned, protesting)
+"""
+import re
+from typing import Dict, Iterable, List
+
+WORD_SUFFIXES = ("s", "es", "ed", "d", "ing")
+
+
+def _build_trie(words: Iterable[str]) -> Dict:
+    trie: Dict = {}
+    for w in words:
+        node = trie
+        for ch in w:
+            node = node.setdefault(ch, {})
+        node[""] = True
+    return trie
+
+
+def _trie_regex(node: Dict) -> str:
+    branches = [re.escape(ch) + _trie_regex(child) for ch, child in sorted(node.items()) if ch != ""]
+    if not branches:
+        return ""
+    body = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+    if "" in node:
+        # greedy optional: longest keyword at this position wins
+        body = "(?:" + body + ")?"
+    return body
+
+
+class KeywordMatcher:
+    def __init__(self, weights: Dict[str, float], word_boundary: bool = False):
+        self.weights = {kw.lower(): w for kw, w in weights.items()}
+        self.word_boundary = word_boundary
+        self._rank = {kw: i for i, kw in enumerate(self.weights)}
+
+        trie = _build_trie(self.weights)
+        core = "(" + _trie_regex(trie) + ")"
+        if word_boundary:
+            suffix = "(?:" + "|".join(WORD_SUFFIXES) + ")?"
+            pattern = r"(?<!\w)(?=" + core + suffix + r"(?!\w))"
+        else:
+            pattern = "(?=" + core + ")"
+        self._pattern = re.compile(pattern)
+
+        # keyword -> keywords that also match whenever it matches at a position
+        self._implied = {kw: self._prefix_keywords(trie, kw) for kw in self.weights}
+
+    @classmethod
+    def uniform(cls, keywords: Iterable[str], weight: float = 1, word_boundary: bool = False) -> "KeywordMatcher":
+        return cls({kw: weight for kw in keywords}, word_boundary=word_boundary)
+
+    def _prefix_keywords(self, trie: Dict, kw: str) -> tuple:
+        found, node = [], trie
+        for i, ch in enumerate(kw):
+            node = node[ch]
+            if "" in node:
+                prefix = kw[:i + 1]
+                rest = kw[i + 1:]
+                if not self.word_boundary or rest == "" or rest in WORD_SUFFIXES:
+                    found.append(prefix)
+        return tuple(found)
+
+    def hits(self, text: str) -> List[str]:
+        """Distinct keywords present in `text`, in lexicon order."""
+        if not text:
+            return []
+        found = set()
+        for m in self._pattern.finditer(text.lower()):
+            found.update(self._implied[m.group(1)])
+        return sorted(found, key=self._rank.__getitem__)
+
+    def score(self, text: str) -> float:
+        """Sum of weights of the distinct keywords present in `text`."""
+        return sum(self.weights[kw] for kw in self.hits(text))
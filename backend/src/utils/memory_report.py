@@ -0,0 +1,63 @@
+# backend/src/utils/memory_report.py
+"""
+Process memory breakdown from /proc (Linux), used to show how much of a
+worker's footprint is shared file-backed pages (memory-mapped model
+artifacts) versus private heap. Elsewhere only peak RSS is available.
+"""
+import os
+import resource
+from typing import Dict
+
+
+def _kb_fields(path: str, wanted) -> Dict[str, int]:
+    out = {}
+    with open(path) as f:
+        for line in f:
+            key, _, rest = line.partition(":")
+            if key in wanted:
+                out[key] = int(rest.split()[0])
+    return out
+
+
+def process_memory() -> Dict[str, float]:
+    """rss / pss / shared / private in MB for the current process."""
+    try:
+        fields = _kb_fields("/proc/self/smaps_rollup", {
+            "Rss", "Pss", "Shared_Clean", "Shared_Dirty", "Private_Clean", "Private_Dirty",
+        })
+        return {
+            "rss_mb": round(fields.get("Rss", 0) / 1024.0, 1),
+            "pss_mb": round(fields.get("Pss", 0) / 1024.0, 1),
+            "shared_mb": round((fields.get("Shared_Clean", 0) + fields.get("Shared_Dirty", 0)) / 1024.0, 1),
+            "private_mb": round((fields.get("Private_Clean", 0) + fields.get("Private_Dirty", 0)) / 1024.0, 1),
+        }
+    except (OSError, ValueError):
+        # ru_maxrss is KB on Linux, bytes on macOS; good enough as a fallback
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return {"peak_rss_mb": round(peak / 1024.0, 1)}
+
+
+def mapped_file_memory(prefix: str) -> Dict[str, float]:
+    """Resident / proportional size of this process' mappings of files under `prefix`."""
+    prefix = os.path.abspath(prefix)
+    rss = pss = size = 0
+    try:
+        with open("/proc/self/smaps") as f:
+            current = False
+            for line in f:
+                head = line.split(None, 1)[0]
+                if "-" in head and not head.endswith(":"):
+                    # mapping header: "start-end perms offset dev inode [path]"
+                    parts = line.split()
+                    current = len(parts) >= 6 and parts[5].startswith(prefix)
+                elif current:
+                    if head == "Size:":
+                        size += int(line.split()[1])
+                    elif head == "Rss:":
+                        rss += int(line.split()[1])
+                    elif head == "Pss:":
+                        pss += int(line.split()[1])
+    except OSError:
+        return {}
+    return {"mapped_mb": round(size / 1024.0, 1), "resident_mb": round(rss / 1024.0, 1),
+            "pss_mb": round(pss / 1024.0, 1)}
@@ -0,0 +1,45 @@
+# backend/src/utils/rate_limit.py
+import time
+import asyncio
+import threading
+
+
+class TokenBucket:
+    """
+    Token-bucket rate limiter usable from threads and from asyncio code.
+
+    `rate` tokens are added per second up to `capacity`. Each acquire
+    reserves a token immediately (the balance may go negative) and then
+    sleeps until that reservation is covered, so waiters are served in
+    arrival order without holding the lock while sleeping.
+    """
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = float(rate)
+        self.capacity = float(capacity)
+        self._tokens = float(capacity)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _reserve(self, tokens: float) -> float:
+        if self.rate <= 0:
+            return 0.0  # limiter disabled
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= tokens
+            return max(0.0, -self._tokens / self.rate)
+
+    def acquire(self, tokens: float = 1.0) -> float:
+        """Block until `tokens` are available; returns the time waited."""
+        wait = self._reserve(tokens)
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+
+    async def acquire_async(self, tokens: float = 1.0) -> float:
+        wait = self._reserve(tokens)
+        if wait > 0:
+            await asyncio.sleep(wait)
+        return wait
@@ -1,30 +1,31 @@
 # backend/src/utils/scheduler.py
 import os
 import logging
-import requests
-import traceback
 import atexit
 from apscheduler.schedulers.background import BackgroundScheduler
 from apscheduler.triggers.interval import IntervalTrigger
 from datetime import datetime
-from typing import List
+from typing import List, Dict
 
-from src.data_ingestion.fetch_news import fetch_news_for_country
-from src.ml_models.risk_predictor import compute_risk_from_news
-from src.utils.store_history import store_risk
+from src.data_ingestion.fetch_news import fetch_news_for_country, latest_published_at
+from src.data_ingestion.batch_query import fetch_news_batched
+from src.data_ingestion.article_store import get_article_store
+from src.ml_models.risk_predictor import compute_risk_from_news_batch
+from src.utils.store_history import store_risk, get_watermark, get_watermarks, set_watermark
 
 _scheduler = None
 
 log = logging.getLogger("scheduler")
 log.setLevel(logging.INFO)
 
-# Try to import deployed ML model (optional)
+# Try to import deployed ML model (optional): the text regressor in
+# backend/deployed_model.py, fed per-article features for every window at once
 try:
-    from ml.deployed_model import predict_text as ml_predict
+    from deployed_model import predict_article_windows as ml_predict_windows
     HAS_ML = True
     log.info("Deployed ML model found for scheduler.")
 except Exception:
-    ml_predict = None
+    ml_predict_windows = None
     HAS_ML = False
     log.info("No deployed ML model found; scheduler will use heuristic fallback.")
 
@@ -35,85 +36,135 @@ DEFAULT_COUNTRIES = [
     "Canada", "South Africa", "Italy", "Spain", "Mexico"
 ]
 
-scheduler = BackgroundScheduler()
-_job = None
+PAGE_SIZE = 12
 
-def _collect_and_store(country: str):
+# last (score, status) per country, reused when a scan brings no new articles
+_last_results: Dict[str, tuple] = {}
+
+def _ml_score_many(windows: Dict[str, List[Dict]]):
+    countries = list(windows)
     try:
-        log.info(f"Scheduler: fetching news for {country}")
-        articles = fetch_news_for_country(country, page_size=12)
-
-        combined = "\n".join(((a.get("title") or "") + " " + (a.get("description") or "")) for a in articles)
-
-        if HAS_ML:
-            try:
-                pred = ml_predict(combined)
-                score = float(pred.get("risk_score", 0))
-                status = pred.get("status") or pred.get("risk_label") or "Model"
-                explanation = pred.get("explanation", "")
-            except Exception as e:
-                log.exception("Scheduler ML predict failed, falling back to heuristic: %s", e)
-                heuristic = compute_risk_from_news(articles)
-                score = heuristic.get("risk_score", 10)
-                status = heuristic.get("status", "Low risk")
-                explanation = heuristic.get("explanation", "")
-        else:
-            heuristic = compute_risk_from_news(articles)
-            score = heuristic.get("risk_score", 10)
-            status = heuristic.get("status", "Low risk")
-            explanation = heuristic.get("explanation", "")
-
-        # store numeric value to history DB
-        try:
-            store_risk(country, float(score))
-        except Exception as e:
-            log.exception("Failed to store risk in DB for %s: %s", country, e)
+        preds = ml_predict_windows([windows[c] for c in countries])
+    except Exception as e:
+        log.warning("Scheduler ML predict failed, falling back to heuristic: %s", e)
+        return None
+    return {c: (float(p.get("risk_score", 0)), p.get("status") or "Model") for c, p in zip(countries, preds)}
+
+
+def _score_many(windows: Dict[str, List[Dict]]) -> Dict[str, tuple]:
+    """(score, status) per country; the model (or the heuristic) scores all windows in one batch."""
+    if not windows:
+        return {}
+    if HAS_ML:
+        results = _ml_score_many(windows)
+        if results is not None:
+            return results
+    return {
+        country: (heuristic.get("risk_score", 10), heuristic.get("status", "Low risk"))
+        for country, heuristic in compute_risk_from_news_batch(windows).items()
+    }
+
+
+def _record_articles(country: str, articles: List[Dict]) -> List[Dict]:
+    """Persist fetched articles; returns the ones the store had not seen yet."""
+    try:
+        return get_article_store().add_many(articles, country=country)
+    except Exception as e:
+        log.exception("Failed to persist articles for %s: %s", country, e)
+        return articles
+
+
+def _scoring_window(country: str, delta: List[Dict]) -> List[Dict]:
+    """Newest PAGE_SIZE stored articles for a country (the delta is already stored)."""
+    try:
+        window = get_article_store().articles_for_country(country, limit=PAGE_SIZE)
+    except Exception as e:
+        log.exception("Failed to read article store for %s: %s", country, e)
+        window = []
+    return window or delta
 
-        log.info(f"Stored {country} risk={score} ({status}) at {datetime.utcnow().isoformat()}")
+
+def _prepare(country: str, delta: List[Dict]):
+    """
+    Record the delta and return the article window to score, or None when
+    the delta brought nothing the store had not seen and the last score can
+    be reused.
+    """
+    new_articles = _record_articles(country, delta)
+    if not new_articles and country in _last_results:
+        log.info("Scheduler: no new articles for %s, reusing last score", country)
+        return None
+    return _scoring_window(country, delta)
+
+
+def _finish(country: str, delta: List[Dict], score, status):
+    try:
+        set_watermark(country, latest_published_at(delta))
+    except Exception as e:
+        log.exception("Failed to advance watermark for %s: %s", country, e)
+
+    # store numeric value to history DB
+    try:
+        store_risk(country, float(score))
+    except Exception as e:
+        log.exception("Failed to store risk in DB for %s: %s", country, e)
+
+    log.info(f"Stored {country} risk={score} ({status}) at {datetime.utcnow().isoformat()}")
+
+
+def _collect_and_store(country: str, articles: List[Dict] = None):
+    """
+    `articles` is the delta newer than the country's published_at watermark;
+    when omitted it is fetched incrementally here.
+    """
+    try:
+        if articles is None:
+            log.info(f"Scheduler: fetching news for {country}")
+            articles = fetch_news_for_country(country, page_size=PAGE_SIZE, since=get_watermark(country))
+
+        window = _prepare(country, articles)
+        if window is not None:
+            _last_results[country] = _score_many({country: window})[country]
+        score, status = _last_results[country]
+        _finish(country, articles, score, status)
     except Exception as e:
         log.exception("Scheduler: unexpected error for %s: %s", country, e)
 
 
 def run_once_for_all(countries: List[str] = None):
     countries = countries or DEFAULT_COUNTRIES
+    # fetch what is newer than each country's watermark with batched OR
+    # queries, score every country that changed in one batch, then store
+    log.info("Scheduler: fetching news for %d countries", len(countries))
+    try:
+        watermarks = get_watermarks(countries)
+    except Exception as e:
+        log.exception("Failed to load watermarks, doing a full fetch: %s", e)
+        watermarks = {}
+    articles_by_country = fetch_news_batched(countries, page_size=PAGE_SIZE, since=watermarks)
+
+    windows = {}
     for c in countries:
-        _collect_and_store(c)
+        try:
+            window = _prepare(c, articles_by_country.get(c, []))
+            if window is not None:
+                windows[c] = window
+        except Exception as e:
+            log.exception("Scheduler: unexpected error for %s: %s", c, e)
+    _last_results.update(_score_many(windows))
 
+    for c in countries:
+        if c not in _last_results:
+            continue
+        try:
+            score, status = _last_results[c]
+            _finish(c, articles_by_country.get(c, []), score, status)
+        except Exception as e:
+            log.exception("Scheduler: unexpected error for %s: %s", c, e)
 
-def schedule_periodic(interval_minutes: int = 360, countries: List[str] = None):
-    """Start periodic job to fetch data. interval_minutes default = 360 (6 hours)."""
-    global _job
-    countries = countries or DEFAULT_COUNTRIES
-    if _job:
-        scheduler.remove_job(_job.id)
-    # Add a job that runs every interval_minutes
-    _job = scheduler.add_job(lambda: run_once_for_all(countries),
-                             'interval',
-                             minutes=interval_minutes,
-                             next_run_time=datetime.utcnow())  # start immediately
-    log.info("Scheduler started: interval %s minutes, countries: %s", interval_minutes, countries)
-
-def _global_scan_job():
-    """
-    This job cycles through a predefined list of countries (or your DB list)
-    and calls the analyze endpoint to compute & store risk.
-    """
-    try:
-        # You can expand this list or load from DB
-        countries = ["India", "United States", "China", "Germany", "Brazil"]
-        for c in countries:
-            try:
-                resp = requests.post("http://127.0.0.1:8000/api/analyze", json={"country": c}, timeout=30)
-                if resp.ok:
-                    print("Scanned:", c, resp.json().get("risk_score"))
-                else:
-                    print("Scan failed for", c, resp.text)
-            except Exception as e:
-                print("Error scanning", c, e)
-    except Exception:
-        traceback.print_exc()
-
-def start_scheduler(interval_minutes: int = 360):
+
+def start_scheduler(interval_minutes: int = 360, countries: List[str] = None):
+    """Scan `countries` (default DEFAULT_COUNTRIES) every interval_minutes with run_once_for_all."""
     global _scheduler
     if _scheduler is not None:
         print("Scheduler already running.")
@@ -121,9 +172,10 @@ def start_scheduler(interval_minutes: int = 360):
 
     _scheduler = BackgroundScheduler()
     _scheduler.start()
-    # run job every `interval_minutes`
-    _scheduler.add_job(_global_scan_job, trigger=IntervalTrigger(minutes=interval_minutes), id="global_scan", replace_existing=True)
-    atexit.register(lambda: _scheduler.shutdown(wait=False))
+    # run job every `interval_minutes`: batched watermark fetch, one scoring batch
+    _scheduler.add_job(run_once_for_all, args=[countries], trigger=IntervalTrigger(minutes=interval_minutes),
+                       id="global_scan", replace_existing=True)
+    atexit.register(stop_scheduler)
     print(f"Scheduler started: interval={interval_minutes}m")
     return _scheduler
 
@@ -132,7 +184,4 @@ def stop_scheduler():
     if _scheduler:
         _scheduler.shutdown(wait=False)
         _scheduler = None
-        print("Scheduler stopped.")
-        
-def run_once_for_all():
-    _global_scan_job()
\ No newline at end of file
+        print("Scheduler stopped.")
\ No newline at end of file
@@ -0,0 +1,14 @@
+# backend/src/utils/stats.py
+"""
+Small summary-statistics helpers shared by the benchmarks, the inference
+micro-batcher and shadow scoring.
+"""
+from typing import Sequence
+
+
+def percentile(sorted_values: Sequence[float], pct: float) -> float:
+    """Nearest-rank percentile of an already sorted sequence (0.0 if empty)."""
+    if not sorted_values:
+        return 0.0
+    idx = min(len(sorted_values) - 1, max(0, int(round(pct / 100.0 * len(sorted_values))) - 1))
+    return sorted_values[idx]
@@ -33,3 +33,34 @@ def get_history(country: str, days: int = 30):
     col = db["history"]
     docs = col.find({"country": country}).sort("ts", -1).limit(days)
     return [{"ts": d["ts"], "risk_score": d.get("risk_score", 0)} for d in docs]
+
+
+# ---- per-country published_at watermarks ---------------------------------
+# Newest article timestamp already processed for each country, kept next to
+# the history collection so incremental fetches survive restarts.
+
+def _watermark_key(country: str) -> str:
+    return " ".join(country.split()).lower()
+
+def get_watermark(country: str):
+    db = client[DB_NAME]
+    doc = db["watermarks"].find_one({"country": _watermark_key(country)})
+    return doc.get("published_at") if doc else None
+
+def get_watermarks(countries):
+    db = client[DB_NAME]
+    keys = {_watermark_key(c): c for c in countries}
+    docs = db["watermarks"].find({"country": {"$in": list(keys)}})
+    found = {d["country"]: d.get("published_at") for d in docs}
+    return {c: found.get(k) for k, c in keys.items()}
+
+def set_watermark(country: str, published_at: str):
+    if not published_at:
+        return
+    db = client[DB_NAME]
+    # $max keeps the watermark monotonic (ISO-8601 strings sort chronologically)
+    db["watermarks"].update_one(
+        {"country": _watermark_key(country)},
+        {"$max": {"published_at": published_at}},
+        upsert=True,
+    )
@@ -0,0 +1,51 @@
+# backend/tests/test_article_store.py
+from src.data_ingestion.article_store import ArticleStore
+
+
+def _article(n, day=1, **extra):
+    return dict({"title": f"Port strike {n}", "description": f"day {n}", "url": f"https://news/{n}",
+                 "published_at": f"2024-01-{day:02d}T00:00:00Z"}, **extra)
+
+
+def test_duplicates_are_dropped_per_country(tmp_path):
+    store = ArticleStore(str(tmp_path))
+    assert len(store.add_many([_article(1), _article(2)], country="India")) == 2
+    # same URL, and same content under another URL
+    again = [_article(1), dict(_article(2), url="https://mirror/2")]
+    assert store.add_many(again, country="India") == []
+    assert len(store) == 2
+
+
+def test_shared_article_belongs_to_every_country(tmp_path):
+    store = ArticleStore(str(tmp_path))
+    store.add_many([_article(1)], country="India")
+    assert store.add_many([_article(1)], country="China") == [_article(1)]
+    assert len(store) == 1  # stored once
+    assert [a["url"] for a in store.articles_for_country("india")] == ["https://news/1"]
+    assert [a["url"] for a in store.articles_for_country("China")] == ["https://news/1"]
+
+
+def test_newest_first_with_limit(tmp_path):
+    store = ArticleStore(str(tmp_path))
+    store.add_many([_article(1, day=3), _article(2, day=9), _article(3, day=5)], country="India")
+    assert [a["url"] for a in store.articles_for_country("India", limit=2)] == ["https://news/2", "https://news/3"]
+
+
+def test_reopen_and_catch_up(tmp_path):
+    writer = ArticleStore(str(tmp_path))
+    writer.add_many([_article(1)], country="India")
+    reader = ArticleStore(str(tmp_path))
+    assert len(reader) == 1
+    # appended by another instance (another process) after the reader opened
+    writer.add_many([_article(2)], country="India")
+    writer.add_many([_article(1)], country="China")
+    assert len(reader.articles_for_country("India")) == 2
+    assert sorted(reader.countries()) == ["china", "india"]
+    assert reader.add_many([_article(2)], country="India") == []
+    writer.close()
+    reader.close()
+
+    reopened = ArticleStore(str(tmp_path))
+    assert len(reopened) == 2
+    assert [a["url"] for a in reopened.articles_for_country("China")] == ["https://news/1"]
+    reopened.close()
@@ -0,0 +1,38 @@
+# backend/tests/test_bench_ingest.py
+import requests
+
+import pytest
+
+from src.data_ingestion import fetch_news
+from src.utils import bench_ingest
+
+
+@pytest.fixture
+def newsapi(monkeypatch):
+    calls = []
+
+    def request_articles(query, page_size, key, since=None):
+        calls.append(query)
+        if query == "Atlantis":
+            raise requests.HTTPError("503 Server Error")
+        return [{"title": f"Port strike in {query}", "description": "", "source": "Test",
+                 "published_at": None, "url": None}]
+
+    monkeypatch.setattr(fetch_news, "_request_articles", request_articles)
+    fetch_news.NEWS_CACHE.clear()
+    yield calls
+    fetch_news.NEWS_CACHE.clear()
+
+
+def test_failed_requests_are_counted_as_errors(newsapi):
+    result = bench_ingest.run_benchmark(["India", "Atlantis"], n_requests=6, concurrency=2,
+                                        skip_store=True)
+    assert result["errors"] == 3
+    assert len(newsapi) == 6
+
+
+def test_cache_absorbs_repeat_fetches_when_enabled(newsapi):
+    result = bench_ingest.run_benchmark(["India"], n_requests=5, concurrency=1,
+                                        use_cache=True, skip_store=True)
+    assert result["errors"] == 0
+    assert newsapi == ["India"]
@@ -0,0 +1,47 @@
+# backend/tests/test_forest_compiler.py
+import numpy as np
+import pytest
+from sklearn.ensemble import RandomForestClassifier
+
+from ml.forest_compiler import compile_forest, verify_compiled, save_compiled, load_compiled
+
+
+@pytest.fixture(scope="module")
+def forest():
+    rng = np.random.default_rng(0)
+    X = rng.random((2000, 7)).astype(np.float32)
+    y = (X[:, 0] + X[:, 3] - X[:, 5] > 0.5).astype(int)
+    model = RandomForestClassifier(n_estimators=25, max_depth=6, random_state=0).fit(X, y)
+    return model, X
+
+
+def test_predict_proba_matches_sklearn(forest):
+    model, X = forest
+    compiled = compile_forest(model)
+    np.testing.assert_allclose(compiled.predict_proba(X), model.predict_proba(X), atol=1e-9)
+    assert verify_compiled(model, compiled) <= 1e-9
+    np.testing.assert_array_equal(compiled.predict(X), model.predict(X))
+
+
+def test_leaves_match_apply(forest):
+    model, X = forest
+    compiled = compile_forest(model)
+    np.testing.assert_array_equal(compiled.leaves(X[:200]), compiled.leaves_from_apply(model, X[:200]))
+
+
+def test_contributions_add_up_to_probability(forest):
+    model, X = forest
+    compiled = compile_forest(model)
+    assert compiled.path_contrib.dtype == np.float32
+    assert compiled.path_contrib.shape == (compiled.n_nodes, compiled.n_features)
+    proba, contributions = compiled.explain(X)
+    np.testing.assert_allclose(compiled.bias[-1] + contributions.sum(axis=1), proba[:, 1], atol=1e-5)
+
+
+def test_saved_forest_is_memory_mapped(forest, tmp_path):
+    model, X = forest
+    compiled = compile_forest(model)
+    loaded = load_compiled(save_compiled(compiled, str(tmp_path / "v1")), mmap=True)
+    assert not loaded.path_contrib.flags.writeable
+    np.testing.assert_array_equal(loaded.predict_proba(X), compiled.predict_proba(X))
+    np.testing.assert_array_equal(loaded.explain(X)[1], compiled.explain(X)[1])
@@ -0,0 +1,179 @@
+# backend/tests/test_job_executor.py
+import time
+from datetime import timedelta
+
+import pytest
+from pymongo.errors import DuplicateKeyError
+
+import ml.job_executor as job_executor
+from ml.job_executor import JobExecutor
+
+
+def sleep_job(job_id=None, seconds=0.0):
+    # runs in the spawned worker process
+    time.sleep(seconds)
+
+
+@pytest.fixture(autouse=True)
+def no_mongo(monkeypatch):
+    # tests that need retrain_logs use the `logs` fixture, which replaces this
+    monkeypatch.setattr(job_executor, "_log_collection", lambda: None)
+
+
+@pytest.fixture
+def executor(monkeypatch):
+    monkeypatch.setitem(job_executor.JOB_TARGETS, "sleep", "test_job_executor:sleep_job")
+    ex = JobExecutor(max_workers=1)
+    yield ex
+    ex.shutdown()
+
+
+def test_identical_queued_jobs_are_deduplicated(executor):
+    running, _ = executor.submit("sleep", seconds=0.5)
+    queued, dedup = executor.submit("sleep", seconds=0.1)
+    again, dedup_again = executor.submit("sleep", seconds=0.1)
+    assert not dedup and dedup_again
+    assert again is queued
+    assert executor.wait(queued, timeout=60)
+    assert running.status == "finished" and queued.status == "finished"
+    assert queued.exitcode == 0
+    assert executor.stats()["deduplicated"] == 1
+
+
+def test_cancel_queued_and_running_jobs(executor):
+    running, _ = executor.submit("sleep", seconds=30)
+    queued, _ = executor.submit("sleep", seconds=0)
+    assert executor.cancel(queued.id).status == "cancelled"
+    assert queued.done.is_set()
+    deadline = time.time() + 60
+    while running.process is None or not running.process.is_alive():
+        assert time.time() < deadline
+        time.sleep(0.05)
+    executor.cancel(running.id)
+    assert executor.wait(running, timeout=30)
+    assert running.status == "cancelled"
+    assert executor.stats()["running"] == []
+
+
+def test_unknown_kind_is_rejected(executor):
+    with pytest.raises(ValueError):
+        executor.submit("nope")
+
+
+class FakeLogs:
+    """retrain_logs with the unique sparse indexes on queue_lock and run_slot."""
+
+    UNIQUE = ("queue_lock", "run_slot")
+
+    def __init__(self):
+        self.docs = []
+
+    def create_index(self, *args, **kwargs):
+        pass
+
+    def _check(self, doc):
+        for field in self.UNIQUE:
+            if field in doc and any(d is not doc and d.get(field, object()) == doc[field] for d in self.docs):
+                raise DuplicateKeyError(field)
+
+    def insert_one(self, doc):
+        doc = dict(doc, _id=len(self.docs))
+        self._check(doc)
+        self.docs.append(doc)
+
+    def find_one(self, query, projection=None):
+        return next((d for d in self.docs if all(d.get(k, object()) == v for k, v in query.items())), None)
+
+    def update_one(self, query, update):
+        doc = self.find_one(query)
+        if doc is None:
+            return
+        candidate = dict(doc, **update.get("$set", {}))
+        for field in update.get("$unset", {}):
+            candidate.pop(field, None)
+        self._check(dict(candidate))
+        doc.clear()
+        doc.update(candidate)
+
+    def update_many(self, query, update):
+        for doc in self.docs:
+            if doc["job_id"] in query["job_id"]["$in"]:
+                doc.update(update["$set"])
+
+
+@pytest.fixture
+def logs(monkeypatch):
+    logs = FakeLogs()
+    monkeypatch.setattr(job_executor, "_log_collection", lambda: logs)
+    return logs
+
+
+def _claim_only(monkeypatch, executor):
+    # claims in the shared collection, but never starts worker processes
+    monkeypatch.setattr(executor, "_start_next", lambda: None)
+    return executor
+
+
+def test_identical_queued_job_is_shared_across_executors(logs, monkeypatch):
+    first = _claim_only(monkeypatch, JobExecutor())
+    second = _claim_only(monkeypatch, JobExecutor())
+    job, dedup = first.submit("retrain", mode="full")
+    other, other_dedup = second.submit("retrain", mode="full")
+    assert not dedup and other_dedup
+    assert other.id == job.id
+
+    # different parameters are a different job
+    incremental, dedup = second.submit("retrain", mode="incremental")
+    assert not dedup and incremental.id != job.id
+
+    job_executor.update_job_log(job.id, {"status": "completed"}, release=True)
+    fresh, fresh_dedup = second.submit("retrain", mode="full")
+    assert not fresh_dedup and fresh.id != job.id
+
+
+def test_claim_without_heartbeat_is_taken_over(logs, monkeypatch):
+    ex = _claim_only(monkeypatch, JobExecutor())
+    job, _ = ex.submit("train")
+    logs.docs[0]["heartbeat_at"] -= timedelta(seconds=job_executor.RETRAIN_JOB_STALE_SECONDS + 1)
+
+    other = _claim_only(monkeypatch, JobExecutor())
+    fresh, dedup = other.submit("train")
+    assert not dedup and fresh.id != job.id
+    assert logs.docs[0]["status"] == "abandoned"
+
+
+def test_run_slots_cap_jobs_across_executors(logs, executor):
+    other = JobExecutor(max_workers=1)
+    running, _ = executor.submit("sleep", seconds=0.5)
+    waiting, _ = other.submit("sleep", seconds=0.0)
+    # the only slot is held by the first executor's job
+    assert waiting.status == "queued"
+    assert executor.wait(running, timeout=60)
+    other._start_next()  # what the heartbeat does
+    assert other.wait(waiting, timeout=60)
+    assert waiting.status == "finished"
+    other.shutdown()
+
+
+def test_deduplicated_handle_completes_with_the_job(logs, executor):
+    job, _ = executor.submit("sleep", seconds=0.3)
+    # queued again by this process after the local queue was consulted
+    holder = logs.find_one({"job_id": job.id})
+    holder["queue_lock"] = "sleep:{\"seconds\": 0.3}"
+    again, dedup = executor.submit("sleep", seconds=0.3)
+    assert dedup and again is job
+    assert executor.wait(again, timeout=60)
+
+
+def test_heartbeat_refreshes_jobs_and_retries_queued_ones(logs, monkeypatch):
+    monkeypatch.setattr(job_executor, "RETRAIN_JOB_HEARTBEAT_SECONDS", 0.01)
+    ex = JobExecutor()
+    retries = []
+    monkeypatch.setattr(ex, "_start_next", lambda: retries.append(1))
+    job, _ = ex.submit("train")
+    first_beat = logs.docs[0]["heartbeat_at"]
+    deadline = time.time() + 5
+    while logs.docs[0]["heartbeat_at"] == first_beat or len(retries) < 3:
+        assert time.time() < deadline
+        time.sleep(0.01)
+    ex.shutdown()
@@ -0,0 +1,79 @@
+# backend/tests/test_micro_batch.py
+import time
+import threading
+from concurrent.futures import TimeoutError as FutureTimeout
+
+import pytest
+
+from ml.micro_batch import MicroBatcher
+
+
+def _double(items):
+    return [2 * i for i in items]
+
+
+def test_concurrent_items_share_batches():
+    batcher = MicroBatcher(_double, max_batch_size=16, max_wait_ms=20)
+    futures = [batcher.submit(i) for i in range(40)]
+    assert [f.result(2) for f in futures] == [2 * i for i in range(40)]
+    stats = batcher.stats()
+    assert stats["items"] == 40
+    assert stats["batches"] < 40
+    batcher.close()
+
+
+def test_batch_errors_reach_every_caller():
+    def fail(items):
+        raise ValueError("boom")
+
+    batcher = MicroBatcher(fail, max_batch_size=8, max_wait_ms=10)
+    futures = [batcher.submit(i) for i in range(5)]
+    for f in futures:
+        with pytest.raises(ValueError):
+            f.result(2)
+    batcher.close()
+
+
+def test_call_times_out_on_slow_batch():
+    release = threading.Event()
+
+    def slow(items):
+        release.wait(5)
+        return items
+
+    batcher = MicroBatcher(slow, max_batch_size=1)
+    with pytest.raises(FutureTimeout):
+        batcher(1, timeout=0.05)
+    release.set()
+    batcher.close()
+
+
+def test_submit_after_close_runs_inline():
+    batcher = MicroBatcher(_double)
+    assert batcher(1, timeout=2) == 2
+    batcher.close()
+    assert batcher(3, timeout=2) == 6
+
+
+def test_close_racing_submit_never_strands_a_caller():
+    for _ in range(50):
+        batcher = MicroBatcher(_double, max_batch_size=4, max_wait_ms=0)
+        futures = []
+        start = threading.Barrier(5)
+
+        def submit_some():
+            start.wait()
+            for i in range(20):
+                futures.append(batcher.submit(i))
+
+        threads = [threading.Thread(target=submit_some) for _ in range(4)]
+        for t in threads:
+            t.start()
+        start.wait()
+        time.sleep(0.0005)
+        batcher.close()
+        for t in threads:
+            t.join()
+        for f in futures:
+            # resolved one way or the other, never left pending
+            assert f.exception(timeout=2) is None or isinstance(f.exception(), RuntimeError)
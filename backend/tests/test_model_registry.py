@@ -0,0 +1,103 @@
+# backend/tests/test_model_registry.py
+import time
+import threading
+
+import pytest
+
+import ml.deployed_model as deployed_model
+from ml.deployed_model import ModelHolder
+from ml.model_registry import ModelRegistry, UnknownModelVersion
+
+
+class FakeModel:
+    def __init__(self, model_path, version, feature_importance_path=None):
+        self.version = version
+        self.closed = False
+
+    def close(self):
+        self.closed = True
+
+    def memory_report(self):
+        return {}
+
+
+@pytest.fixture
+def registry(tmp_path):
+    reg = ModelRegistry(str(tmp_path), factory=FakeModel, max_loaded=2)
+    for version in ("v1", "v2", "v3"):
+        path = tmp_path / f"risk_model_{version}.pkl"
+        path.write_bytes(b"model")
+        reg.register(version, str(path))
+    return reg
+
+
+def test_first_registered_version_is_active(registry):
+    assert registry.active_version() == "v1"
+    assert registry.get().version == "v1"
+    with pytest.raises(UnknownModelVersion):
+        registry.get("v9")
+
+
+def test_lru_eviction_closes_models_but_keeps_active(registry):
+    active = registry.get()
+    v2 = registry.get("v2")
+    assert registry.get("v2") is v2
+    v3 = registry.get("v3")
+    assert v2.closed
+    assert not active.closed and not v3.closed
+    assert registry.stats()["loaded"] == ["v1", "v3"]
+    assert registry.stats()["evictions"] == 1
+
+
+def test_release_only_closes_models_outside_the_lru(registry):
+    v2 = registry.get("v2")
+    registry.release(v2)
+    assert not v2.closed
+    registry.forget("v2")
+    registry.release(v2)
+    assert v2.closed
+
+
+def test_concurrent_loads_build_one_instance(tmp_path):
+    built = []
+
+    def slow_factory(**kwargs):
+        time.sleep(0.05)
+        model = FakeModel(**kwargs)
+        built.append(model)
+        return model
+
+    reg = ModelRegistry(str(tmp_path), factory=slow_factory)
+    path = tmp_path / "risk_model_v1.pkl"
+    path.write_bytes(b"model")
+    reg.register("v1", str(path))
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(reg.get("v1"))) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join(5)
+    assert len({id(m) for m in results}) == 1
+    # any extra instance built by a late leader was closed, never handed out
+    assert all(m.closed for m in built if m is not results[0])
+
+
+def test_other_instances_see_activation(registry, tmp_path):
+    other = ModelRegistry(str(tmp_path), factory=FakeModel)
+    other.set_active("v3")
+    time.sleep(0.01)
+    assert registry.active_version() == "v3"
+
+
+def test_fresh_reload_builds_a_new_instance(registry, monkeypatch):
+    monkeypatch.setattr(deployed_model, "smoke_test", lambda model: None)
+    holder = ModelHolder(factory=lambda **kw: registry.get(kw.get("version")), release=registry.release,
+                         forget=lambda version: registry.forget(version or registry.active_version()))
+    served = holder.get()
+    # a plain reload may reuse the cached instance (e.g. following activation)
+    assert holder.reload() is served
+    reloaded = holder.reload(fresh=True)
+    assert reloaded is not served
+    assert served.closed and not reloaded.closed
+    assert registry.get() is reloaded
+    assert registry.stats()["loads"] == 2
@@ -0,0 +1,52 @@
+# backend/tests/test_news_cache.py
+import types
+
+import pytest
+
+from src.data_ingestion import news_cache
+from src.data_ingestion.news_cache import TTLLRUCache, FRESH, STALE
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(news_cache, "time", types.SimpleNamespace(monotonic=lambda: now[0]))
+    return now
+
+
+def test_fresh_then_stale_then_expired(clock):
+    cache = TTLLRUCache(max_entries=4, ttl=10, stale_ttl=20)
+    cache.set("india", [1])
+    assert cache.get("india") == ([1], FRESH)
+    clock[0] += 15
+    assert cache.get("india") == ([1], STALE)
+    clock[0] += 20
+    assert cache.get("india") == (None, None)
+    stats = cache.stats()
+    assert (stats["hits"], stats["stale_hits"], stats["misses"], stats["expirations"]) == (1, 1, 1, 1)
+
+
+def test_least_recently_used_is_evicted(clock):
+    cache = TTLLRUCache(max_entries=2, ttl=10)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+    assert cache.get("b") == (None, None)
+    assert cache.get("a") == (1, FRESH)
+    assert cache.get("c") == (3, FRESH)
+    assert cache.stats()["evictions"] == 1
+
+
+def test_one_background_refresh_per_key(clock):
+    cache = TTLLRUCache(ttl=10, stale_ttl=20)
+    cache.set("k", "old")
+    clock[0] += 15
+    value, state = cache.get("k")
+    assert (value, state) == ("old", STALE)
+    assert cache.begin_refresh("k")
+    assert not cache.begin_refresh("k")
+    cache.set("k", "new")
+    cache.end_refresh("k")
+    assert cache.get("k") == ("new", FRESH)
+    assert cache.begin_refresh("k")
@@ -0,0 +1,75 @@
+# backend/tests/test_single_flight.py
+import threading
+
+import pytest
+
+from src.utils.single_flight import SingleFlight
+
+
+def _run_concurrently(n, target):
+    threads = [threading.Thread(target=target) for _ in range(n)]
+    for t in threads:
+        t.start()
+    return threads
+
+
+def test_concurrent_calls_share_one_execution():
+    flight = SingleFlight()
+    started, release = threading.Event(), threading.Event()
+    calls, results = [], []
+
+    def fn():
+        calls.append(1)
+        started.set()
+        release.wait(5)
+        return "value"
+
+    leader = _run_concurrently(1, lambda: results.append(flight.do("k", fn)))
+    started.wait(5)
+    followers = _run_concurrently(5, lambda: results.append(flight.do("k", fn)))
+    while flight.stats()["coalesced"] < 5:
+        pass
+    release.set()
+    for t in leader + followers:
+        t.join(5)
+    assert len(calls) == 1
+    assert results == ["value"] * 6
+    assert flight.stats() == {"in_flight": 0, "leaders": 1, "coalesced": 5}
+
+
+def test_errors_reach_followers_and_key_is_released():
+    flight = SingleFlight()
+    started, release = threading.Event(), threading.Event()
+    errors = []
+
+    def fail():
+        started.set()
+        release.wait(5)
+        raise KeyError("missing")
+
+    def call():
+        try:
+            flight.do("k", fail)
+        except KeyError as e:
+            errors.append(e)
+
+    threads = _run_concurrently(1, call)
+    started.wait(5)
+    threads += _run_concurrently(3, call)
+    while flight.stats()["coalesced"] < 3:
+        pass
+    release.set()
+    for t in threads:
+        t.join(5)
+    assert len(errors) == 4
+    # a failed call is not cached: the next one runs again
+    assert flight.do("k", lambda: 42) == 42
+
+
+def test_different_keys_run_separately():
+    flight = SingleFlight()
+    assert flight.do("a", lambda: 1) == 1
+    assert flight.do("b", lambda: 2) == 2
+    with pytest.raises(ZeroDivisionError):
+        flight.do("c", lambda: 1 / 0)
+    assert flight.stats()["leaders"] == 3